@@ -293,8 +293,8 @@ async def quick_analysis(request: QuickAnalysisRequest):
         url = str(request.url)
         scraper = BusinessScraper()
         
-        # Solo scraping web básico
-        result = scraper.scrape_business(url, output_dir="./temp_output")
+        # Solo scraping web básico (en un hilo para no bloquear el event loop)
+        result = await asyncio.to_thread(scraper.scrape_business, url, output_dir="./temp_output")
         
         # Análisis rápido
         engine = IntelligenceEngine()
@@ -373,7 +373,7 @@ async def run_investigation(job_id: str, url: str, include_maps: bool, include_s
         
         try:
             scraper = BusinessScraper()
-            web_result = scraper.scrape_business(url, output_dir="./temp_output")
+            web_result = await asyncio.to_thread(scraper.scrape_business, url, output_dir="./temp_output")
             result["web_data"] = {
                 "productos_count": len(web_result.get("productos", [])),
                 "nombre_negocio": web_result.get("contexto", {}).get("nombre_negocio", ""),
@@ -0,0 +1,191 @@
+"""
+Configuración compartida del proceso.
+Parsea config.yaml una sola vez, la valida y la recarga en caliente
+cuando cambia el mtime del archivo (sin reiniciar el servidor).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import yaml
+from rich.console import Console
+
+console = Console()
+
+DEFAULT_CONFIG_PATH = "config.yaml"
+
+# Secciones que, si están presentes, deben ser diccionarios
+_MAPPING_SECTIONS = (
+    'general', 'batch', 'http', 'render_router', 'grid_detection', 'browser_pool', 'crawler', 'catalog_api',
+    'pagination', 'enrichment', 'image_probe', 'image_download', 'prices', 'default_selectors', 'platforms',
+    'business_context', 'resource_blocking', 'output'
+)
+_SELECTOR_FIELDS = ('producto', 'nombre', 'precio', 'descripcion', 'imagen', 'url_producto')
+_HTML_PARSERS = ('lxml', 'bs4')
+
+
+class ConfigError(ValueError):
+    """El archivo de configuración no es válido."""
+
+
+def validate_config(data: Any) -> Dict:
+    """
+    Valida la estructura de config.yaml.
+
+    Args:
+        data: Resultado de yaml.safe_load
+
+    Returns:
+        La configuración validada (un archivo vacío equivale a {})
+
+    Raises:
+        ConfigError: Si alguna sección tiene un tipo o valor inválido
+    """
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ConfigError("La raíz de la configuración debe ser un diccionario")
+
+    for section in _MAPPING_SECTIONS:
+        if data.get(section) is not None and not isinstance(data[section], dict):
+            raise ConfigError(f"La sección '{section}' debe ser un diccionario")
+
+    general = data.get('general') or {}
+    if 'timeout' in general and not isinstance(general['timeout'], (int, float)):
+        raise ConfigError("general.timeout debe ser numérico (ms)")
+    if general.get('html_parser') not in (None, *_HTML_PARSERS):
+        raise ConfigError(f"general.html_parser debe ser uno de: {', '.join(_HTML_PARSERS)}")
+
+    for key, value in (data.get('batch') or {}).items():
+        if not isinstance(value, int) or value < 1:
+            raise ConfigError(f"batch.{key} debe ser un entero >= 1")
+
+    for platform, selectors in (data.get('platforms') or {}).items():
+        if not isinstance(selectors, dict):
+            raise ConfigError(f"platforms.{platform} debe ser un diccionario de selectores")
+        for field_name, selector in selectors.items():
+            if field_name not in _SELECTOR_FIELDS:
+                raise ConfigError(f"platforms.{platform}.{field_name}: campo desconocido")
+            if not isinstance(selector, str):
+                raise ConfigError(f"platforms.{platform}.{field_name} debe ser un string CSS")
+
+    for field_name, selectors in (data.get('default_selectors') or {}).items():
+        if field_name not in _SELECTOR_FIELDS:
+            raise ConfigError(f"default_selectors.{field_name}: campo desconocido")
+        if not isinstance(selectors, list) or not all(isinstance(s, str) for s in selectors):
+            raise ConfigError(f"default_selectors.{field_name} debe ser una lista de strings CSS")
+
+    return data
+
+
+class AppConfig:
+    """Configuración cacheada con recarga en caliente por mtime."""
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, check_interval: float = 1.0):
+        """
+        Carga la configuración.
+
+        Args:
+            path: Ruta al archivo YAML
+            check_interval: Segundos mínimos entre chequeos de mtime
+
+        Raises:
+            ConfigError: Si el archivo existe pero no es válido en la primera carga
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._version = 0
+        self._data: Dict = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._load(initial=True)
+
+    @property
+    def data(self) -> Dict:
+        """Configuración completa (recarga si el archivo cambió)."""
+        self._maybe_reload()
+        return self._data
+
+    @property
+    def version(self) -> int:
+        """Contador que se incrementa en cada recarga exitosa (sirve como clave de caché)."""
+        self._maybe_reload()
+        return self._version
+
+    def section(self, name: str) -> Dict:
+        """Una sección de la configuración ({} si no existe)."""
+        return self.data.get(name) or {}
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            if self._current_mtime() != self._mtime:
+                self._load(initial=False)
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _load(self, initial: bool):
+        mtime = self._current_mtime()
+        if mtime is None:
+            if initial:
+                # Sin archivo: se usan los defaults de cada módulo, pero que se note
+                console.print(f"[yellow]⚠️ No se encontró {self.path}: se usan los valores por defecto[/yellow]")
+                self._data, self._mtime = {}, None
+                self._version += 1
+            else:
+                # Borrado (o en medio de un reemplazo): se mantiene la última configuración válida
+                console.print(f"[yellow]⚠️ {self.path} ya no existe: se mantiene la configuración cargada[/yellow]")
+                self._mtime = None
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = validate_config(yaml.safe_load(f))
+        except (yaml.YAMLError, ConfigError) as e:
+            if initial:
+                raise ConfigError(f"Configuración inválida en {self.path}: {e}") from e
+            # Recarga fallida: se mantiene la última configuración válida
+            console.print(f"[yellow]⚠️ No se recargó {self.path}: {e}[/yellow]")
+            self._mtime = mtime
+            return
+        self._data, self._mtime = data, mtime
+        self._version += 1
+        if not initial:
+            console.print(f"[dim]🔁 Configuración recargada desde {self.path}[/dim]")
+
+
+_configs: Dict[str, AppConfig] = {}
+_active_path = os.path.abspath(DEFAULT_CONFIG_PATH)
+_configs_lock = threading.Lock()
+
+
+def get_config(path: Optional[str] = None) -> AppConfig:
+    """
+    Obtiene la configuración compartida del proceso.
+
+    Args:
+        path: Ruta al YAML; si se indica pasa a ser la configuración activa,
+              la que leen los módulos que llaman sin ruta
+
+    Returns:
+        AppConfig cacheada para esa ruta
+    """
+    global _active_path
+    with _configs_lock:
+        if path is not None:
+            _active_path = os.path.abspath(path)
+        config = _configs.get(_active_path)
+        if config is None:
+            config = _configs[_active_path] = AppConfig(_active_path)
+        return config
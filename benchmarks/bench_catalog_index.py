@@ -0,0 +1,60 @@
+"""
+Benchmark: deduplicación de catálogos grandes con CatalogIndex.
+Simula listados y fichas del mismo catálogo (cada producto aparece en un listado,
+en un carrusel de destacados y en su ficha) y mide el tiempo por inserción.
+
+Uso:
+    python benchmarks/bench_catalog_index.py [cantidad_de_productos]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_index import CatalogIndex
+
+
+def appearances(products: int, seed: int = 7):
+    """(producto, url) de listados, destacados y fichas, mezclados como en un rastreo."""
+    rng = random.Random(seed)
+    cdn = "https://cdn.shopify.com/s/files/1/0001"
+    items = []
+    for i in range(products):
+        name = f"Producto de prueba {i}"
+        items.append(({
+            'nombre_articulo': name, 'precio': f"$ {rng.randint(1000, 99999)}",
+            'descripcion': '', 'url_imagenes': f"{cdn}/item-{i}_400x.jpg?v=1"
+        }, None))
+        if i % 10 == 0:
+            items.append(({
+                'nombre_articulo': name.upper(), 'precio': '',
+                'descripcion': '', 'url_imagenes': f"{cdn}/item-{i}_200x.jpg"
+            }, None))
+        items.append(({
+            'nombre_articulo': name, 'precio': '',
+            'descripcion': f"Descripción completa del producto {i} con materiales y talles.",
+            'url_imagenes': f"{cdn}/item-{i}.jpg"
+        }, f"https://tienda-demo.com/collections/todo/products/item-{i}?variant={i}"))
+    rng.shuffle(items)
+    return items
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for size in sorted({products // 10, products}):
+        items = appearances(size)
+        index = CatalogIndex()
+        start = time.perf_counter()
+        for product, url in items:
+            index.add(dict(product), url=url)
+        elapsed = time.perf_counter() - start
+        complete = sum(1 for p in index.products() if p['precio'] and p['descripcion'])
+        print(f"{size:>8} productos  {len(items):>8} inserciones  {elapsed:>6.2f} s"
+              f"  {elapsed / len(items) * 1e6:>5.1f} µs/inserción  únicos={len(index)}  completos={complete}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: extracción de contexto en una sola pasada vs. múltiples find_all/select.
+
+Uso:
+    python benchmarks/bench_context_visitor.py [pagina1.html pagina2.html ...]
+
+Sin argumentos usa benchmarks/pages/*.html o, si no hay, una tienda sintética de ~3 MB.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from business_context_extractor import collect_context_signals
+from html_parser import SoupNode
+from selectors_database import SelectorsDatabase
+from fixtures import load_saved_pages, synthetic_storefront
+
+
+def legacy_passes(soup: BeautifulSoup):
+    """Recorridos que hacían _extract_context_static y BusinessContextExtractor."""
+    selectors = SelectorsDatabase.get_business_selectors()
+    for link in soup.find_all('a', href=True):
+        link['href'].lower()
+    for link in soup.find_all('a', href=True):
+        link['href'].startswith('mailto:')
+    soup.find('title')
+    soup.find('meta', property='og:site_name')
+    soup.select_one('header img[alt], .logo img[alt], .brand img[alt]')
+    soup.find('h1')
+    soup.select(selectors['phone'])
+    soup.select(selectors['email'])
+    soup.select_one(selectors['address'])
+    for key in ('social_instagram', 'social_facebook', 'social_twitter', 'social_linkedin'):
+        soup.select_one(selectors[key])
+    soup.select_one(selectors['about'])
+    soup.find('meta', attrs={'name': 'description'})
+    soup.select_one(selectors['faq'])
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    pages = load_saved_pages(sys.argv[1:])
+    if not pages:
+        pages = [("sintetica_~3MB", synthetic_storefront(products=6000))]
+
+    print(f"{'página':<28}{'MB':>6}{'multi-pasada':>15}{'una pasada':>13}{'speedup':>9}")
+    for name, html in pages:
+        soup = BeautifulSoup(html, 'lxml')
+        legacy = best_of(lambda: legacy_passes(soup))
+        doc = SoupNode(soup)
+        single = best_of(lambda: collect_context_signals(doc))
+        size_mb = len(html.encode('utf-8')) / 1024 / 1024
+        print(f"{name[:27]:<28}{size_mb:>6.2f}{legacy * 1000:>12.1f} ms{single * 1000:>10.1f} ms{legacy / single:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
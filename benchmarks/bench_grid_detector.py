@@ -0,0 +1,41 @@
+"""
+Benchmark: detección estructural de la grilla en una tienda sin plataforma conocida.
+Compara los productos que encuentran los selectores genéricos contra los de la grilla
+detectada, y mide el tiempo de detección a medida que crece la página (debe ser lineal).
+
+Uso:
+    python benchmarks/bench_grid_detector.py [cantidad_de_productos]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_storefront
+from grid_detector import detect_product_grid
+from html_parser import parse_html
+from product_extractor import ProductExtractor
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for size in sorted({products // 10, products}):
+        html = synthetic_storefront(size, platform='generic')
+        for backend in ('lxml', 'bs4'):
+            doc = parse_html(html, backend)
+            start = time.perf_counter()
+            grid = detect_product_grid(doc)
+            elapsed = time.perf_counter() - start
+            generic = ProductExtractor(None, parser=backend).extract_products_from_document(doc, 'https://demo.com')
+            detected = ProductExtractor(
+                None, parser=backend, selectors=grid.selectors if grid else None
+            ).extract_products_from_document(doc, 'https://demo.com')
+            print(f"{size:>6} productos  {backend:<4}  detección {elapsed * 1000:>7.1f} ms"
+                  f"  genéricos={len(generic):>5}  grilla={len(detected):>5}"
+                  f"  ({grid.selectors['producto'] if grid else 'sin grilla'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: backends de html_parser (BeautifulSoup vs. lxml) en parseo + extracción.
+
+Uso:
+    python benchmarks/bench_parser.py [pagina1.html pagina2.html ...]
+
+Sin argumentos usa benchmarks/pages/*.html o, si no hay, una tienda sintética.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from business_context_extractor import collect_context_signals
+from html_parser import parse_html
+from product_extractor import ProductExtractor
+from selectors_database import SelectorsDatabase
+from fixtures import load_saved_pages, synthetic_storefront
+
+
+def run(html: str, backend: str, url: str = "https://tienda-demo.com"):
+    doc = parse_html(html, backend)
+    platform = SelectorsDatabase.detect_platform(html)
+    products = ProductExtractor(platform, parser=backend).extract_products_from_document(doc, url)
+    signals = collect_context_signals(doc)
+    return products, signals
+
+
+def timed(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    pages = load_saved_pages(sys.argv[1:])
+    if not pages:
+        pages = [("sintetica_1000", synthetic_storefront(products=1000))]
+
+    print(f"{'página':<24}{'MB':>6}{'bs4':>12}{'lxml':>12}{'speedup':>9}{'iguales':>9}")
+    for name, html in pages:
+        results = {backend: run(html, backend) for backend in ('bs4', 'lxml')}
+        same = results['bs4'] == results['lxml']
+        t_bs4 = timed(lambda: run(html, 'bs4'))
+        t_lxml = timed(lambda: run(html, 'lxml'))
+        size_mb = len(html.encode('utf-8')) / 1024 / 1024
+        print(f"{name[:23]:<24}{size_mb:>6.2f}{t_bs4 * 1000:>9.0f} ms{t_lxml * 1000:>9.0f} ms"
+              f"{t_bs4 / t_lxml:>8.1f}x{str(same):>9}")
+
+
+if __name__ == '__main__':
+    main()
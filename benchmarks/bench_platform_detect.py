@@ -0,0 +1,57 @@
+"""
+Benchmark: detección de plataforma con el matcher combinado (una pasada por head y tags)
+contra la búsqueda anterior, un re.search por firma sobre todo el HTML.
+
+Uso:
+    python benchmarks/bench_platform_detect.py [cantidad_de_productos]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import synthetic_storefront
+from selectors_database import SelectorsDatabase
+
+
+def detect_per_signature(html: str):
+    """Detección anterior: la primera firma que aparece en cualquier parte del documento."""
+    for platform, signatures in SelectorsDatabase.PLATFORM_SIGNATURES.items():
+        for pattern, _ in signatures:
+            if re.search(pattern, html, re.IGNORECASE):
+                return platform
+    return None
+
+
+def timed(fn, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    # Página sin plataforma cuyo texto menciona plataformas (falso positivo del método anterior)
+    mention = '<p>Antes vendíamos con WooCommerce y probamos vtex.com</p></body>'
+    pages = {
+        'shopify': synthetic_storefront(products, platform='shopify'),
+        'generic': synthetic_storefront(products, platform='generic'),
+        'generic+mención': synthetic_storefront(products, platform='generic').replace('</body>', mention),
+    }
+    for name, html in pages.items():
+        before = timed(lambda: detect_per_signature(html))
+        after = timed(lambda: SelectorsDatabase.detect_platform(html))
+        scores = {k: v for k, v in SelectorsDatabase.platform_scores(html).items() if v}
+        print(f"{name:<16} {len(html) // 1024:>5} KB  por firma {before * 1000:>6.2f} ms "
+              f"-> {detect_per_signature(html)!s:<12} combinado {after * 1000:>6.2f} ms "
+              f"-> {SelectorsDatabase.detect_platform(html)!s:<8} {scores}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: estadísticas de precios de un catálogo grande.
+Compara el parseo anterior (regex + float texto por texto) con PriceEngine
+(cada texto distinto se parsea una vez y las estadísticas salen de NumPy).
+
+Uso:
+    python benchmarks/bench_price_engine.py [cantidad_de_productos]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_engine import PriceEngine
+
+
+def price_texts(products: int, seed: int = 11):
+    """
+    Precios con el formato de una tienda argentina (miles con punto, decimales con coma).
+    Como en los catálogos reales, los importes se repiten: redondeados a 100 o terminados en 99.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(products):
+        amount = rng.randint(5, 2500) * 100 - rng.choice((0, 1))
+        kind = rng.random()
+        if kind < 0.7:
+            texts.append(f"$ {amount:,}".replace(',', '.') + ",00")
+        elif kind < 0.85:
+            texts.append(f"$ {amount:,} - $ {amount * 2:,}".replace(',', '.'))
+        elif kind < 0.95:
+            texts.append(f"Desde $ {amount:,}".replace(',', '.'))
+        else:
+            texts.append("Consultar")
+    return texts
+
+
+def naive_stats(texts):
+    """Parseo previo del resumen del Excel: primer número, sin comas, a float."""
+    prices = []
+    for text in texts:
+        numbers = re.findall(r'[\d,\.]+', text)
+        if numbers:
+            try:
+                prices.append(float(numbers[0].replace(',', '')))
+            except ValueError:
+                pass
+    return min(prices), max(prices), sum(prices) / len(prices)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    texts = price_texts(products)
+
+    start = time.perf_counter()
+    naive = naive_stats(texts)
+    t_naive = time.perf_counter() - start
+
+    engine = PriceEngine('es-AR')
+    start = time.perf_counter()
+    stats = engine.stats(texts)['ARS']
+    t_engine = time.perf_counter() - start
+
+    print(f"{products} precios ({len(set(texts))} textos distintos)")
+    print(f"anterior    {t_naive * 1000:>8.0f} ms  min={naive[0]:,.2f}  max={naive[1]:,.2f}  promedio={naive[2]:,.2f}")
+    print(f"PriceEngine {t_engine * 1000:>8.0f} ms  min={stats.min:,.2f}  max={stats.max:,.2f}"
+          f"  promedio={stats.mean:,.2f}  mediana={stats.median:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
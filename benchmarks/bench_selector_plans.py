@@ -0,0 +1,79 @@
+"""
+Benchmark: extracción de productos re-parseando los strings de selectores en cada
+producto (comportamiento anterior) y con selectores compilados (SelectorPlan).
+
+Uso:
+    python benchmarks/bench_selector_plans.py [cantidad_de_productos]
+
+Por defecto usa una tienda sintética de 1000 productos.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parser import parse_html
+from product_extractor import PLAN_FIELDS, CompiledSelector, ProductExtractor, SelectorPlan
+from structured_data import StructuredData
+from fixtures import synthetic_storefront
+
+
+class StringSelectorsExtractor(ProductExtractor):
+    """Separa y parsea los strings de selectores en cada producto, como antes de los planes."""
+
+    def _string_plan(self) -> SelectorPlan:
+        def uncompiled(css: str) -> CompiledSelector:
+            return CompiledSelector(css, css)
+
+        return SelectorPlan(
+            **{
+                name: tuple(uncompiled(css.strip()) for css in self.selectors.get(name, '').split(',') if css.strip())
+                for name in PLAN_FIELDS
+            },
+            encabezados=tuple(uncompiled(tag) for tag in ('h1', 'h2', 'h3', 'h4')),
+            parrafos=uncompiled('p')
+        )
+
+    def _plan(self, doc):
+        return self._string_plan()
+
+    def _extract_product_data(self, product_elem, base_url, plan):
+        return super()._extract_product_data(product_elem, base_url, self._string_plan())
+
+
+def timed(fn, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    html = synthetic_storefront(products=products)
+    url = "https://tienda-demo.com"
+    # Sin JSON-LD: se mide solo la extracción por selectores
+    no_structured = StructuredData()
+
+    print(f"{products} productos")
+    print(f"{'backend':<10}{'strings':>12}{'compilado':>12}{'speedup':>9}{'iguales':>9}")
+    for backend in ('lxml', 'bs4'):
+        doc = parse_html(html, backend)
+        strings = StringSelectorsExtractor('shopify', parser=backend)
+        compiled = ProductExtractor('shopify', parser=backend)
+        same = (
+            compiled.extract_products_from_document(doc, url, no_structured)
+            == strings.extract_products_from_document(doc, url, no_structured)
+        )
+        t_strings = timed(lambda: strings.extract_products_from_document(doc, url, no_structured))
+        t_compiled = timed(lambda: compiled.extract_products_from_document(doc, url, no_structured))
+        print(f"{backend:<10}{t_strings * 1000:>9.0f} ms{t_compiled * 1000:>9.0f} ms"
+              f"{t_strings / t_compiled:>8.1f}x{str(same):>9}")
+
+
+if __name__ == '__main__':
+    main()
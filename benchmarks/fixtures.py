@@ -0,0 +1,96 @@
+"""
+Páginas de prueba para los benchmarks.
+Carga HTML guardado desde disco o genera una tienda sintética del tamaño pedido.
+"""
+
+import os
+import random
+from typing import List, Tuple
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+
+def load_saved_pages(paths: List[str] = None) -> List[Tuple[str, str]]:
+    """
+    Carga páginas HTML guardadas.
+
+    Args:
+        paths: Archivos a cargar (por defecto, todo benchmarks/pages/*.html)
+
+    Returns:
+        Lista de (nombre, html)
+    """
+    if not paths:
+        if not os.path.isdir(PAGES_DIR):
+            return []
+        paths = [
+            os.path.join(PAGES_DIR, name)
+            for name in sorted(os.listdir(PAGES_DIR))
+            if name.endswith(('.html', '.htm'))
+        ]
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def synthetic_storefront(products: int = 2000, seed: int = 7, platform: str = 'shopify') -> str:
+    """
+    Genera el HTML de una tienda con header, grilla de productos y footer.
+
+    Args:
+        products: Cantidad de tarjetas de producto
+        seed: Semilla para que el HTML sea reproducible
+        platform: 'shopify' o 'generic' (cambia clases y firma)
+
+    Returns:
+        HTML de la página
+    """
+    rng = random.Random(seed)
+    card_class = 'product-card' if platform == 'shopify' else 'grid-tile'
+    title_class = 'product-card__title' if platform == 'shopify' else 'tile-name'
+    cdn = 'https://cdn.shopify.com/s/files/1/0001' if platform == 'shopify' else '/media'
+
+    parts = [
+        '<!DOCTYPE html><html lang="es"><head>',
+        '<meta charset="utf-8"><title>Tienda Demo | Ropa y Accesorios</title>',
+        '<meta name="description" content="Tienda demo con envíos a todo el país.">',
+        '<meta property="og:site_name" content="Tienda Demo">',
+        '<link rel="stylesheet" href="%s/theme.css">' % cdn,
+        '</head><body>',
+        '<header><div class="logo"><a href="/"><img src="/logo.png" alt="Tienda Demo"></a></div>',
+        '<nav><a href="/pages/nosotros">Nosotros</a><a href="/pages/contacto">Contacto</a>',
+        '<a href="/pages/preguntas-frecuentes">FAQ</a></nav></header>',
+        '<main><h1>Colección</h1><div class="collection-grid">',
+    ]
+    for i in range(products):
+        price = rng.randint(1000, 250000)
+        parts.append(
+            '<div class="%s" data-id="%d">'
+            '<a class="product-card__link" href="/products/item-%d">'
+            '<div class="product-card__image"><img src="%s/item-%d.jpg" alt="Item %d" loading="lazy"></div>'
+            '<h3 class="%s">Producto de prueba %d</h3></a>'
+            '<div class="price"><span class="money">$ %s,00</span></div>'
+            '<p class="product-card__description">Descripción larga del producto número %d con materiales y talles.</p>'
+            '<ul class="swatches"><li>S</li><li>M</li><li>L</li></ul>'
+            '<script>window.tracking && window.tracking.push({id: %d});</script>'
+            '</div>' % (
+                card_class, i, i, cdn, i, i, title_class, i,
+                '{:,}'.format(price).replace(',', '.'), i, i
+            )
+        )
+    parts += [
+        '</div></main><footer>',
+        '<div class="address">Av. Siempre Viva 742, Buenos Aires</div>',
+        '<a href="tel:+5491100000000">Llamanos</a>',
+        '<a href="https://wa.me/5491100000000">WhatsApp</a>',
+        '<a href="mailto:hola@tiendademo.com">hola@tiendademo.com</a>',
+        '<a href="https://instagram.com/tiendademo">IG</a>',
+        '<a href="https://facebook.com/tiendademo">FB</a>',
+        '<a href="/policies/envios-shipping">Envíos</a>',
+        '<a href="/policies/devoluciones">Devoluciones</a>',
+        '<a href="/policies/terminos">Términos</a>',
+        '</footer></body></html>',
+    ]
+    return ''.join(parts)
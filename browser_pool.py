@@ -0,0 +1,330 @@
+"""
+Pool de navegadores Chromium reutilizables.
+Mantiene instancias de Chromium calientes y entrega un BrowserContext
+nuevo (aislado) por cada trabajo, evitando el arranque en frío por prospecto.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Playwright
+from rich.console import Console
+
+from app_config import get_config
+
+console = Console()
+
+# Argumentos críticos para Docker/Railway
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu"
+]
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class _PooledBrowser:
+    """Navegador del pool con sus contadores de uso."""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.created_at = time.monotonic()
+        self.active_contexts = 0
+        self.served_contexts = 0
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium de larga vida.
+
+    La API sync de Playwright está atada al hilo que la inicia: un pool solo se
+    usa desde el hilo que lo creó. Los scrapers no lo crean directamente, lo
+    usan a través de los hilos dueños de BrowserWorkers (get_browser_workers()).
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        max_browsers: int = 2,
+        max_contexts_per_browser: int = 4,
+        max_uses_per_browser: int = 50,
+        max_browser_age: float = 900
+    ):
+        """
+        Inicializa el pool (los navegadores se lanzan bajo demanda).
+
+        Args:
+            headless: Ejecutar Chromium sin interfaz
+            max_browsers: Máximo de navegadores vivos en el pool
+            max_contexts_per_browser: Contextos simultáneos antes de abrir otro navegador
+            max_uses_per_browser: Contextos servidos antes de reciclar el navegador
+            max_browser_age: Segundos de vida antes de reciclar el navegador
+        """
+        self.headless = headless
+        self.max_browsers = max(1, max_browsers)
+        self.max_contexts_per_browser = max(1, max_contexts_per_browser)
+        self.max_uses_per_browser = max(1, max_uses_per_browser)
+        self.max_browser_age = max_browser_age
+
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._launched = 0
+        self._recycled = 0
+
+    @contextmanager
+    def new_context(self, **context_kwargs) -> Iterator[BrowserContext]:
+        """
+        Entrega un BrowserContext nuevo sobre un navegador caliente.
+        El contexto se cierra al salir; el navegador queda en el pool.
+
+        Args:
+            **context_kwargs: Argumentos para Browser.new_context (user_agent, viewport, etc.)
+
+        Yields:
+            BrowserContext aislado para el trabajo
+        """
+        context_kwargs.setdefault('user_agent', DEFAULT_USER_AGENT)
+
+        entry = self._checkout()
+        try:
+            context = entry.browser.new_context(**context_kwargs)
+        except Exception:
+            # El navegador murió entre el health check y el uso
+            self._release(entry)
+            self._retire(entry)
+            entry = self._checkout()
+            try:
+                context = entry.browser.new_context(**context_kwargs)
+            except Exception:
+                self._release(entry)
+                raise
+
+        try:
+            yield context
+        finally:
+            try:
+                context.close()
+            except Exception:
+                pass
+            self._release(entry)
+
+    def _checkout(self) -> _PooledBrowser:
+        """Selecciona (o lanza) el navegador con menos carga."""
+        self._prune()
+
+        available = [
+            b for b in self._browsers
+            if b.active_contexts < self.max_contexts_per_browser and not self._needs_recycle(b)
+        ]
+        if available:
+            entry = min(available, key=lambda b: b.active_contexts)
+        elif len(self._browsers) < self.max_browsers:
+            entry = self._launch()
+        else:
+            # Pool lleno: en un mismo hilo no se puede esperar, compartimos el menos cargado
+            entry = min(self._browsers, key=lambda b: b.active_contexts)
+
+        entry.active_contexts += 1
+        entry.served_contexts += 1
+        return entry
+
+    def _release(self, entry: _PooledBrowser):
+        """Devuelve un contexto al pool y recicla si corresponde."""
+        entry.active_contexts = max(0, entry.active_contexts - 1)
+        if entry.active_contexts == 0 and self._needs_recycle(entry):
+            self._retire(entry)
+            self._recycled += 1
+
+    def _launch(self) -> _PooledBrowser:
+        """Lanza un nuevo Chromium dentro del pool."""
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+
+        browser = self._playwright.chromium.launch(
+            headless=self.headless,
+            args=BROWSER_ARGS
+        )
+        entry = _PooledBrowser(browser)
+        self._browsers.append(entry)
+        self._launched += 1
+        return entry
+
+    def _needs_recycle(self, entry: _PooledBrowser) -> bool:
+        """Indica si el navegador superó su vida útil."""
+        age = time.monotonic() - entry.created_at
+        return entry.served_contexts >= self.max_uses_per_browser or age >= self.max_browser_age
+
+    def _is_healthy(self, entry: _PooledBrowser) -> bool:
+        """Health check: el proceso de Chromium sigue conectado."""
+        try:
+            return entry.browser.is_connected()
+        except Exception:
+            return False
+
+    def _prune(self):
+        """Descarta navegadores caídos y recicla los ociosos vencidos."""
+        for entry in list(self._browsers):
+            if not self._is_healthy(entry):
+                self._retire(entry)
+            elif entry.active_contexts == 0 and self._needs_recycle(entry):
+                self._retire(entry)
+                self._recycled += 1
+
+    def _retire(self, entry: _PooledBrowser):
+        """Cierra un navegador y lo saca del pool."""
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+        try:
+            entry.browser.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """Métricas del pool."""
+        return {
+            'browsers_alive': len(self._browsers),
+            'active_contexts': sum(b.active_contexts for b in self._browsers),
+            'launched': self._launched,
+            'recycled': self._recycled
+        }
+
+    def close(self):
+        """Cierra todos los navegadores y detiene Playwright."""
+        for entry in list(self._browsers):
+            self._retire(entry)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_registry_lock = threading.Lock()
+
+
+class BrowserWorkers:
+    """
+    Hilos dueños de Playwright para trabajos que llegan desde hilos efímeros.
+
+    Los hilos del ejecutor de asyncio.to_thread o los workers de un batch no
+    pueden cerrar un pool sync de Playwright desde otro hilo, y cada uno que
+    abre su propio pool deja un Chromium huérfano. Aquí un número fijo de
+    hilos mantiene los pools y ejecuta fn(context); el llamador solo espera
+    el resultado. El número de hilos es además el tope de renders simultáneos.
+    """
+
+    def __init__(self, size: int = 2, headless: bool = True, **pool_kwargs):
+        """
+        Args:
+            size: Hilos dueños (renders simultáneos como máximo)
+            headless: Ejecutar Chromium sin interfaz
+            **pool_kwargs: Límites del BrowserPool de cada hilo
+        """
+        self.size = max(1, size)
+        self.headless = headless
+        self.pool_kwargs = pool_kwargs
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def run(self, fn: Callable[[BrowserContext], Any], **context_kwargs) -> Any:
+        """
+        Ejecuta fn con un BrowserContext nuevo en un hilo dueño y espera su resultado.
+        Las excepciones de fn se relanzan en el hilo llamador.
+
+        Args:
+            fn: Trabajo a ejecutar; recibe el contexto y no debe guardarlo
+            **context_kwargs: Argumentos para Browser.new_context (user_agent, viewport, etc.)
+        """
+        self._start()
+        future: Future = Future()
+        self._jobs.put((fn, context_kwargs, future))
+        return future.result()
+
+    def _start(self):
+        """Arranca los hilos dueños la primera vez que llega un trabajo."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BrowserWorkers cerrado")
+            if self._threads:
+                return
+            for i in range(self.size):
+                thread = threading.Thread(target=self._serve, name=f"browser-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _serve(self):
+        """Bucle de un hilo dueño: su pool vive y muere en este hilo."""
+        pool = BrowserPool(headless=self.headless, **self.pool_kwargs)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                fn, context_kwargs, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with pool.new_context(**context_kwargs) as context:
+                        result = fn(context)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            pool.close()
+
+    def close(self, timeout: float = 30):
+        """Detiene los hilos dueños; cada uno cierra sus navegadores antes de salir."""
+        with self._lock:
+            self._closed = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+
+_workers: Dict[bool, BrowserWorkers] = {}
+
+
+def get_browser_workers(headless: bool = True, size: Optional[int] = None, **pool_kwargs) -> BrowserWorkers:
+    """
+    Obtiene los hilos dueños compartidos por todo el proceso (uno por modo headless).
+    Todos los scrapers con Chromium pasan por aquí, así el proceso mantiene un solo
+    conjunto de navegadores.
+
+    Args:
+        headless: Ejecutar Chromium sin interfaz
+        size: Renders simultáneos (default: batch.max_heavy); solo aplica al crearlos
+        **pool_kwargs: Límites del pool (default: sección browser_pool); solo aplican al crearlos
+    """
+    with _registry_lock:
+        workers = _workers.get(headless)
+        if workers is None:
+            config = get_config()
+            if size is None:
+                size = config.section('batch').get('max_heavy', 2)
+            pool_kwargs = pool_kwargs or config.section('browser_pool')
+            workers = _workers[headless] = BrowserWorkers(size, headless, **pool_kwargs)
+        return workers
+
+
+@atexit.register
+def _close_all_pools():
+    """Cierre best-effort de los navegadores al terminar el proceso."""
+    with _registry_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for owner in workers:
+        owner.close(timeout=5)
@@ -4,17 +4,148 @@ Extrae datos como contacto, redes sociales, políticas, etc.
 """
 
 import re
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
 from playwright.sync_api import Page
+from app_config import get_config
+from html_parser import HtmlNode, parse_html
+from render_readiness import wait_for_ready
 from selectors_database import SelectorsDatabase
+from structured_data import business_record, extract_structured_data
+
+
+# Palabras clave en href para cada tipo de enlace (equivalen a [href*='...'])
+SOCIAL_DOMAINS = [
+    ('instagram', 'instagram.com'),
+    ('facebook', 'facebook.com'),
+    ('linkedin', 'linkedin.com'),
+    ('twitter', 'twitter.com'),
+    ('twitter', 'x.com'),
+]
+SECTION_LINK_KEYWORDS = {
+    'about': ('nosotros', 'about'),
+    'contact': ('contacto', 'contact'),
+    'faq': ('preguntas', 'faq'),
+}
+POLICY_LINK_KEYWORDS = {
+    'envio': ('envio', 'shipping'),
+    'devoluciones': ('devolucion', 'return'),
+    'terminos': ('terminos', 'terms'),
+}
+ADDRESS_CLASSES = {'address', 'direccion'}
+BRAND_CLASSES = {'logo', 'brand'}
+
+
+@dataclass
+class ContextSignals:
+    """Señales de contexto recolectadas en una sola pasada por el DOM."""
+    title: str = ""
+    meta_description: str = ""
+    og_site_name: str = ""
+    logo_alt: str = ""
+    first_h1: str = ""
+    address: str = ""
+    social: Dict[str, List[str]] = field(default_factory=dict)
+    phone_links: List[str] = field(default_factory=list)
+    email_links: List[str] = field(default_factory=list)
+    links: Dict[str, str] = field(default_factory=dict)
+
+
+def collect_context_signals(doc: HtmlNode) -> ContextSignals:
+    """
+    Recorre el árbol una única vez y clasifica cada anchor, meta y title
+    en todos los buckets de contexto (redes, contacto, políticas, secciones).
+
+    Args:
+        doc: Documento parseado (cualquier backend de html_parser)
+
+    Returns:
+        ContextSignals con los primeros matches en orden de documento
+    """
+    signals = ContextSignals()
+    found_title = found_h1 = found_address = False
+
+    # DFS iterativo en orden de documento; el flag indica si estamos dentro de header/.logo/.brand
+    stack = [(doc, False)]
+    while stack:
+        node, in_brand = stack.pop()
+        name = node.tag
+        attrs = node.attrs
+        classes = node.classes
+        href = attrs.get('href')
+
+        if name == 'title' and not found_title:
+            signals.title = node.text()
+            found_title = True
+        elif name == 'meta':
+            if attrs.get('name') == 'description' and not signals.meta_description:
+                signals.meta_description = attrs.get('content') or ""
+            elif attrs.get('property') == 'og:site_name' and not signals.og_site_name:
+                signals.og_site_name = attrs.get('content') or ""
+        elif name == 'h1' and not found_h1:
+            signals.first_h1 = node.text()
+            found_h1 = True
+        elif name == 'img' and in_brand and not signals.logo_alt and attrs.get('alt'):
+            signals.logo_alt = attrs['alt']
+
+        if not found_address and (
+            ADDRESS_CLASSES.intersection(classes) or 'PostalAddress' in (attrs.get('itemtype') or '')
+        ):
+            signals.address = node.text()
+            found_address = True
+
+        if href is not None:
+            _classify_href(signals, name, href)
+
+        # Secciones por id/clase (#about, .contact, .faq...) cuentan como primer match sin href
+        element_id = attrs.get('id')
+        for section in SECTION_LINK_KEYWORDS:
+            if section not in signals.links and (element_id == section or section in classes):
+                signals.links[section] = (href or "") if name == 'a' else ""
+
+        child_in_brand = in_brand or name == 'header' or bool(BRAND_CLASSES.intersection(classes))
+        for child in reversed(node.children()):
+            stack.append((child, child_in_brand))
+
+    return signals
+
+
+def _classify_href(signals: ContextSignals, name: str, href: str):
+    """Ubica un href en los buckets correspondientes."""
+    for policy, keywords in POLICY_LINK_KEYWORDS.items():
+        if policy not in signals.links and any(k in href for k in keywords):
+            signals.links[policy] = href
+
+    if name != 'a':
+        return
+
+    href_lower = href.lower()
+    for network, domain in SOCIAL_DOMAINS:
+        if domain in href_lower:
+            signals.social.setdefault(network, []).append(href)
+            break
+
+    if href.startswith('tel:') or 'whatsapp' in href_lower or 'wa.me' in href_lower:
+        signals.phone_links.append(href)
+    if href.startswith('mailto:'):
+        signals.email_links.append(href)
+
+    for section, keywords in SECTION_LINK_KEYWORDS.items():
+        if section not in signals.links and any(k in href for k in keywords):
+            signals.links[section] = href
 
 
 class BusinessContextExtractor:
     """Extrae información contextual de un negocio desde su sitio web."""
     
-    def __init__(self):
-        """Inicializa el extractor de contexto empresarial."""
+    def __init__(self, parser: Optional[str] = None):
+        """
+        Inicializa el extractor de contexto empresarial.
+        
+        Args:
+            parser: Backend de html_parser ('lxml' o 'bs4'; None = general.html_parser de la config)
+        """
+        self.parser = parser or get_config().section('general').get('html_parser')
         self.selectors = SelectorsDatabase.get_business_selectors()
     
     def extract_business_context(self, page: Page, base_url: str) -> Dict:
@@ -29,213 +160,172 @@ class BusinessContextExtractor:
             Diccionario con información del negocio
         """
         html_content = page.content()
-        soup = BeautifulSoup(html_content, 'lxml')
+        doc = parse_html(html_content, self.parser)
+        signals = collect_context_signals(doc)
+        # JSON-LD / microdata primero; los selectores completan lo que falte
+        structured = extract_structured_data(doc)
+        business = business_record(structured.business) if structured.business else None
         
         context = {
             'url': base_url,
-            'nombre_negocio': self._extract_business_name(soup, page),
-            'contacto': self._extract_contact_info(soup),
-            'redes_sociales': self._extract_social_media(soup),
-            'informacion_general': self._extract_general_info(soup, page, base_url),
-            'politicas': self._extract_policies(soup),
-            'faq': self._extract_faq(soup, page, base_url)
+            'nombre_negocio': self._extract_business_name(signals),
+            'contacto': self._extract_contact_info(signals, business),
+            'redes_sociales': self._extract_social_media(signals, business),
+            'informacion_general': self._extract_general_info(signals, page, base_url),
+            'politicas': self._extract_policies(signals),
+            'faq': self._extract_faq(signals, page, base_url)
         }
         
         return context
     
-    def _extract_business_name(self, soup: BeautifulSoup, page: Page) -> str:
+    def _extract_business_name(self, signals: ContextSignals) -> str:
         """Extrae el nombre del negocio."""
         # Intentar con el tag title
-        title = soup.find('title')
-        if title:
-            title_text = title.get_text(strip=True)
+        if signals.title:
             # Limpiar texto común del título
-            name = re.sub(r'\s*[-|–]\s*.*$', '', title_text)
+            name = re.sub(r'\s*[-|–]\s*.*$', '', signals.title)
             if name:
                 return name
         
         # Intentar con meta property og:site_name
-        og_site = soup.find('meta', property='og:site_name')
-        if og_site and og_site.get('content'):
-            return og_site['content']
+        if signals.og_site_name:
+            return signals.og_site_name
         
         # Buscar en el logo o header
-        logo = soup.select_one('header img[alt], .logo img[alt], .brand img[alt]')
-        if logo and logo.get('alt'):
-            return logo['alt']
+        if signals.logo_alt:
+            return signals.logo_alt
         
         # Fallback: primer h1
-        h1 = soup.find('h1')
-        if h1:
-            return h1.get_text(strip=True)
+        if signals.first_h1:
+            return signals.first_h1
         
         return "Nombre no encontrado"
     
-    def _extract_contact_info(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extrae información de contacto."""
+    def _extract_contact_info(self, signals: ContextSignals, business: Optional[Dict] = None) -> Dict[str, str]:
+        """Extrae información de contacto (datos estructurados primero, enlaces después)."""
         contact = {}
         
         # Teléfonos
-        phones = []
-        phone_links = soup.select(self.selectors['phone'])
-        for link in phone_links:
-            href = link.get('href', '')
+        phones = list(business['telefonos']) if business else []
+        for href in signals.phone_links:
             if 'tel:' in href:
                 phone = href.replace('tel:', '').strip()
                 phones.append(phone)
-            elif 'whatsapp' in href.lower():
+            else:
                 # Extraer número de WhatsApp
-                match = re.search(r'phone=(\d+)', href)
+                match = re.search(r'phone=(\d+)|wa\.me/(\d+)', href)
                 if match:
-                    phones.append(f"WhatsApp: {match.group(1)}")
+                    phones.append(f"WhatsApp: {match.group(1) or match.group(2)}")
+        phones = list(dict.fromkeys(phones))
         
         contact['telefonos'] = ', '.join(phones) if phones else ""
         
         # Emails
-        emails = []
-        email_links = soup.select(self.selectors['email'])
-        for link in email_links:
-            href = link.get('href', '')
-            if 'mailto:' in href:
-                email = href.replace('mailto:', '').strip()
-                emails.append(email)
-        
+        emails = list(business['emails']) if business else []
+        emails += [href.replace('mailto:', '').strip() for href in signals.email_links]
+        emails = list(dict.fromkeys(emails))
         contact['emails'] = ', '.join(emails) if emails else ""
         
         # Dirección
-        address_elem = soup.select_one(self.selectors['address'])
-        if address_elem:
-            contact['direccion'] = address_elem.get_text(strip=True)
-        else:
-            contact['direccion'] = ""
+        contact['direccion'] = (business and business['direccion']) or signals.address
         
         return contact
     
-    def _extract_social_media(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extrae enlaces a redes sociales."""
-        social = {}
-        
-        social_platforms = {
-            'instagram': self.selectors['social_instagram'],
-            'facebook': self.selectors['social_facebook'],
-            'twitter': self.selectors['social_twitter'],
-            'linkedin': self.selectors['social_linkedin']
+    def _extract_social_media(self, signals: ContextSignals, business: Optional[Dict] = None) -> Dict[str, str]:
+        """Extrae enlaces a redes sociales (sameAs del negocio o primer enlace de cada red)."""
+        same_as = business['redes'] if business else {}
+        return {
+            platform: same_as.get(platform) or signals.social.get(platform, [""])[0]
+            for platform in ('instagram', 'facebook', 'twitter', 'linkedin')
         }
-        
-        for platform, selector in social_platforms.items():
-            link = soup.select_one(selector)
-            if link:
-                social[platform] = link.get('href', '')
-            else:
-                social[platform] = ""
-        
-        return social
     
-    def _extract_general_info(self, soup: BeautifulSoup, page: Page, base_url: str) -> str:
+    def _extract_general_info(self, signals: ContextSignals, page: Page, base_url: str) -> str:
         """Extrae información general del negocio (sobre nosotros, misión, etc)."""
         info_parts = []
         
         # Buscar sección "Sobre nosotros"
-        about_link = soup.select_one(self.selectors['about'])
-        if about_link:
-            href = about_link.get('href')
-            if href:
-                try:
-                    # Navegar a la página "sobre nosotros"
-                    if href.startswith('/'):
-                        about_url = base_url.rstrip('/') + href
-                    else:
-                        about_url = href
-                    
-                    page.goto(about_url, wait_until='networkidle', timeout=10000)
-                    about_soup = BeautifulSoup(page.content(), 'lxml')
-                    
-                    # Extraer contenido principal
-                    main_content = about_soup.select_one('main, .main, #main, .content, article')
-                    if main_content:
-                        paragraphs = main_content.find_all('p')
-                        text = ' '.join(p.get_text(strip=True) for p in paragraphs[:5])
-                        info_parts.append(text[:1000])
-                except Exception as e:
-                    # Si falla, continuar
-                    pass
+        href = signals.links.get('about')
+        if href:
+            try:
+                # Navegar a la página "sobre nosotros"
+                if href.startswith('/'):
+                    about_url = base_url.rstrip('/') + href
+                else:
+                    about_url = href
+                
+                page.goto(about_url, wait_until='domcontentloaded', timeout=10000)
+                wait_for_ready(page, ['main p', 'article p', '.content p'], timeout_ms=5000, label="about")
+                about_doc = parse_html(page.content(), self.parser)
+                
+                # Extraer contenido principal
+                main_content = about_doc.select_one('main, .main, #main, .content, article')
+                if main_content:
+                    paragraphs = main_content.select('p')
+                    text = ' '.join(p.text() for p in paragraphs[:5])
+                    info_parts.append(text[:1000])
+            except Exception as e:
+                # Si falla, continuar
+                pass
         
         # Buscar en meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            info_parts.append(meta_desc['content'])
+        if signals.meta_description:
+            info_parts.append(signals.meta_description)
         
         return ' '.join(info_parts) if info_parts else "No disponible"
     
-    def _extract_policies(self, soup: BeautifulSoup) -> Dict[str, str]:
+    def _extract_policies(self, signals: ContextSignals) -> Dict[str, str]:
         """Extrae políticas del negocio (envío, devoluciones, términos)."""
-        policies = {}
-        
-        # Buscar enlaces a políticas
-        shipping_link = soup.select_one(self.selectors.get('shipping', ''))
-        if shipping_link:
-            policies['envio'] = shipping_link.get('href', '')
-        else:
-            policies['envio'] = ""
-        
-        returns_link = soup.select_one(self.selectors.get('returns', ''))
-        if returns_link:
-            policies['devoluciones'] = returns_link.get('href', '')
-        else:
-            policies['devoluciones'] = ""
-        
-        terms_link = soup.select_one(self.selectors.get('terms', ''))
-        if terms_link:
-            policies['terminos'] = terms_link.get('href', '')
-        else:
-            policies['terminos'] = ""
-        
-        return policies
+        return {
+            policy: signals.links.get(policy, "")
+            for policy in ('envio', 'devoluciones', 'terminos')
+        }
     
-    def _extract_faq(self, soup: BeautifulSoup, page: Page, base_url: str) -> List[Dict[str, str]]:
+    def _extract_faq(self, signals: ContextSignals, page: Page, base_url: str) -> List[Dict[str, str]]:
         """Extrae preguntas frecuentes si están disponibles."""
         faqs = []
         
         # Buscar enlace a FAQ
-        faq_link = soup.select_one(self.selectors['faq'])
-        if faq_link:
-            href = faq_link.get('href')
-            if href:
-                try:
-                    # Navegar a la página de FAQ
-                    if href.startswith('/'):
-                        faq_url = base_url.rstrip('/') + href
-                    else:
-                        faq_url = href
+        href = signals.links.get('faq')
+        if href:
+            try:
+                # Navegar a la página de FAQ
+                if href.startswith('/'):
+                    faq_url = base_url.rstrip('/') + href
+                else:
+                    faq_url = href
+                
+                page.goto(faq_url, wait_until='domcontentloaded', timeout=10000)
+                wait_for_ready(
+                    page, ['.faq-item', '.faq-question', '[itemtype*="Question"]'],
+                    timeout_ms=5000, label="faq"
+                )
+                faq_doc = parse_html(page.content(), self.parser)
+                
+                # Intentar extraer preguntas y respuestas
+                # Patrón común: divs con clase faq-item, question, answer
+                faq_items = faq_doc.select('.faq-item, .faq-question, [itemtype*="Question"]')
+                
+                for item in faq_items[:10]:  # Máximo 10 FAQs
+                    question = ""
+                    answer = ""
                     
-                    page.goto(faq_url, wait_until='networkidle', timeout=10000)
-                    faq_soup = BeautifulSoup(page.content(), 'lxml')
+                    # Intentar encontrar pregunta
+                    q_elem = item.select_one('.question, h3, h4, strong, [itemprop="name"]')
+                    if q_elem:
+                        question = q_elem.text()
                     
-                    # Intentar extraer preguntas y respuestas
-                    # Patrón común: divs con clase faq-item, question, answer
-                    faq_items = faq_soup.select('.faq-item, .faq-question, [itemtype*="Question"]')
+                    # Intentar encontrar respuesta
+                    a_elem = item.select_one('.answer, p, [itemprop="text"]')
+                    if a_elem:
+                        answer = a_elem.text()
                     
-                    for item in faq_items[:10]:  # Máximo 10 FAQs
-                        question = ""
-                        answer = ""
-                        
-                        # Intentar encontrar pregunta
-                        q_elem = item.select_one('.question, h3, h4, strong, [itemprop="name"]')
-                        if q_elem:
-                            question = q_elem.get_text(strip=True)
-                        
-                        # Intentar encontrar respuesta
-                        a_elem = item.select_one('.answer, p, [itemprop="text"]')
-                        if a_elem:
-                            answer = a_elem.get_text(strip=True)
-                        
-                        if question:
-                            faqs.append({
-                                'pregunta': question,
-                                'respuesta': answer
-                            })
-                except Exception as e:
-                    # Si falla, continuar
-                    pass
-        
+                    if question:
+                        faqs.append({
+                            'pregunta': question,
+                            'respuesta': answer
+                        })
+            except Exception as e:
+                # Si falla, continuar
+                pass
+    
         return faqs
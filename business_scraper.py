@@ -3,34 +3,61 @@ Scraper principal de negocios - Robustecido para producción.
 Implementa fallback a requests si Playwright falla.
 """
 
-import yaml
-import time
-import requests
-from typing import Dict, List, Optional
-from playwright.sync_api import sync_playwright, Browser, Page
-from bs4 import BeautifulSoup
+import os
+import queue
+import threading
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional, Set
 from urllib.parse import urlparse
 from rich.console import Console
 
+from app_config import get_config
+from browser_pool import get_browser_workers, DEFAULT_USER_AGENT
+from http_fetcher import get_http_fetcher
+from html_parser import HtmlNode, parse_html
+from detail_enricher import DetailEnricher
+from grid_detector import detect_product_grid, get_grid_cache
+from image_downloader import ImageDownloader
+from image_probe import ImageProbe
+from listing_follower import FollowResult, ListingFollower, expand_listing
+from render_readiness import wait_for_ready
+from resource_blocking import BlockingPolicy, ResourceBlocker
+from site_crawler import SiteCrawler, normalize_url
+from catalog_index import CatalogIndex
+from render_router import get_render_router, visible_text_length, LIGHT, HEAVY
 from selectors_database import SelectorsDatabase
 from product_extractor import ProductExtractor
-from business_context_extractor import BusinessContextExtractor
+from business_context_extractor import collect_context_signals
+from structured_data import StructuredData, business_record, extract_structured_data
 from excel_generator import ExcelGenerator
 from business_profile_generator import BusinessProfileGenerator
 
 console = Console()
 
+DEFAULT_GENERAL_INFO = "Información extraída automáticamente."
+
 class BusinessScraper:
     """Scraper principal para extraer catálogos y contexto de negocios."""
     
     def __init__(self, config_path: str = "config.yaml"):
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = yaml.safe_load(f)
-        self.browser = None
-        self.page = None
+        # Configuración compartida: se parsea una vez por proceso y se recarga si cambia el archivo
+        self._config = get_config(config_path)
+    
+    @property
+    def config(self) -> Dict:
+        """Configuración vigente (refleja los cambios de config.yaml sin reiniciar)."""
+        return self._config.data
     
-    def scrape_business(self, url: str, output_dir: str = "./output") -> Dict[str, any]:
-        """Realiza el scraping completo de un negocio con fallback."""
+    def scrape_business(self, url: str, output_dir: str = "./output", deep: bool = False) -> Dict[str, any]:
+        """
+        Realiza el scraping completo de un negocio con fallback.
+        
+        Args:
+            url: Home del negocio
+            output_dir: Directorio de salida
+            deep: Además de la home, rastrear el sitio (categorías, productos,
+                  nosotros, contacto y políticas) dentro de los presupuestos de 'crawler'
+        """
         console.print(f"\n[bold cyan]🚀 Iniciando scraping de:[/bold cyan] {url}\n")
         
         results = {
@@ -40,128 +67,669 @@ class BusinessScraper:
             'archivos_generados': {}
         }
         
+        # 0. Consultar el router: dominios ya conocidos van directo al camino correcto
+        router = get_render_router(**self.config.get('render_router', {}))
+        decision = router.lookup(url)
+        light_html = None
+        light_products = 0
+        
         # 1. Intentar método LIGHT (Requests) primero por velocidad y robustez
-        try:
-            console.print("📡 Intentando método LIGHT (HTTP Requests)...")
-            html_content = self._fetch_with_requests(url)
-            
-            if html_content:
-                console.print("✅ HTML obtenido con Requests. Procesando...")
-                self._process_html(html_content, url, results)
+        if decision is None or decision.mode == LIGHT:
+            try:
+                console.print("📡 Intentando método LIGHT (HTTP Requests)...")
+                html_content = self._fetch_with_requests(url, results)
                 
-                # Si obtuvimos buenos datos, retornamos (ahorramos Playwright)
-                if len(results['productos']) > 0 or results['contexto'].get('nombre_negocio'):
-                    self._generate_output_files(results['productos'], results['contexto'], url, output_dir)
-                    return results
-        except Exception as e:
-            console.print(f"[yellow]⚠️ Método LIGHT falló: {e}[/yellow]")
+                if html_content:
+                    console.print("✅ HTML obtenido con Requests. Procesando...")
+                    self._process_html(html_content, url, results)
+                    light_html = html_content
+                    light_products = len(results['productos'])
+                    
+                    if decision is None:
+                        decision = router.predict(html_content, results.get('plataforma'))
+                    results['render'] = {'mode': decision.mode, 'source': decision.source, 'reason': decision.reason}
+                    
+                    # Catálogo completo por API: el navegador no aportaría productos (no verifica
+                    # la predicción, que es sobre el HTML: no cuenta para la precisión)
+                    if results.get('catalogo_api'):
+                        router.record(url, results.get('plataforma'), None, LIGHT)
+                        return self._finish(url, results, output_dir, deep, light_html)
+                    
+                    # Si el router no pide renderizar y obtuvimos datos, retornamos (ahorramos Playwright).
+                    # Sin renderizar no se sabe si HEAVY aportaba más: no cuenta para la precisión,
+                    # salvo la muestra (render_router.verify_rate) que sí se renderiza para comprobarlo
+                    if decision.mode == LIGHT and (light_products > 0 or results['contexto'].get('nombre_negocio')):
+                        if not (decision.source == 'predicted' and light_products > 0 and router.should_verify()):
+                            if light_products > 0:
+                                router.record(url, results.get('plataforma'), None, LIGHT)
+                            return self._finish(url, results, output_dir, deep, light_html)
+                        console.print("🧭 Router: predicción LIGHT en muestra de verificación, se renderiza")
+                    else:
+                        console.print(f"🧭 Router: renderizado necesario ({decision.reason})")
+            except Exception as e:
+                console.print(f"[yellow]⚠️ Método LIGHT falló: {e}[/yellow]")
+        else:
+            console.print(f"🧭 Router: {decision.reason}, se omite el método LIGHT")
+            results['render'] = {'mode': decision.mode, 'source': decision.source, 'reason': decision.reason}
+            # Plataforma con API de catálogo: probarla antes de lanzar Chromium; el HTML
+            # por HTTP alcanza para el contexto del negocio
+            if decision.platform and self._fetch_catalog(url, decision.platform, results):
+                router.record(url, decision.platform, None, LIGHT)
+                light_html = self._fetch_with_requests(url, results)
+                if light_html:
+                    self._process_html(light_html, url, results)
+                return self._finish(url, results, output_dir, deep, light_html)
 
         # 2. Si falló o faltan datos, intentar método HEAVY (Playwright)
         console.print("🔄 Activando método HEAVY (Browser)...")
         try:
-            with sync_playwright() as p:
-                # Argumentos críticos para Docker/Railway
-                browser_args = [
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-gpu"
-                ]
-                
-                self.browser = p.chromium.launch(
-                    headless=True,
-                    args=browser_args
-                )
-                
-                context = self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+            # Chromium vive en hilos dueños compartidos por el proceso: este hilo (ejecutor
+            # de la API o worker de batch) solo espera el HTML y no retiene navegadores
+            workers = get_browser_workers(
+                size=self.config.get('batch', {}).get('max_heavy', 2),
+                headless=self.config.get('general', {}).get('headless', True),
+                **self.config.get('browser_pool', {})
+            )
+            blocker = ResourceBlocker(BlockingPolicy.for_scraper('business_scraper', self.config))
+            html_content = workers.run(
+                lambda context: self._render(context, url, results, blocker),
+                user_agent=DEFAULT_USER_AGENT
+            )
+            
+            # Procesar nuevamente con el HTML renderizado
+            self._process_html(html_content, url, results)
+            
+            # Verificar la predicción: ¿el render aportó contenido que el HTML no tenía?
+            if light_html is not None:
+                rendered_more = (
+                    len(results['productos']) > light_products or
+                    visible_text_length(html_content) > 2 * visible_text_length(light_html) + 500
                 )
-                
-                self.page = context.new_page()
-                self.page.set_default_timeout(45000) # 45s timeout
-                
-                response = self.page.goto(url, wait_until='domcontentloaded')
-                self.page.wait_for_timeout(3000) # Esperar renderizado JS
-                
-                html_content = self.page.content()
-                
-                # Procesar nuevamente con el HTML renderizado
-                self._process_html(html_content, url, results)
-                
+                predicted = decision.mode if decision and decision.source == 'predicted' else None
+                router.record(url, results.get('plataforma'), predicted, HEAVY if rendered_more else LIGHT)
+            
+            results['recursos_bloqueados'] = blocker.report()
         except Exception as e:
             console.print(f"[red]❌ Error fatal en Playwright: {str(e)}[/red]")
             # No fallamos completamente, retornamos lo que se haya podido rescatar
+
+        return self._finish(url, results, output_dir, deep, light_html)
+
+    def _render(self, context, url: str, results: Dict, blocker: ResourceBlocker) -> str:
+        """Renderiza la página en un hilo dueño de Chromium y devuelve el HTML final."""
+        blocker.install(context)
+        page = context.new_page()
+        page.set_default_timeout(45000) # 45s timeout
         
-        finally:
-            if self.browser:
-                self.browser.close()
+        page.goto(url, wait_until='domcontentloaded')
+        # Esperar renderizado JS: grilla de productos visible, DOM estable o 3s como máximo
+        readiness = wait_for_ready(
+            page, SelectorsDatabase.get_product_container_selectors(),
+            timeout_ms=3000, quiet_ms=750, label="business"
+        )
+        results['render_settle_ms'] = readiness.elapsed_ms
+        
+        # Scroll infinito / "cargar más": expandir la grilla antes de leer el DOM
+        pagination_config = self.config.get('pagination', {})
+        if pagination_config.get('enabled', True):
+            scroll = expand_listing(
+                page, SelectorsDatabase.get_product_container_selectors(),
+                max_rounds=pagination_config.get('max_scrolls', 15),
+                max_items=pagination_config.get('max_items', 2000),
+                quiet_ms=pagination_config.get('scroll_quiet_ms', 750),
+                timeout_ms=pagination_config.get('scroll_timeout_ms', 3000)
+            )
+            results['scroll'] = {
+                'rondas': scroll.rounds,
+                'clics': scroll.clicks,
+                'productos_antes': scroll.items_before,
+                'productos': scroll.items,
+                'ms': scroll.elapsed_ms,
+                'motivo_fin': scroll.stopped_by
+            }
+            if scroll.items > scroll.items_before:
+                console.print(f"📜 Scroll: {scroll.items_before} → {scroll.items} productos en {scroll.rounds} rondas")
+        
+        return page.content()
+
+    def _finish(self, url: str, results: Dict, output_dir: str, deep: bool, light_html: Optional[str]) -> Dict:
+        """Rastreo opcional, enriquecimiento, imágenes y archivos de salida con lo que se obtuvo."""
+        if deep:
+            self._crawl_site(url, results, light_html)
+        self._enrich_products(results)
+        self._probe_images(results)
+        local_images = self._download_images(results, output_dir)
+        self._report_http_cache(results)
+        self._report_router(results)
 
         # Generar archivos con lo que tengamos
         if not results['archivos_generados']:
-            self._generate_output_files(results['productos'], results['contexto'], url, output_dir)
-
+            results['archivos_generados'] = self._generate_output_files(
+                results['productos'], results['contexto'], url, output_dir, local_images
+            )
         return results
 
-    def _fetch_with_requests(self, url: str) -> Optional[str]:
-        """Descarga HTML usando requests con headers reales."""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-            'Cache-Control': 'no-cache'
-        }
+    def scrape_business_many(
+        self,
+        urls: Iterable[str],
+        output_dir: str = "./output",
+        max_concurrency: Optional[int] = None,
+        max_per_host: Optional[int] = None
+    ) -> Iterator[Dict[str, any]]:
+        """
+        Scrapea una lista de negocios en paralelo y entrega cada resultado apenas termina.
+        
+        Args:
+            urls: URLs a scrapear (las repetidas se procesan una vez)
+            output_dir: Directorio de salida común
+            max_concurrency: Scrapes simultáneos en total (default: batch.max_concurrency)
+            max_per_host: Scrapes simultáneos por host (default: batch.max_per_host)
+            
+        Yields:
+            Diccionario de resultados de scrape_business (con 'error' si falló)
+        """
+        batch_config = self.config.get('batch', {})
+        max_concurrency = max_concurrency or batch_config.get('max_concurrency', 8)
+        max_per_host = max_per_host or batch_config.get('max_per_host', 2)
+        
+        pending = deque(dict.fromkeys(urls))
+        total = len(pending)
+        if total == 0:
+            return
+        
+        host_active: Dict[str, int] = {}
+        slots = threading.Condition()
+        done: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        
+        def next_job():
+            """Toma la próxima URL cuyo host tenga cupo (None si no quedan)."""
+            with slots:
+                while pending and not stop.is_set():
+                    for _ in range(len(pending)):
+                        url = pending.popleft()
+                        host = urlparse(url).netloc.lower()
+                        if host_active.get(host, 0) < max_per_host:
+                            host_active[host] = host_active.get(host, 0) + 1
+                            return url, host
+                        pending.append(url)
+                    # Todos los hosts restantes están al límite: esperar a que se libere uno
+                    slots.wait()
+                return None
+        
+        def worker():
+            while True:
+                job = next_job()
+                if job is None:
+                    break
+                url, host = job
+                try:
+                    result = self.scrape_business(url, output_dir=output_dir)
+                except Exception as e:
+                    result = {'url': url, 'productos': [], 'contexto': {}, 'archivos_generados': {}, 'error': str(e)}
+                finally:
+                    with slots:
+                        host_active[host] -= 1
+                        slots.notify_all()
+                done.put(result)
+        
+        workers = [
+            threading.Thread(target=worker, name=f"scraper-{i}", daemon=True)
+            for i in range(min(max_concurrency, total))
+        ]
+        for thread in workers:
+            thread.start()
+        
+        try:
+            for _ in range(total):
+                yield done.get()
+        finally:
+            stop.set()
+            with slots:
+                slots.notify_all()
+
+    def _report_router(self, results: Dict):
+        """Agrega las métricas (acumuladas del proceso) del router LIGHT/HEAVY."""
+        stats = get_render_router(**self.config.get('render_router', {})).stats()
+        results['render_router'] = stats
+        if stats['verified']:
+            console.print(
+                f"🧭 Router: precisión {stats['accuracy']:.0%} en {stats['verified']} predicciones verificadas, "
+                f"{stats['learned_routes']} rutas aprendidas"
+            )
+
+    def _report_http_cache(self, results: Dict):
+        """Agrega los contadores (acumulados del proceso) de la caché HTTP compartida."""
+        stats = get_http_fetcher(**self.config.get('http', {})).cache_stats()
+        if not stats:
+            return
+        results['cache_http'] = stats
+        console.print(
+            f"🗄️ Caché HTTP: {stats['hits']} hits ({stats['revalidations']} revalidados con 304), "
+            f"{stats['misses']} misses, ratio {stats['hit_ratio']:.0%}"
+        )
+
+    def _fetch_with_requests(self, url: str, results: Optional[Dict] = None) -> Optional[str]:
+        """
+        Descarga HTML con el fetcher HTTP compartido (keep-alive, HTTP/2, gzip/brotli).
+        Lee en streaming con tope de bytes (http.max_body_bytes) y corta apenas
+        detecta que la respuesta es un binario servido como página.
+        """
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
-            if resp.status_code == 200:
+            fetcher = get_http_fetcher(**self.config.get('http', {}))
+            resp = fetcher.fetch_stream_sync(url, stop_when=lambda sniffer: sniffer.signals.is_binary)
+            signals = resp.extra.get('signals')
+            if results is not None:
+                results['descarga'] = {
+                    'bytes': len(resp.content),
+                    'truncada': resp.extra.get('truncated', False),
+                    'cortada_temprano': resp.extra.get('stopped_early', False),
+                    'desde_cache': resp.from_cache
+                }
+            if resp.extra.get('truncated'):
+                console.print(f"[yellow]⚠️ HTML truncado en {len(resp.content):,} bytes (http.max_body_bytes)[/yellow]")
+            if resp.status_code == 200 and not (signals and signals.is_binary):
                 return resp.text
-        except:
+        except Exception:
             return None
         return None
 
     def _process_html(self, html: str, url: str, results: Dict):
         """Procesa el HTML (sea de requests o playwright) y extrae datos."""
-        soup = BeautifulSoup(html, 'lxml')
+        parser = self.config.get('general', {}).get('html_parser')
+        doc = parse_html(html, parser)
         
-        # Detectar plataforma
-        platform = SelectorsDatabase.detect_platform(html)
+        # Detectar plataforma (score por plataforma; gana la mayor si supera el mínimo)
+        scores = SelectorsDatabase.platform_scores(html)
+        platform = SelectorsDatabase.best_platform(scores)
+        results['plataforma'] = platform
+        results['plataforma_scores'] = {name: score for name, score in scores.items() if score > 0}
         
-        # Extraer productos (usando lógica existente pero pasando soup)
-        # Adaptador rápido para usar la lógica de ProductExtractor con Soup estático
-        # Nota: ProductExtractor original usa 'page' de playwright. 
-        # Aquí simplificamos para el ejemplo, pero idealmente ProductExtractor debería aceptar HTML string.
-        # Por ahora extraemos título y metadatos básicos del contexto
+        # JSON-LD / microdata: una pasada que sirve a productos y contexto
+        structured = extract_structured_data(doc)
         
-        extractor = BusinessContextExtractor()
-        # Mockeamos 'page' para el extractor de contexto antiguo o lo adaptamos
-        # Para simplificar, extraemos manualmente con soup aquí si es necesario
+        # Sin plataforma conocida: selectores de la grilla detectada (o cacheada) del sitio
+        grid_selectors = self._grid_selectors(doc, url, results) if platform is None else None
+        
+        # Extraer productos: primero la API de catálogo de la plataforma (una sola vez
+        # por scrape), después CSS sobre el mismo documento parseado
+        extractor = ProductExtractor(platform, parser=parser, selectors=grid_selectors)
+        if 'catalogo_api' not in results:
+            self._fetch_catalog(url, platform, results)
+        if not results.get('catalogo_api'):
+            catalog = CatalogIndex()
+            extractor.extract_products_from_document(doc, url, structured, catalog)
+            # Listado con productos: seguir su paginación (rel=next, numerada, "cargar más")
+            follow = self._follow_pagination(doc, url, extractor, catalog) if len(catalog) else None
+            results['productos'] = catalog.products()
+            if follow is not None and follow.kind is not None:
+                results['paginacion'] = {
+                    'tipo': follow.kind,
+                    'paginas': follow.pages,
+                    'productos_nuevos': follow.items,
+                    'errores': follow.errors,
+                    'segundos': follow.elapsed,
+                    'motivo_fin': follow.stopped_by
+                }
+                if follow.pages:
+                    console.print(
+                        f"📄 Paginación ({follow.kind}): {len(follow.pages)} páginas más, "
+                        f"+{follow.items} productos en {follow.elapsed}s"
+                    )
         
         # Extraer contexto
-        results['contexto'] = self._extract_context_static(soup, url)
-
-    def _extract_context_static(self, soup: BeautifulSoup, url: str) -> Dict:
-        """Extrae contexto usando solo BeautifulSoup (sin depender de page object)."""
-        # Extraer título
-        title = soup.title.string if soup.title else ""
-        
-        # Extraer redes
-        social = {}
-        for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
-            if 'instagram.com' in href: social['instagram'] = href
-            elif 'facebook.com' in href: social['facebook'] = href
-            elif 'linkedin.com' in href: social['linkedin'] = href
-            elif 'twitter.com' in href or 'x.com' in href: social['twitter'] = href
+        results['contexto'] = self._extract_context_static(doc, url, structured)
+
+    def _fetch_catalog(self, url: str, platform: Optional[str], results: Dict) -> bool:
+        """
+        Trae el catálogo desde la API pública de la plataforma (una sola vez por scrape).
+        
+        Returns:
+            True si la API devolvió productos (quedan en results['productos'])
+        """
+        catalog = ProductExtractor(platform).extract_products_from_api(url)
+        results['catalogo_api'] = {
+            'plataforma': catalog.platform,
+            'productos': len(catalog.products),
+            'paginas': catalog.pages,
+            'segundos': catalog.elapsed
+        } if catalog else None
+        if catalog:
+            console.print(f"⚡ Catálogo por API ({catalog.platform}): {len(catalog.products)} productos en {catalog.elapsed}s")
+            results['productos'] = catalog.products
+            results.setdefault('plataforma', catalog.platform)
+        return catalog is not None
+
+    def _grid_selectors(self, doc: HtmlNode, url: str, results: Dict) -> Optional[Dict[str, str]]:
+        """
+        Selectores de la grilla de productos de un sitio sin plataforma conocida.
+        La grilla cacheada del dominio se reusa mientras siga matcheando; si no, se detecta
+        por repetición estructural y se guarda para las próximas visitas.
+        
+        Returns:
+            Selectores para ProductExtractor, o None si la página no tiene una grilla clara
+        """
+        grid_config = self.config.get('grid_detection', {})
+        if not grid_config.get('enabled', True):
+            return None
+        cache = get_grid_cache(
+            path=grid_config.get('path', '.cache/product_grids.json'),
+            save_interval=grid_config.get('save_interval', 5.0)
+        )
+        min_items = grid_config.get('min_items', 3)
+        
+        cached = cache.lookup(url)
+        if cached:
+            try:
+                matches = len(doc.select(cached['producto']))
+            except Exception:
+                matches = 0
+            if matches >= min_items:
+                results['grilla'] = {'origen': 'cache', 'productos': matches, 'selectores': cached}
+                return cached
+        
+        grid = detect_product_grid(doc, min_items)
+        if grid is None:
+            return None
+        cache.record(url, grid)
+        results['grilla'] = {
+            'origen': 'detectada',
+            'productos': grid.items,
+            'estructura': grid.signature,
+            'ms': grid.elapsed_ms,
+            'selectores': grid.selectors
+        }
+        console.print(f"🧩 Grilla detectada ({grid.signature}): {grid.items} productos en {grid.elapsed_ms} ms")
+        return grid.selectors
+
+    def _follow_pagination(
+        self,
+        doc: HtmlNode,
+        url: str,
+        extractor: ProductExtractor,
+        catalog: CatalogIndex,
+        seen: Optional[Set[str]] = None
+    ) -> Optional[FollowResult]:
+        """
+        Recorre por HTTP las páginas siguientes de un listado y suma sus productos a catalog.
+        
+        Args:
+            doc: Documento de la página del listado
+            url: URL de la página
+            extractor: Extractor de la plataforma
+            catalog: Catálogo deduplicado del scrape (se actualiza in-place)
+            seen: URLs ya procesadas en este scrape (no se piden de nuevo; se actualiza)
+            
+        Returns:
+            FollowResult o None si la paginación está desactivada o falló
+        """
+        pagination_config = self.config.get('pagination', {})
+        if not pagination_config.get('enabled', True):
+            return None
+        
+        def extract(page_doc: HtmlNode, page_url: str) -> int:
+            before = len(catalog)
+            extractor.extract_products_from_document(page_doc, page_url, catalog=catalog)
+            return len(catalog) - before
+        
+        follower = ListingFollower(
+            get_http_fetcher(**self.config.get('http', {})),
+            max_pages=pagination_config.get('max_pages', 20),
+            max_items=pagination_config.get('max_items', 2000),
+            concurrency=pagination_config.get('concurrency', 4),
+            max_seconds=pagination_config.get('max_seconds', 60),
+            parser=extractor.parser
+        )
+        try:
+            return follower.follow_sync(url, doc, extract, items=len(catalog), seen=seen)
+        except Exception as e:
+            console.print(f"[yellow]⚠️ La paginación falló: {e}[/yellow]")
+            return None
+
+    def _crawl_site(self, url: str, results: Dict, start_html: Optional[str] = None):
+        """
+        Rastrea el resto del sitio y suma sus productos y contexto a results.
+        
+        Args:
+            url: Home del negocio
+            results: Resultados de scrape_business (se actualizan in-place)
+            start_html: HTML de la home ya descargado, para no pedirla de nuevo
+        """
+        console.print("🕸️ Modo deep: rastreando el sitio...")
+        parser = self.config.get('general', {}).get('html_parser')
+        crawler = SiteCrawler(
+            get_http_fetcher(**self.config.get('http', {})),
+            parser=parser,
+            **self.config.get('crawler', {})
+        )
+        try:
+            crawl = crawler.crawl_sync(url, start_html, results.get('plataforma'))
+        except Exception as e:
+            console.print(f"[yellow]⚠️ El rastreo falló: {e}[/yellow]")
+            return
+        
+        extractors: Dict[Optional[str], ProductExtractor] = {}
+        catalog = CatalogIndex()
+        for product in results['productos']:
+            catalog.add(product)
+        context = results['contexto'] or self._extract_context_static(parse_html(start_html or '', parser), url)
+        # Páginas de listado ya procesadas: las del rastreo y las de la paginación de la home
+        seen = {page.url for page in crawl.pages}
+        seen.update(results.get('paginacion', {}).get('paginas', []))
+        seen.add(normalize_url(url) or url)
+        listing_pages = 0
+        
+        for page in crawl.pages:
+            doc = parse_html(page.html, parser)
+            structured = extract_structured_data(doc)
+            
+            # Con el catálogo completo por API, las páginas solo aportan contexto
+            if page.kind not in ('about', 'contact', 'policy') and not results.get('catalogo_api'):
+                platform = results.get('plataforma') or SelectorsDatabase.detect_platform(page.html)
+                extractor = extractors.get(platform)
+                if extractor is None:
+                    grid_selectors = (results.get('grilla') or {}).get('selectores') if platform is None else None
+                    extractor = extractors[platform] = ProductExtractor(platform, parser=parser, selectors=grid_selectors)
+                page_products = extractor.extract_products_from_document(doc, page.url, structured)
+                # Una ficha con un solo producto: su URL identifica al producto en todo el sitio
+                page_url = page.url if page.kind == 'product' and len(page_products) == 1 else None
+                for product in page_products:
+                    catalog.add(product, url=page_url)
+                # Las categorías son listados: seguir su paginación dentro del mismo catálogo
+                if page.kind == 'category' and page_products:
+                    follow = self._follow_pagination(doc, page.url, extractor, catalog, seen)
+                    if follow is not None:
+                        listing_pages += len(follow.pages)
+            
+            self._merge_context(context, self._extract_context_static(doc, page.url, structured))
+            if page.kind == 'about' and context.get('informacion_general') == DEFAULT_GENERAL_INFO:
+                main_content = doc.select_one('main, .main, #main, .content, article')
+                if main_content:
+                    text = ' '.join(p.text() for p in main_content.select('p')[:5])
+                    if text:
+                        context['informacion_general'] = text[:1000]
+        
+        results['productos'] = catalog.products()
+        results['contexto'] = context
+        results['rastreo'] = {
+            'paginas': [{'url': page.url, 'tipo': page.kind} for page in crawl.pages],
+            'omitidas_por_robots': crawl.skipped_by_robots,
+            'errores': crawl.errors,
+            'segundos': crawl.elapsed,
+            'motivo_fin': crawl.stopped_by,
+            'sitemaps_leidos': crawl.sitemaps_read,
+            'productos_fusionados': catalog.merged,
+            'paginas_de_listado': listing_pages
+        }
+        # Fichas descubiertas en el sitemap (incluye las que no entraron en el presupuesto)
+        results['urls_producto'] = crawl.product_urls
+        console.print(
+            f"✅ Rastreo: {len(crawl.pages)} páginas en {crawl.elapsed}s, "
+            f"{len(results['productos'])} productos en total"
+        )
+
+    def _enrich_products(self, results: Dict):
+        """
+        Descarga las fichas de los productos del listado y les suma descripción,
+        imágenes en tamaño completo, SKU y variantes (in-place en results['productos']).
+        """
+        enrichment_config = self.config.get('enrichment', {})
+        # El catálogo por API ya trae descripción e imágenes completas
+        if not enrichment_config.get('enabled', True) or results.get('catalogo_api') or not results['productos']:
+            return
+        enricher = DetailEnricher(
+            get_http_fetcher(**self.config.get('http', {})),
+            max_pages=enrichment_config.get('max_pages', 100),
+            concurrency=enrichment_config.get('concurrency', 8),
+            max_per_host=enrichment_config.get('max_per_host', 4),
+            max_seconds=enrichment_config.get('max_seconds', 60),
+            parser=self.config.get('general', {}).get('html_parser')
+        )
+        try:
+            enrichment = enricher.enrich(results['productos'])
+        except Exception as e:
+            console.print(f"[yellow]⚠️ El enriquecimiento con fichas falló: {e}[/yellow]")
+            return
+        if enrichment.pages or enrichment.errors:
+            results['enriquecimiento'] = {
+                'fichas': enrichment.pages,
+                'productos_enriquecidos': enrichment.enriched,
+                'errores': enrichment.errors,
+                'segundos': enrichment.elapsed,
+                'fichas_por_segundo': enrichment.pages_per_second,
+                'motivo_fin': enrichment.stopped_by
+            }
+            console.print(
+                f"🔎 Fichas: {enrichment.pages} en {enrichment.elapsed}s "
+                f"({enrichment.pages_per_second} páginas/s), {enrichment.enriched} productos enriquecidos"
+            )
+
+    def _probe_images(self, results: Dict):
+        """
+        Sondea la imagen principal de cada producto (solo los primeros KB) y deja en
+        results['imagenes'] cuántas están rotas o son de baja resolución.
+        """
+        probe_config = self.config.get('image_probe', {})
+        if not probe_config.get('enabled', True) or not results['productos']:
+            return
+        probe = ImageProbe(
+            get_http_fetcher(**self.config.get('http', {})),
+            max_images=probe_config.get('max_images', 300),
+            concurrency=probe_config.get('concurrency', 16),
+            max_per_host=probe_config.get('max_per_host', 6),
+            header_bytes=probe_config.get('header_bytes', 65536),
+            min_side=probe_config.get('min_side', 600),
+            max_seconds=probe_config.get('max_seconds', 30)
+        )
+        try:
+            report = probe.probe_catalog(results['productos'])
+        except Exception as e:
+            console.print(f"[yellow]⚠️ El sondeo de imágenes falló: {e}[/yellow]")
+            return
+        if not report.probed:
+            return
+        missing, low_res = report.missing, report.low_res
+        results['imagenes'] = {
+            'sondeadas': report.probed,
+            'rotas': len(missing),
+            'baja_resolucion': len(low_res),
+            'lado_minimo': report.min_side,
+            'lado_mediano': report.median_side,
+            'formatos': report.formats,
+            'ejemplos_rotas': [i.url for i in missing[:5]],
+            'ejemplos_baja_resolucion': [f"{i.url} ({i.width}x{i.height})" for i in low_res[:5]],
+            'bytes_leidos': report.bytes_read,
+            'segundos': report.elapsed,
+            'motivo_fin': report.stopped_by
+        }
+        console.print(
+            f"🖼️ Imágenes: {report.probed} sondeadas en {report.elapsed}s, "
+            f"{len(missing)} rotas, {len(low_res)} de baja resolución"
+        )
+
+    def _download_images(self, results: Dict, output_dir: str) -> Dict[str, str]:
+        """
+        Descarga las imágenes del catálogo si output.download_images está activo.
+        
+        Returns:
+            URL de imagen -> archivo local (vacío si la descarga está desactivada)
+        """
+        output_config = self.config.get('output', {})
+        if not output_config.get('download_images') or not results['productos']:
+            return {}
+        download_config = self.config.get('image_download', {})
+        try:
+            downloader = ImageDownloader(
+                get_http_fetcher(**self.config.get('http', {})),
+                os.path.join(output_dir, output_config.get('image_folder', 'images')),
+                max_images=download_config.get('max_images', 500),
+                concurrency=download_config.get('concurrency', 8),
+                max_per_host=download_config.get('max_per_host', 4),
+                per_host_delay=download_config.get('per_host_delay', 0.1),
+                max_total_mb=download_config.get('max_total_mb', 200),
+                max_file_mb=download_config.get('max_file_mb', 15),
+                max_seconds=download_config.get('max_seconds', 120)
+            )
+            download = downloader.download_catalog(results['productos'])
+        except Exception as e:
+            console.print(f"[yellow]⚠️ La descarga de imágenes falló: {e}[/yellow]")
+            return {}
+        results['descarga_imagenes'] = {
+            'archivos': len(download.files),
+            'nuevas': download.downloaded,
+            'duplicadas': download.duplicates,
+            'ya_en_disco': download.reused,
+            'retomadas': download.resumed,
+            'errores': download.errors,
+            'mb': round(download.bytes / (1024 * 1024), 2),
+            'segundos': download.elapsed,
+            'motivo_fin': download.stopped_by
+        }
+        console.print(
+            f"💾 Imágenes: {download.downloaded} descargadas, {download.reused} ya en disco, "
+            f"{download.duplicates} duplicadas ({results['descarga_imagenes']['mb']} MB en {download.elapsed}s)"
+        )
+        return download.files
+
+    @staticmethod
+    def _merge_context(context: Dict, page_context: Dict):
+        """Completa el contexto con lo encontrado en otra página del sitio."""
+        for field in ('emails', 'telefonos'):
+            current = [v for v in context['contacto'].get(field, '').split(', ') if v]
+            for value in page_context['contacto'].get(field, '').split(', '):
+                if value and value not in current:
+                    current.append(value)
+            context['contacto'][field] = ', '.join(current)
+        for key in ('redes_sociales', 'politicas'):
+            for name, value in page_context.get(key, {}).items():
+                if value and not context.setdefault(key, {}).get(name):
+                    context[key][name] = value
+
+    def _extract_context_static(self, doc: HtmlNode, url: str, structured: Optional[StructuredData] = None) -> Dict:
+        """Extrae contexto desde el documento parseado (sin depender de page object)."""
+        # Una sola pasada por el DOM para todos los buckets de contexto
+        signals = collect_context_signals(doc)
+        title = signals.title
+        
+        # Datos estructurados del negocio (JSON-LD / microdata) como fuente principal
+        if structured is None:
+            structured = extract_structured_data(doc)
+        business = business_record(structured.business) if structured.business else {}
+        
+        # Extraer redes (sameAs primero, si no el último enlace de cada red)
+        social = {network: hrefs[-1].lower() for network, hrefs in signals.social.items()}
+        social.update(business.get('redes', {}))
             
         # Extraer contacto
-        emails = set()
-        phones = set()
+        emails = set(business.get('emails', []))
+        phones = set(business.get('telefonos', []))
         
         # Buscar mailto y tel
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.startswith('mailto:'): emails.add(href.replace('mailto:', ''))
+        for href in signals.email_links:
+            emails.add(href.replace('mailto:', ''))
+        for href in signals.phone_links:
             if href.startswith('tel:'): phones.add(href.replace('tel:', ''))
-            if 'wa.me' in href or 'whatsapp' in href: phones.add("WhatsApp Detectado")
+            else: phones.add("WhatsApp Detectado")
             
         return {
             "nombre_negocio": title.split('|')[0].strip() if title else urlparse(url).netloc,
@@ -169,18 +737,25 @@ class BusinessScraper:
             "redes_sociales": social,
             "contacto": {
                 "emails": ", ".join(emails),
-                "telefonos": ", ".join(phones)
+                "telefonos": ", ".join(phones),
+                "direccion": business.get('direccion') or signals.address
+            },
+            "politicas": {
+                policy: signals.links.get(policy, "")
+                for policy in ('envio', 'devoluciones', 'terminos')
             },
-            "politicas": {}, # TODO: Extraer links de políticas
-            "informacion_general": "Información extraída automáticamente."
+            "informacion_general": DEFAULT_GENERAL_INFO
         }
 
-    def _generate_output_files(self, products, context, url, output_dir):
-        """Wrapper para generar archivos."""
+    def _generate_output_files(self, products, context, url, output_dir, local_images=None):
+        """Wrapper para generar archivos (catálogo Excel si hay productos y perfil del negocio)."""
         domain = urlparse(url).netloc
         try:
+            paths = {}
+            if products:
+                paths['excel'] = ExcelGenerator(output_dir).generate_catalog(products, domain, local_images)
             profile_gen = BusinessProfileGenerator(output_dir)
-            paths = profile_gen.generate_profile(context, domain)
+            paths.update(profile_gen.generate_profile(context, domain))
             return paths
         except Exception as e:
             console.print(f"Error generando archivos: {e}")
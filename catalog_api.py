@@ -0,0 +1,317 @@
+"""
+Adaptadores a las APIs JSON públicas de catálogo de cada plataforma.
+Traen el catálogo completo sin navegador, paginando en paralelo, y lo mapean
+al esquema de ProductExtractor (nombre_articulo, precio, descripcion, url_imagenes, url_producto).
+"""
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from html import unescape
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+from http_fetcher import HttpFetcher
+from price_engine import CURRENCY_SYMBOLS
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+# Mismos límites que la extracción por CSS
+MAX_DESCRIPTION_CHARS = 500
+MAX_IMAGES_PER_PRODUCT = 3
+
+
+@dataclass
+class CatalogResult:
+    """Catálogo obtenido por API."""
+    platform: str
+    products: List[Dict[str, str]] = field(default_factory=list)
+    pages: int = 0
+    elapsed: float = 0.0
+
+
+def html_to_text(html: Optional[str], limit: int = MAX_DESCRIPTION_CHARS) -> str:
+    """Texto plano de una descripción HTML, recortado como en la extracción CSS."""
+    if not html:
+        return ""
+    text = _SPACE_RE.sub(' ', unescape(_TAG_RE.sub(' ', html))).strip()
+    return text[:limit]
+
+
+def _format_amount(value) -> str:
+    """Importe como string sin notación científica ('1234.5' -> '1234.50')."""
+    try:
+        return f"{Decimal(str(value)):.2f}"
+    except (InvalidOperation, ValueError):
+        return str(value)
+
+
+def currency_prefix(code: Optional[str], symbol: str = "") -> str:
+    """Prefijo con el que se muestra la moneda ('ARS' -> '$', 'USD' -> 'US$', 'XYZ' -> 'XYZ ')."""
+    code = (code or '').upper()
+    if code in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[code]
+    return symbol or (f"{code} " if code else "")
+
+
+def _price_range(amounts: List[str], symbol: str = "") -> str:
+    """Precio único o rango 'min - max' a partir de los precios de las variantes."""
+    values = sorted({Decimal(a) for a in amounts if a not in (None, '')})
+    if not values:
+        return ""
+    low, high = _format_amount(values[0]), _format_amount(values[-1])
+    return f"{symbol}{low}" if low == high else f"{symbol}{low} - {symbol}{high}"
+
+
+class CatalogAdapter:
+    """Adaptador base: pagina una API de catálogo y mapea cada producto."""
+
+    platform: str = ""
+    page_size: int = 50
+    # Endpoint público con la moneda de la tienda (None = la informa cada producto)
+    currency_path: Optional[str] = None
+
+    def __init__(self, fetcher: HttpFetcher, max_products: int = 2000, concurrency: int = 4):
+        """
+        Args:
+            fetcher: Fetcher HTTP compartido
+            max_products: Productos máximos a traer
+            concurrency: Páginas pedidas en paralelo
+        """
+        self.fetcher = fetcher
+        self.max_products = max_products
+        self.concurrency = max(1, concurrency)
+        self.currency = ""
+
+    def page_url(self, root: str, page: int) -> str:
+        """URL de la página N (1-indexada)."""
+        raise NotImplementedError
+
+    def parse_page(self, payload) -> List[Dict]:
+        """Lista de productos crudos de una página."""
+        raise NotImplementedError
+
+    def map_product(self, item: Dict, root: str) -> Optional[Dict[str, str]]:
+        """Convierte un producto crudo al esquema de ProductExtractor."""
+        raise NotImplementedError
+
+    def total_pages(self, headers: Dict[str, str]) -> Optional[int]:
+        """Total de páginas si la API lo informa en headers (None = desconocido)."""
+        return None
+
+    def parse_currency(self, payload) -> str:
+        """Código ISO de la moneda a partir de la respuesta de currency_path."""
+        return ""
+
+    @property
+    def symbol(self) -> str:
+        """Prefijo de los precios con la moneda de la tienda."""
+        return currency_prefix(self.currency)
+
+    async def fetch_catalog(self, base_url: str) -> Optional[CatalogResult]:
+        """
+        Trae el catálogo paginando en paralelo.
+
+        Returns:
+            CatalogResult o None si la API no responde como se espera
+        """
+        started = time.monotonic()
+        parsed = urlparse(base_url)
+        root = f"{parsed.scheme}://{parsed.netloc}"
+        max_pages = max(1, -(-self.max_products // self.page_size))
+
+        first, currency = await asyncio.gather(self._fetch_page(root, 1), self._fetch_currency(root))
+        self.currency = currency
+        if first is None:
+            return None
+        items, headers = first
+        result = CatalogResult(platform=self.platform, pages=1)
+        self._add(result, items, root)
+
+        last_page = min(max_pages, self.total_pages(headers) or max_pages)
+        next_page = 2
+        last_full = len(items) >= self.page_size
+        while last_full and next_page <= last_page:
+            # Lote de páginas en paralelo; si alguna viene incompleta, era la última
+            batch_end = min(next_page + self.concurrency, last_page + 1)
+            pages = await asyncio.gather(*(self._fetch_page(root, n) for n in range(next_page, batch_end)))
+            for page in pages:
+                if page is None or not page[0]:
+                    last_full = False
+                    break
+                result.pages += 1
+                self._add(result, page[0], root)
+                if len(page[0]) < self.page_size:
+                    last_full = False
+                    break
+            next_page = batch_end
+
+        result.products = result.products[:self.max_products]
+        result.elapsed = round(time.monotonic() - started, 2)
+        return result
+
+    def _add(self, result: CatalogResult, items: List[Dict], root: str):
+        for item in items:
+            try:
+                product = self.map_product(item, root)
+            except (KeyError, TypeError, ValueError, InvalidOperation):
+                continue
+            if product and product.get('nombre_articulo'):
+                result.products.append(product)
+
+    async def _fetch_page(self, root: str, page: int):
+        response = await self._fetch_json(self.page_url(root, page))
+        if response is None:
+            return None
+        try:
+            return self.parse_page(response[0]), response[1]
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    async def _fetch_currency(self, root: str) -> str:
+        if not self.currency_path:
+            return ""
+        response = await self._fetch_json(root + self.currency_path)
+        try:
+            return (self.parse_currency(response[0]) or "").upper() if response else ""
+        except (AttributeError, TypeError, KeyError):
+            return ""
+
+    async def _fetch_json(self, url: str):
+        """(payload, headers) de un endpoint JSON, o None si no responde JSON."""
+        try:
+            response = await self.fetcher.fetch(url, headers={'Accept': 'application/json'})
+        except Exception:
+            return None
+        if response.status_code not in (200, 206) or 'json' not in response.headers.get('content-type', ''):
+            return None
+        try:
+            return json.loads(response.content), response.headers
+        except ValueError:
+            return None
+
+
+class ShopifyAdapter(CatalogAdapter):
+    """Shopify: /products.json (público en todas las tiendas salvo que se bloquee)."""
+
+    platform = 'shopify'
+    page_size = 250
+    currency_path = '/cart.js'
+
+    def page_url(self, root: str, page: int) -> str:
+        return f"{root}/products.json?limit={self.page_size}&page={page}"
+
+    def parse_page(self, payload) -> List[Dict]:
+        return payload['products']
+
+    def parse_currency(self, payload) -> str:
+        return payload.get('currency', '')
+
+    def map_product(self, item: Dict, root: str) -> Optional[Dict[str, str]]:
+        images = [img['src'] for img in item.get('images', []) if img.get('src')]
+        handle = item.get('handle')
+        return {
+            'nombre_articulo': (item.get('title') or '').strip(),
+            'precio': _price_range([v.get('price') for v in item.get('variants', [])], self.symbol),
+            'descripcion': html_to_text(item.get('body_html')),
+            'url_imagenes': ', '.join(images[:MAX_IMAGES_PER_PRODUCT]),
+            'url_producto': f"{root}/products/{handle}" if handle else ""
+        }
+
+
+class WooCommerceAdapter(CatalogAdapter):
+    """WooCommerce: Store API pública (/wp-json/wc/store/v1/products)."""
+
+    platform = 'woocommerce'
+    page_size = 100
+
+    def page_url(self, root: str, page: int) -> str:
+        return f"{root}/wp-json/wc/store/v1/products?per_page={self.page_size}&page={page}"
+
+    def parse_page(self, payload) -> List[Dict]:
+        if not isinstance(payload, list):
+            raise ValueError("respuesta inesperada de la Store API")
+        return payload
+
+    def total_pages(self, headers: Dict[str, str]) -> Optional[int]:
+        value = headers.get('x-wp-totalpages')
+        return int(value) if value and value.isdigit() else None
+
+    def map_product(self, item: Dict, root: str) -> Optional[Dict[str, str]]:
+        prices = item.get('prices') or {}
+        minor = int(prices.get('currency_minor_unit', 2))
+        symbol = currency_prefix(prices.get('currency_code'), unescape(prices.get('currency_symbol', '')))
+
+        def to_amount(raw):
+            return str(Decimal(raw).scaleb(-minor)) if raw not in (None, '') else None
+
+        price_range = prices.get('price_range') or {}
+        amounts = [to_amount(price_range.get('min_amount')), to_amount(price_range.get('max_amount'))]
+        if not any(amounts):
+            amounts = [to_amount(prices.get('price'))]
+        images = [img['src'] for img in item.get('images', []) if img.get('src')]
+        return {
+            'nombre_articulo': unescape(item.get('name') or '').strip(),
+            'precio': _price_range([a for a in amounts if a], symbol),
+            'descripcion': html_to_text(item.get('short_description') or item.get('description')),
+            'url_imagenes': ', '.join(images[:MAX_IMAGES_PER_PRODUCT]),
+            'url_producto': item.get('permalink') or ""
+        }
+
+
+class VtexAdapter(CatalogAdapter):
+    """VTEX: búsqueda pública del catálogo (/api/catalog_system/pub/products/search)."""
+
+    platform = 'vtex'
+    page_size = 50  # la API no devuelve más de 50 por request
+    currency_path = '/api/segments'
+
+    def page_url(self, root: str, page: int) -> str:
+        start = (page - 1) * self.page_size
+        return f"{root}/api/catalog_system/pub/products/search?_from={start}&_to={start + self.page_size - 1}"
+
+    def parse_page(self, payload) -> List[Dict]:
+        if not isinstance(payload, list):
+            raise ValueError("respuesta inesperada de la búsqueda VTEX")
+        return payload
+
+    def parse_currency(self, payload) -> str:
+        return payload.get('currencyCode', '')
+
+    def map_product(self, item: Dict, root: str) -> Optional[Dict[str, str]]:
+        amounts, images = [], []
+        for sku in item.get('items', []):
+            for seller in sku.get('sellers', []):
+                offer = seller.get('commertialOffer') or {}
+                if offer.get('Price') and offer.get('AvailableQuantity', 1) > 0:
+                    amounts.append(_format_amount(offer['Price']))
+            for image in sku.get('images', []):
+                url = image.get('imageUrl')
+                if url and url not in images:
+                    images.append(url)
+        link = item.get('link') or (f"/{item['linkText']}/p" if item.get('linkText') else "")
+        return {
+            'nombre_articulo': (item.get('productName') or '').strip(),
+            'precio': _price_range(amounts, self.symbol),
+            'descripcion': html_to_text(item.get('description') or item.get('metaTagDescription')),
+            'url_imagenes': ', '.join(images[:MAX_IMAGES_PER_PRODUCT]),
+            'url_producto': urljoin(root + '/', link) if link else ""
+        }
+
+
+# Tiendanube y Mercado Shops no exponen un catálogo JSON sin credenciales: usan CSS
+CATALOG_ADAPTERS = {
+    'shopify': ShopifyAdapter,
+    'woocommerce': WooCommerceAdapter,
+    'vtex': VtexAdapter,
+}
+
+
+def get_catalog_adapter(platform: Optional[str], fetcher: HttpFetcher, **adapter_kwargs) -> Optional[CatalogAdapter]:
+    """Adaptador de la plataforma o None si no tiene API pública."""
+    adapter_class = CATALOG_ADAPTERS.get(platform)
+    return adapter_class(fetcher, **adapter_kwargs) if adapter_class else None
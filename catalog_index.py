@@ -0,0 +1,236 @@
+"""
+Índice de catálogo para deduplicar productos.
+Listados, paginación, carruseles y fichas devuelven el mismo producto varias veces:
+el índice los reconoce por URL canónica, nombre normalizado e imagen principal
+y fusiona los registros parciales con O(1) por inserción.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from site_crawler import normalize_url
+
+MAX_IMAGES_PER_PRODUCT = 3
+
+# /collections/<handle>/products/<producto> (Shopify) es la misma ficha que /products/<producto>
+_COLLECTION_PREFIX_RE = re.compile(r'^/collections/[^/]+(?=/products/)', re.IGNORECASE)
+# Variantes de tamaño de una misma imagen: _300x300 / _300x (Shopify), -300x300 (WordPress)
+_IMAGE_SIZE_RE = re.compile(r'(?:_\d*x\d*(?:_crop_\w+)?(?:@\dx)?|-\d+x\d+)(?=\.\w+$)', re.IGNORECASE)
+_NAME_JUNK_RE = re.compile(r'[^\w]+')
+# [esquema:]//host/ruta (sin query ni fragmento); se evita urlparse por ser lo más llamado
+_IMAGE_URL_RE = re.compile(r'^\s*(?:[a-zA-Z][\w+.-]*:)?//([^/?#\s]*)([^?#\s]*)')
+
+
+def canonical_product_url(url: Optional[str]) -> str:
+    """URL canónica de una ficha (sin tracking, variante ni colección de origen)."""
+    if not url:
+        return ""
+    normalized = normalize_url(url)
+    if normalized is None:
+        return ""
+    parsed = urlparse(normalized)
+    path = _COLLECTION_PREFIX_RE.sub('', parsed.path)
+    return parsed._replace(path=path).geturl()
+
+
+def image_key(url: Optional[str]) -> str:
+    """Clave de la imagen principal: host y ruta sin query ni sufijo de tamaño."""
+    if not url:
+        return ""
+    match = _IMAGE_URL_RE.match(url)
+    if match is None:
+        # Ruta relativa: se usa tal cual, sin query
+        path = url.strip().split('?', 1)[0].split('#', 1)[0]
+        return _IMAGE_SIZE_RE.sub('', path)
+    host, path = match.groups()
+    return host.lower() + _IMAGE_SIZE_RE.sub('', path) if path else ""
+
+
+def full_size_image_url(url: str) -> str:
+    """URL de la imagen original, sin el sufijo de tamaño de la miniatura (Shopify / WordPress)."""
+    base, sep, query = url.partition('?')
+    return _IMAGE_SIZE_RE.sub('', base) + sep + query
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Nombre sin acentos, mayúsculas, puntuación ni espacios repetidos."""
+    if not name:
+        return ""
+    text = name.casefold()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NAME_JUNK_RE.sub(' ', text).strip()
+
+
+def _name_hash(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
+
+
+class CatalogIndex:
+    """Catálogo deduplicado; conserva el orden de la primera aparición de cada producto."""
+
+    def __init__(self):
+        self._records: List[Optional[Dict[str, str]]] = []
+        self._urls: List[str] = []
+        self._names: List[str] = []
+        # Claves de imagen principal de cada registro (las suyas y las de lo que absorbió)
+        self._images: List[Set[str]] = []
+        self._keys: List[List[tuple]] = []
+        self._by_url: Dict[str, int] = {}
+        self._by_image: Dict[str, int] = {}
+        # Homónimos con URLs distintas conviven: el nombre apunta a varios registros
+        self._by_name: Dict[bytes, List[int]] = {}
+        self._merged = 0
+        self._absorbed = 0
+
+    def __len__(self) -> int:
+        return len(self._records) - self._absorbed
+
+    @property
+    def merged(self) -> int:
+        """Registros que se fusionaron con uno existente."""
+        return self._merged
+
+    def add(self, product: Dict[str, str], url: Optional[str] = None) -> Dict[str, str]:
+        """
+        Agrega un producto o lo fusiona con el que ya representa al mismo artículo.
+
+        Coincide por URL canónica; si no, por imagen principal (con nombres compatibles:
+        iguales o uno prefijo del otro, como en los listados que truncan el nombre);
+        si no, por nombre normalizado (con imágenes compatibles: la misma o alguna falta).
+        Dos URLs canónicas distintas nunca se fusionan.
+
+        Args:
+            product: Producto con el esquema de ProductExtractor (se guarda tal cual)
+            url: URL de la ficha del producto, si se conoce
+
+        Returns:
+            El registro del catálogo (el producto recibido o aquel en el que se fusionó)
+        """
+        canonical = canonical_product_url(url)
+        name = normalize_name(product.get('nombre_articulo'))
+        image = image_key(self._primary_image(product))
+        name_hash = _name_hash(name) if name else None
+
+        candidates = []
+        if canonical and canonical in self._by_url:
+            candidates.append(self._by_url[canonical])
+        if image and image in self._by_image:
+            i = self._by_image[image]
+            if self._compatible(i, canonical) and self._names_compatible(self._names[i], name):
+                candidates.append(i)
+        if name_hash is not None:
+            for i in self._by_name.get(name_hash, ()):
+                # Mismo nombre con otra foto (y otro precio) es otro producto: 'Remera básica' x2
+                if self._compatible(i, canonical) and (not image or not self._images[i] or image in self._images[i]):
+                    candidates.append(i)
+                    break
+
+        if not candidates:
+            return self._insert(product, canonical, name, image, name_hash)
+
+        target = min(candidates)
+        for i in candidates:
+            if i != target and self._records[i] is not None and self._compatible(target, self._urls[i]):
+                self._absorb(target, i)
+        self._merge_fields(self._records[target], product)
+        self._merged += 1
+        if not self._urls[target] and canonical:
+            self._urls[target] = canonical
+        if image:
+            self._images[target].add(image)
+        self._register(target, canonical, image, name_hash)
+        return self._records[target]
+
+    def products(self) -> List[Dict[str, str]]:
+        """Productos deduplicados en orden de primera aparición."""
+        return [record for record in self._records if record is not None]
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _primary_image(product: Dict[str, str]) -> str:
+        images = product.get('url_imagenes') or ''
+        return images.split(',', 1)[0].strip()
+
+    def _compatible(self, i: int, canonical: str) -> bool:
+        """Falso si el registro i tiene otra URL canónica (son productos distintos)."""
+        return not (canonical and self._urls[i] and self._urls[i] != canonical)
+
+    @staticmethod
+    def _names_compatible(a: str, b: str) -> bool:
+        return not a or not b or a.startswith(b) or b.startswith(a)
+
+    def _insert(self, product: Dict[str, str], canonical: str, name: str, image: str, name_hash) -> Dict[str, str]:
+        i = len(self._records)
+        self._records.append(product)
+        self._urls.append(canonical)
+        self._names.append(name)
+        self._images.append({image} if image else set())
+        self._keys.append([])
+        self._register(i, canonical, image, name_hash)
+        return product
+
+    def _register(self, i: int, canonical: str, image: str, name_hash):
+        """Apunta las claves del producto al registro i (sin pisar las que ya existen)."""
+        keys = self._keys[i]
+        if canonical and canonical not in self._by_url:
+            self._by_url[canonical] = i
+            keys.append(('url', canonical))
+        if image and image not in self._by_image:
+            self._by_image[image] = i
+            keys.append(('image', image))
+        if name_hash is not None:
+            homonyms = self._by_name.setdefault(name_hash, [])
+            if i not in homonyms:
+                homonyms.append(i)
+                keys.append(('name', name_hash))
+
+    def _absorb(self, target: int, other: int):
+        """Fusiona el registro other en target y redirige sus claves."""
+        self._merge_fields(self._records[target], self._records[other])
+        if not self._urls[target]:
+            self._urls[target] = self._urls[other]
+        if not self._names[target]:
+            self._names[target] = self._names[other]
+        self._images[target] |= self._images[other]
+        for kind, key in self._keys[other]:
+            if kind == 'url':
+                self._by_url[key] = target
+            elif kind == 'image':
+                self._by_image[key] = target
+            else:
+                homonyms = self._by_name[key]
+                homonyms.remove(other)
+                if target not in homonyms:
+                    homonyms.append(target)
+            self._keys[target].append((kind, key))
+        self._records[other] = None
+        self._keys[other] = []
+        self._absorbed += 1
+
+    @staticmethod
+    def _merge_fields(record: Dict[str, str], other: Dict[str, str]):
+        """Completa los campos vacíos; la descripción más larga gana y las imágenes se suman."""
+        for field_name, value in other.items():
+            if not value:
+                continue
+            current = record.get(field_name)
+            if not current:
+                record[field_name] = value
+            elif field_name == 'descripcion' and len(value) > len(current):
+                record[field_name] = value
+            elif field_name == 'url_imagenes':
+                # La misma imagen en otro tamaño no cuenta como imagen nueva
+                images = [u for u in current.split(', ') if u]
+                keys = {image_key(u) for u in images}
+                for url in value.split(', '):
+                    key = image_key(url)
+                    if url and key not in keys and len(images) < MAX_IMAGES_PER_PRODUCT:
+                        images.append(url)
+                        keys.add(key)
+                record[field_name] = ', '.join(images)
@@ -6,7 +6,10 @@ Identifica y analiza competidores del prospecto.
 import os
 from typing import Dict, List
 from urllib.parse import quote_plus
-from playwright.sync_api import sync_playwright
+
+from browser_pool import get_browser_workers
+from render_readiness import wait_for_ready
+from resource_blocking import BlockingPolicy, ResourceBlocker
 
 class CompetitorFinder:
     """Busca y analiza competidores en la web."""
@@ -21,14 +24,17 @@ class CompetitorFinder:
         query = f'competidores de "{business_name}" {sector}'
         competitors = []
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            page = browser.new_page()
+        blocker = ResourceBlocker(BlockingPolicy.for_scraper('competitors'))
+        def browse(context):
+            """Búsqueda de competidores en un hilo dueño de Chromium."""
+            blocker.install(context)
+            page = context.new_page()
             
             try:
                 # Buscar en Google
                 search_url = f"https://www.google.com/search?q={quote_plus(query)}"
-                page.goto(search_url, wait_until="networkidle")
+                page.goto(search_url, wait_until="domcontentloaded")
+                wait_for_ready(page, ['div.g', '#search'], timeout_ms=8000, label="google_search")
                 
                 # Extraer enlaces
                 links = page.query_selector_all('div.g a')
@@ -55,9 +61,8 @@ class CompetitorFinder:
                     
             except Exception as e:
                 print(f"Error buscando competidores: {e}")
-            finally:
-                browser.close()
-                
+
+        get_browser_workers(headless=self.headless).run(browse)
         return competitors
 
     def export_competitors(self, competitors: List[Dict], output_path: str):
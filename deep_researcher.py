@@ -9,7 +9,10 @@ import os
 import re
 from typing import Dict, List, Optional
 from urllib.parse import quote_plus
-from playwright.sync_api import sync_playwright
+
+from browser_pool import get_browser_workers
+from render_readiness import wait_for_ready
+from resource_blocking import BlockingPolicy, ResourceBlocker
 
 class DeepResearcher:
     """Busca y consolida información externa de un negocio."""
@@ -40,11 +43,10 @@ class DeepResearcher:
             f'"{business_name}" vs competencia'
         ]
 
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            )
+        blocker = ResourceBlocker(BlockingPolicy.for_scraper('deep_research'))
+        def browse(context):
+            """Búsquedas en Google en un hilo dueño de Chromium."""
+            blocker.install(context)
             page = context.new_page()
 
             for query in queries:
@@ -59,17 +61,21 @@ class DeepResearcher:
                 except Exception as e:
                     print(f"Error buscando '{query}': {e}")
 
-            browser.close()
+        get_browser_workers(headless=self.headless).run(
+            browse, user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        )
 
         # Limpiar duplicados y formatear
         results["pain_points"] = list(set(results["pain_points"]))[:10]
+        results["resource_blocking"] = blocker.report()
         
         return results
 
     def _search_google(self, page, query: str) -> List[Dict]:
         """Realiza una búsqueda en Google y extrae resultados básicos."""
         search_url = f"https://www.google.com/search?q={quote_plus(query)}"
-        page.goto(search_url, wait_until="networkidle")
+        page.goto(search_url, wait_until="domcontentloaded", timeout=self.timeout)
+        wait_for_ready(page, ['div.g', '#search'], timeout_ms=8000, label="google_search")
         
         results = []
         # Selectores comunes de resultados de búsqueda
@@ -0,0 +1,326 @@
+"""
+Enriquecimiento de productos con sus fichas.
+Las tarjetas de un listado suelen traer solo nombre, precio y una miniatura:
+se descargan las fichas en paralelo (pool acotado, límite por host y caché HTTP)
+y se suman descripción, imágenes en tamaño completo, SKU y variantes al registro.
+"""
+
+import asyncio
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from catalog_index import MAX_IMAGES_PER_PRODUCT, canonical_product_url, full_size_image_url, image_key
+from html_parser import HtmlNode, compile_selector, parse_html
+from http_fetcher import HttpFetcher
+from structured_data import (
+    MAX_DESCRIPTION_CHARS, MAX_VARIANTS, extract_structured_data, product_record
+)
+
+# Selectores de ficha de las plataformas conocidas (en orden de preferencia)
+DESCRIPTION_CSS = (
+    '[itemprop="description"]',
+    '.product__description',
+    '.product-single__description',
+    '.woocommerce-product-details__short-description',
+    '#tab-description',
+    '.product-description',
+    '.js-product-description',
+    '.vtex-store-components-3-x-productDescriptionText',
+    '.description',
+)
+IMAGE_CSS = (
+    '.product__media img',
+    '.product-single__photo img',
+    '.woocommerce-product-gallery__image a[href]',
+    '.woocommerce-product-gallery img',
+    '.product-gallery img',
+    '.js-product-slide img',
+    '[data-zoom-image]',
+)
+SKU_CSS = ('[itemprop="sku"]', '[data-sku]', '.sku', '.product-sku', '.variant-sku', '.js-product-sku')
+VARIANT_CSS = (
+    'form[action*="/cart/add"] select option',
+    'select[name^="attribute_"] option',
+    '.variations select option',
+    '.js-product-variants select option',
+    'select[name*="variant"] option',
+)
+# Atributos con la imagen grande, antes que src (que suele ser la miniatura)
+_IMAGE_ATTRS = ('data-zoom-image', 'data-large_image', 'data-zoom', 'data-src', 'src')
+
+_SKU_LABEL_RE = re.compile(r'^(?:sku|c[oó]digo|cod\.?|ref(?:erencia)?\.?)\s*[:#]?\s*', re.IGNORECASE)
+_PLACEHOLDER_OPTION_RE = re.compile(r'eleg|seleccion|choose|select|opci[oó]n|option', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _largest_srcset(srcset: str) -> str:
+    """URL de mayor ancho de un srcset ('a.jpg 300w, b.jpg 800w' -> 'b.jpg')."""
+    best, best_width = "", -1
+    for candidate in srcset.split(','):
+        parts = candidate.strip().split()
+        if not parts:
+            continue
+        width = parts[1] if len(parts) > 1 else '0w'
+        try:
+            value = float(width[:-1]) if width[-1] in 'wx' else 0.0
+        except ValueError:
+            value = 0.0
+        if value > best_width:
+            best, best_width = parts[0], value
+    return best
+
+
+def _first_text(doc: HtmlNode, selectors, attr: Optional[str] = None) -> str:
+    """Primer texto no vacío (atributo attr, content o texto) entre los selectores."""
+    for css in selectors:
+        elem = doc.select_one(compile_selector(css, doc.backend))
+        if elem is not None:
+            value = (elem.get(attr) if attr else None) or elem.get('content') or elem.text(separator=' ')
+            value = _SPACE_RE.sub(' ', value or '').strip()
+            if value:
+                return value
+    return ""
+
+
+def detail_record(doc: HtmlNode, url: str) -> Dict[str, str]:
+    """
+    Datos de la ficha de un producto: JSON-LD / microdata primero, selectores CSS después.
+
+    Args:
+        doc: Documento de la ficha
+        url: URL de la ficha (base de las URLs relativas)
+
+    Returns:
+        Dict con el esquema de ProductExtractor más sku y variantes (campos vacíos si no aparecen)
+    """
+    structured = extract_structured_data(doc)
+    record = {
+        'nombre_articulo': '', 'precio': '', 'descripcion': '', 'url_imagenes': '',
+        'url_producto': url, 'sku': '', 'variantes': ''
+    }
+    if structured.products:
+        # Con varias entidades (ficha + relacionados), la de esta URL o la primera
+        own = canonical_product_url(url)
+        entity = next(
+            (e for e in structured.products if canonical_product_url(urljoin(url, str(e.get('url') or ''))) == own),
+            structured.products[0]
+        )
+        record.update({k: v for k, v in product_record(entity, url).items() if v})
+        record['url_producto'] = url
+
+    if not record['nombre_articulo']:
+        record['nombre_articulo'] = _first_text(doc, ('h1',))
+    if len(record['descripcion']) < 20:
+        description = _first_text(doc, DESCRIPTION_CSS)
+        if len(description) > len(record['descripcion']):
+            record['descripcion'] = description[:MAX_DESCRIPTION_CHARS]
+    if not record['descripcion']:
+        meta = doc.select_one('meta[property="og:description"], meta[name="description"]')
+        record['descripcion'] = (meta.get('content') or '').strip()[:MAX_DESCRIPTION_CHARS] if meta else ''
+
+    images = [u for u in record['url_imagenes'].split(', ') if u]
+    keys = {image_key(u) for u in images}
+    og_image = doc.select_one('meta[property="og:image"]')
+    candidates = [og_image.get('content') or ''] if og_image is not None else []
+    for css in IMAGE_CSS:
+        for elem in doc.select(compile_selector(css, doc.backend))[:MAX_IMAGES_PER_PRODUCT * 2]:
+            src = elem.get('href') if elem.tag == 'a' else next((elem.get(a) for a in _IMAGE_ATTRS if elem.get(a)), '')
+            if elem.get('srcset') and not elem.get('data-zoom-image'):
+                src = _largest_srcset(elem.get('srcset')) or src
+            candidates.append(src or '')
+    for src in candidates:
+        if len(images) >= MAX_IMAGES_PER_PRODUCT:
+            break
+        src = src.strip()
+        if not src or src.startswith('data:'):
+            continue
+        full = full_size_image_url(urljoin(url, src))
+        key = image_key(full)
+        if key not in keys:
+            images.append(full)
+            keys.add(key)
+    record['url_imagenes'] = ', '.join(images)
+
+    if not record['sku']:
+        record['sku'] = _SKU_LABEL_RE.sub('', _first_text(doc, SKU_CSS, attr='data-sku'))
+    if not record['variantes']:
+        for css in VARIANT_CSS:
+            options = []
+            for option in doc.select(compile_selector(css, doc.backend)):
+                text = _SPACE_RE.sub(' ', option.text()).strip()
+                if text and option.get('value') and not _PLACEHOLDER_OPTION_RE.search(text) and text not in options:
+                    options.append(text)
+            if options:
+                record['variantes'] = ', '.join(options[:MAX_VARIANTS])
+                break
+    return record
+
+
+def merge_detail(product: Dict[str, str], detail: Dict[str, str]) -> bool:
+    """
+    Suma los datos de la ficha al registro del listado.
+    Las imágenes de la ficha (tamaño completo) van primero y reemplazan a sus miniaturas;
+    la descripción más larga gana; SKU, variantes y campos vacíos se completan.
+
+    Returns:
+        True si el registro cambió
+    """
+    before = dict(product)
+    for field_name in ('nombre_articulo', 'precio', 'url_producto', 'sku', 'variantes'):
+        if detail.get(field_name) and not product.get(field_name):
+            product[field_name] = detail[field_name]
+    if len(detail.get('descripcion', '')) > len(product.get('descripcion', '')):
+        product['descripcion'] = detail['descripcion']
+    if detail.get('url_imagenes'):
+        images = [u for u in detail['url_imagenes'].split(', ') if u]
+        keys = {image_key(u) for u in images}
+        for url in (product.get('url_imagenes') or '').split(', '):
+            if url and image_key(url) not in keys and len(images) < MAX_IMAGES_PER_PRODUCT:
+                images.append(url)
+                keys.add(image_key(url))
+        product['url_imagenes'] = ', '.join(images[:MAX_IMAGES_PER_PRODUCT])
+    return product != before
+
+
+@dataclass
+class EnrichmentResult:
+    """Resultado del enriquecimiento con fichas."""
+    pages: int = 0           # fichas descargadas y procesadas
+    enriched: int = 0        # productos que ganaron algún dato
+    errors: int = 0
+    elapsed: float = 0.0
+    stopped_by: str = 'end'  # 'end', 'max_pages' o 'max_seconds'
+
+    @property
+    def pages_per_second(self) -> float:
+        """Throughput de descarga + extracción."""
+        return round(self.pages / self.elapsed, 2) if self.elapsed else 0.0
+
+
+class DetailEnricher:
+    """Descarga fichas de producto en paralelo y enriquece los registros del listado."""
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        max_pages: int = 100,
+        concurrency: int = 8,
+        max_per_host: int = 4,
+        max_seconds: float = 60.0,
+        parser: Optional[str] = None
+    ):
+        """
+        Args:
+            fetcher: Fetcher HTTP compartido (caché y pool de conexiones)
+            max_pages: Fichas máximas a descargar
+            concurrency: Descargas simultáneas en total
+            max_per_host: Descargas simultáneas contra un mismo host
+            max_seconds: Tiempo máximo del enriquecimiento
+            parser: Backend de html_parser para las fichas
+        """
+        self.fetcher = fetcher
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.max_per_host = max(1, max_per_host)
+        self.max_seconds = max_seconds
+        self.parser = parser
+
+    def enrich(self, products: List[Dict[str, str]]) -> EnrichmentResult:
+        """
+        Enriquece in-place los productos que tienen url_producto.
+
+        Las descargas corren en el loop del fetcher; el parseo y la extracción, en el
+        hilo que llama, a medida que llegan las fichas (se solapan con las descargas).
+
+        Args:
+            products: Productos del listado (se actualizan in-place)
+
+        Returns:
+            EnrichmentResult con páginas, productos enriquecidos y throughput
+        """
+        started = time.monotonic()
+        result = EnrichmentResult()
+        # Una ficha por URL canónica, aunque varios registros apunten a ella
+        by_url: Dict[str, List[Dict[str, str]]] = {}
+        for product in products:
+            url = canonical_product_url(product.get('url_producto'))
+            if url:
+                by_url.setdefault(url, []).append(product)
+        urls = list(by_url)
+        if len(urls) > self.max_pages:
+            urls = urls[:self.max_pages]
+            result.stopped_by = 'max_pages'
+        if not urls:
+            return result
+
+        deadline = started + self.max_seconds
+        pages: queue.Queue = queue.Queue()
+        done = object()
+
+        def download():
+            try:
+                self.fetcher.run(self._fetch_all(urls, pages.put, deadline))
+            except Exception:
+                pass
+            finally:
+                pages.put(done)
+
+        threading.Thread(target=download, name='detail-enricher', daemon=True).start()
+        while True:
+            item = pages.get()
+            if item is done:
+                break
+            url, page = item
+            if page is None:
+                result.errors += 1
+                continue
+            final_url, html = page
+            try:
+                detail = detail_record(parse_html(html, self.parser), final_url)
+            except Exception:
+                result.errors += 1
+                continue
+            result.pages += 1
+            for product in by_url[url]:
+                result.enriched += merge_detail(product, detail)
+
+        if time.monotonic() >= deadline and result.pages + result.errors < len(urls):
+            result.stopped_by = 'max_seconds'
+        result.elapsed = round(time.monotonic() - started, 2)
+        return result
+
+    async def _fetch_all(
+        self,
+        urls: List[str],
+        deliver: Callable[[Tuple[str, Optional[Tuple[str, str]]]], None],
+        deadline: float
+    ):
+        """Descarga las fichas con el pool acotado y entrega cada una apenas llega."""
+        pool = asyncio.Semaphore(self.concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(url: str):
+            host = urlparse(url).netloc.lower()
+            host_slot = hosts.setdefault(host, asyncio.Semaphore(self.max_per_host))
+            # El cupo del host va por fuera: las fichas de un host lento esperan sin ocupar el pool
+            async with host_slot, pool:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    response = await asyncio.wait_for(self.fetcher.fetch(url), remaining)
+                except Exception:
+                    deliver((url, None))
+                    return
+            content_type = response.headers.get('content-type', 'text/html').lower()
+            if response.status_code != 200 or 'html' not in content_type:
+                deliver((url, None))
+            else:
+                deliver((url, (response.url, response.text)))
+
+        await asyncio.gather(*(fetch(url) for url in urls))
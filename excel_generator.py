@@ -5,31 +5,51 @@ Generador de archivos Excel con catálogos de productos.
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 import os
 
+from app_config import get_config
+from price_engine import CURRENCY_SYMBOLS, PriceEngine
+
+# Columnas que solo aparecen en catálogos enriquecidos (fichas o datos estructurados)
+OPTIONAL_COLUMNS = ('sku', 'variantes', 'url_producto')
+# Imágenes descargadas (output.download_images), con vínculo al archivo local
+LOCAL_IMAGES_COLUMN = 'imagenes_locales'
+
 
 class ExcelGenerator:
     """Genera archivos Excel con catálogos de productos."""
     
-    def __init__(self, output_dir: str = "./output"):
+    def __init__(self, output_dir: str = "./output", price_engine: Optional[PriceEngine] = None):
         """
         Inicializa el generador de Excel.
         
         Args:
             output_dir: Directorio de salida para los archivos
+            price_engine: Motor de precios para el resumen (None = sección prices de la config)
         """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        if price_engine is None:
+            prices_config = get_config().section('prices')
+            price_engine = PriceEngine(prices_config.get('locale'), prices_config.get('currency'))
+        self.price_engine = price_engine
     
-    def generate_catalog(self, products: List[Dict[str, str]], domain: str) -> str:
+    def generate_catalog(
+        self,
+        products: List[Dict[str, str]],
+        domain: str,
+        local_images: Optional[Dict[str, str]] = None
+    ) -> str:
         """
         Genera un archivo Excel con el catálogo de productos.
         
         Args:
             products: Lista de productos
             domain: Dominio del sitio web
+            local_images: URL de imagen -> archivo descargado; agrega la columna
+                          imagenes_locales con vínculo a la imagen principal
             
         Returns:
             Ruta del archivo generado
@@ -39,16 +59,20 @@ class ExcelGenerator:
         ws = wb.active
         ws.title = "Catálogo"
         
-        # Configurar encabezados
+        # Configurar encabezados (SKU, variantes y URL solo si algún producto los tiene)
         headers = ['nombre_articulo', 'precio', 'descripcion', 'url_imagenes']
+        headers += [column for column in OPTIONAL_COLUMNS if any(p.get(column) for p in products)]
+        if local_images:
+            headers.append(LOCAL_IMAGES_COLUMN)
         self._write_headers(ws, headers)
         
         # Escribir datos de productos
         for idx, product in enumerate(products, start=2):
-            ws.cell(row=idx, column=1, value=product.get('nombre_articulo', ''))
-            ws.cell(row=idx, column=2, value=product.get('precio', ''))
-            ws.cell(row=idx, column=3, value=product.get('descripcion', ''))
-            ws.cell(row=idx, column=4, value=product.get('url_imagenes', ''))
+            for column, header in enumerate(headers, start=1):
+                if header == LOCAL_IMAGES_COLUMN:
+                    self._write_local_images(ws.cell(row=idx, column=column), product, local_images)
+                else:
+                    ws.cell(row=idx, column=column, value=product.get(header, ''))
         
         # Ajustar anchos de columna
         self._auto_adjust_columns(ws)
@@ -67,6 +91,28 @@ class ExcelGenerator:
         wb.save(filepath)
         return filepath
     
+    def _write_local_images(self, cell, product: Dict[str, str], local_images: Dict[str, str]):
+        """
+        Escribe las rutas locales de las imágenes del producto (relativas al Excel)
+        y vincula la celda a la principal.
+        
+        Args:
+            cell: Celda de openpyxl
+            product: Producto
+            local_images: URL de imagen -> archivo descargado
+        """
+        paths = []
+        for url in (product.get('url_imagenes') or '').split(', '):
+            path = local_images.get(url)
+            if path:
+                relative = os.path.relpath(path, self.output_dir).replace(os.sep, '/')
+                if relative not in paths:
+                    paths.append(relative)
+        cell.value = ', '.join(paths)
+        if paths:
+            cell.hyperlink = paths[0]
+            cell.font = Font(color="0563C1", underline="single")
+    
     def _write_headers(self, ws, headers: List[str]):
         """
         Escribe los encabezados con formato.
@@ -122,40 +168,38 @@ class ExcelGenerator:
         ws.cell(row=5, column=1, value="Total de productos:")
         ws.cell(row=5, column=2, value=len(products))
         
-        # Estadísticas de precios
-        prices = []
-        for product in products:
-            price_str = product.get('precio', '')
-            # Intentar extraer números del precio
-            import re
-            numbers = re.findall(r'[\d,\.]+', price_str)
-            if numbers:
-                try:
-                    # Convertir a float (manejar comas y puntos)
-                    price_num = float(numbers[0].replace(',', ''))
-                    prices.append(price_num)
-                except ValueError:
-                    pass
-        
-        if prices:
-            ws.cell(row=7, column=1, value="Precio mínimo:")
-            ws.cell(row=7, column=2, value=f"${min(prices):,.2f}")
-            
-            ws.cell(row=8, column=1, value="Precio máximo:")
-            ws.cell(row=8, column=2, value=f"${max(prices):,.2f}")
-            
-            ws.cell(row=9, column=1, value="Precio promedio:")
-            ws.cell(row=9, column=2, value=f"${sum(prices)/len(prices):,.2f}")
+        # Estadísticas de precios, por moneda (la más frecuente primero)
+        row = 7
+        price_stats = self.price_engine.stats([p.get('precio', '') for p in products])
+        for currency, stats in price_stats.items():
+            if len(price_stats) > 1:
+                ws.cell(row=row, column=1, value=f"Precios en {currency} ({stats.count} productos)").font = Font(bold=True)
+                row += 1
+            number_format = f'"{CURRENCY_SYMBOLS.get(currency, currency + " ")}"#,##0.00'
+            for label, value in (
+                ("Precio mínimo:", stats.min),
+                ("Precio máximo:", stats.max),
+                ("Precio promedio:", stats.mean),
+                ("Precio mediano:", stats.median),
+                ("Percentil 25:", stats.p25),
+                ("Percentil 75:", stats.p75),
+            ):
+                ws.cell(row=row, column=1, value=label)
+                ws.cell(row=row, column=2, value=round(value, 2)).number_format = number_format
+                row += 1
+            row += 1
+        if not price_stats:
+            row += 1
         
         # Productos con imágenes
         products_with_images = sum(1 for p in products if p.get('url_imagenes'))
-        ws.cell(row=11, column=1, value="Productos con imágenes:")
-        ws.cell(row=11, column=2, value=products_with_images)
+        ws.cell(row=row, column=1, value="Productos con imágenes:")
+        ws.cell(row=row, column=2, value=products_with_images)
         
         # Productos con descripción
         products_with_desc = sum(1 for p in products if p.get('descripcion'))
-        ws.cell(row=12, column=1, value="Productos con descripción:")
-        ws.cell(row=12, column=2, value=products_with_desc)
+        ws.cell(row=row + 1, column=1, value="Productos con descripción:")
+        ws.cell(row=row + 1, column=2, value=products_with_desc)
         
         # Ajustar anchos
         ws.column_dimensions['A'].width = 25
@@ -5,13 +5,31 @@ Usa Playwright para navegar y extraer datos públicos.
 
 import re
 from typing import Dict, List, Optional
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import Page
 from urllib.parse import quote_plus
 
+from browser_pool import get_browser_workers
+from render_readiness import wait_for_ready
+from resource_blocking import BlockingPolicy, ResourceBlocker
+
 
 class GoogleMapsScraper:
     """Extrae información de reputación desde Google Maps."""
     
+    # Elementos cuya aparición indica que la búsqueda o la ficha ya cargaron
+    RESULTS_READY_SELECTORS = [
+        '[role="feed"]',
+        '[data-value="Rating"]',
+        'button[data-item-id="rating"]',
+        '[aria-label*="estrellas"]',
+        '[aria-label*="stars"]'
+    ]
+    DETAIL_READY_SELECTORS = [
+        '[data-item-id="address"]',
+        '[data-item-id^="phone"]'
+    ]
+    REVIEWS_READY_SELECTORS = ['.jftiEf', '[data-review-id]']
+    
     def __init__(self, headless: bool = True):
         self.headless = headless
         self.timeout = 15000
@@ -38,28 +56,30 @@ class GoogleMapsScraper:
             "hours": "",
             "reviews": [],
             "pain_signals": [],
-            "praise_signals": []
+            "praise_signals": [],
+            "settle_ms": {}
         }
+        settle = result["settle_ms"]
         
         search_query = f"{business_name} {location}".strip()
         search_url = f"https://www.google.com/maps/search/{quote_plus(search_query)}"
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            )
+        blocker = ResourceBlocker(BlockingPolicy.for_scraper('google_maps'))
+        def browse(context):
+            """Búsqueda y ficha de Maps en un hilo dueño de Chromium."""
+            blocker.install(context)
             page = context.new_page()
             
             try:
-                page.goto(search_url, wait_until="networkidle", timeout=self.timeout)
-                page.wait_for_timeout(2000)
+                page.goto(search_url, wait_until="domcontentloaded", timeout=self.timeout)
+                settle["search"] = wait_for_ready(
+                    page, self.RESULTS_READY_SELECTORS, timeout_ms=10000, label="maps_search"
+                ).elapsed_ms
                 
                 # Verificar si encontró resultados
                 if self._has_results(page):
                     # Hacer clic en el primer resultado si hay lista
-                    self._click_first_result(page)
-                    page.wait_for_timeout(2000)
+                    self._click_first_result(page, settle)
                     
                     # Extraer información básica
                     result["status"] = "found"
@@ -71,7 +91,7 @@ class GoogleMapsScraper:
                     
                     # Extraer reseñas si hay
                     if result["total_reviews"] > 0:
-                        reviews = self._extract_reviews(page)
+                        reviews = self._extract_reviews(page, settle=settle)
                         result["reviews"] = reviews
                         
                         # Analizar señales de dolor y elogio
@@ -81,10 +101,12 @@ class GoogleMapsScraper:
             except Exception as e:
                 result["status"] = "error"
                 result["error"] = str(e)
-            
-            finally:
-                browser.close()
         
+        get_browser_workers(headless=self.headless).run(
+            browse, user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        )
+        
+        result["resource_blocking"] = blocker.report()
         return result
     
     def _has_results(self, page: Page) -> bool:
@@ -105,13 +127,15 @@ class GoogleMapsScraper:
         except:
             return False
     
-    def _click_first_result(self, page: Page):
-        """Hace clic en el primer resultado de la lista."""
+    def _click_first_result(self, page: Page, settle: Dict[str, float]):
+        """Hace clic en el primer resultado de la lista y espera la ficha."""
         try:
             first_result = page.query_selector('[role="feed"] > div:first-child a')
             if first_result:
                 first_result.click()
-                page.wait_for_timeout(1500)
+            settle["detail"] = wait_for_ready(
+                page, self.DETAIL_READY_SELECTORS, timeout_ms=5000, label="maps_detail"
+            ).elapsed_ms
         except:
             pass
     
@@ -185,22 +209,28 @@ class GoogleMapsScraper:
             pass
         return ""
     
-    def _extract_reviews(self, page: Page, max_reviews: int = 15) -> List[Dict]:
+    def _extract_reviews(self, page: Page, max_reviews: int = 15, settle: Optional[Dict[str, float]] = None) -> List[Dict]:
         """Extrae las reseñas más recientes."""
         reviews = []
+        settle = settle if settle is not None else {}
         try:
             # Hacer clic en el botón de reseñas para abrir el panel
             review_btn = page.query_selector('button[aria-label*="reseñas"], button[aria-label*="reviews"]')
             if review_btn:
                 review_btn.click()
-                page.wait_for_timeout(2000)
+                settle["reviews"] = wait_for_ready(
+                    page, self.REVIEWS_READY_SELECTORS, timeout_ms=5000, label="maps_reviews"
+                ).elapsed_ms
             
-            # Scroll para cargar más reseñas
+            # Scroll para cargar más reseñas (hasta que el DOM deje de crecer)
             review_container = page.query_selector('[role="feed"], .m6QErb.DxyBCb')
             if review_container:
+                settle["scroll"] = 0.0
                 for _ in range(3):
                     page.evaluate('(el) => el.scrollTop = el.scrollHeight', review_container)
-                    page.wait_for_timeout(1000)
+                    settle["scroll"] += wait_for_ready(
+                        page, timeout_ms=2000, quiet_ms=400, label="maps_scroll"
+                    ).elapsed_ms
             
             # Extraer reseñas
             review_elements = page.query_selector_all('.jftiEf, [data-review-id]')
@@ -0,0 +1,330 @@
+"""
+Detección estructural de la grilla de productos en sitios sin plataforma conocida.
+Busca subárboles hermanos que se repiten (misma ruta de tags y clases) y que tienen,
+cada uno, una imagen, un texto con precio y un enlace; de la repetición más numerosa
+salen los selectores del sitio, que se cachean por dominio.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from html_parser import HtmlNode
+
+_IMAGE, _PRICE, _LINK = 1, 2, 4
+_COMPLETE = _IMAGE | _PRICE | _LINK
+
+# Subárboles que no aportan a la grilla visible
+_SKIP_TAGS = frozenset(('script', 'style', 'noscript', 'template', 'svg', 'head', 'iframe', 'select'))
+_HEADINGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+# Tags que identifican al campo aunque no tengan clases (el primero del item es el buscado)
+_SELF_EVIDENT_TAGS = _HEADINGS | {'img', 'a'}
+_NOT_NAME_TAGS = frozenset(('button', 'label', 'option', 'small', 's', 'del', 'ins'))
+_IMAGE_ATTRS = ('src', 'data-src', 'data-lazy-src', 'data-original')
+
+_PRICE_LIKE_RE = re.compile(
+    r'(?:[$€£]|\b(?:US\$|R\$|ARS|USD|EUR|MXN|CLP|COP|PEN|UYU|BRL|GBP)\b)\s*\d'
+    r'|\d[\d.,]*\s*(?:€|\$|\b(?:ARS|USD|EUR)\b)',
+    re.IGNORECASE
+)
+# Clases válidas como selector y que describen estructura, no estado ni instancia
+_CLASS_RE = re.compile(r'^-?[A-Za-z_][A-Za-z0-9_-]*$')
+_STATE_CLASS_RE = re.compile(
+    r'^(?:is-|has-|js-)|^(?:active|selected|current|first|last|odd|even|hover|focus|open|show|hidden|'
+    r'visible|loaded|lazyload(?:ed)?|sale|on-sale|new|featured|instock|outofstock|in-stock|out-of-stock)$'
+    r'|\d{3,}',
+    re.IGNORECASE
+)
+MAX_SELECTOR_CLASSES = 3
+MIN_ITEMS = 3
+
+
+def _stable_classes(node: HtmlNode) -> Tuple[str, ...]:
+    return tuple(sorted(c for c in node.classes if _CLASS_RE.match(c) and not _STATE_CLASS_RE.search(c)))
+
+
+def _css(tag: str, classes) -> str:
+    return tag + ''.join(f'.{c}' for c in sorted(classes)[:MAX_SELECTOR_CLASSES])
+
+
+@dataclass
+class ProductGrid:
+    """Grilla detectada y los selectores que la describen."""
+    selectors: Dict[str, str]
+    items: int                 # productos completos (imagen + precio + enlace)
+    signature: str             # ruta estructural 'padre > item'
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class _Group:
+    """Hermanos con la misma ruta (firma del padre + tag del item)."""
+    members: List[int] = field(default_factory=list)
+    complete: List[int] = field(default_factory=list)
+    parents: set = field(default_factory=set)
+
+
+def detect_product_grid(doc: HtmlNode, min_items: int = MIN_ITEMS) -> Optional[ProductGrid]:
+    """
+    Encuentra la grilla de productos por repetición estructural, en tiempo lineal.
+
+    Un recorrido en preorden indexa los nodos; otro en orden inverso sube los indicadores
+    (imagen, precio, enlace) de cada subárbol. Los hijos se agrupan por (firma del padre, tag);
+    gana el grupo con más items completos que además se repiten entre hermanos.
+
+    Args:
+        doc: Documento de html_parser
+        min_items: Items completos mínimos para aceptar una grilla
+
+    Returns:
+        ProductGrid con selectores para ProductExtractor, o None si no hay repetición clara
+    """
+    started = time.perf_counter()
+    nodes: List[HtmlNode] = []
+    parents: List[int] = []
+    depths: List[int] = []
+    stack: List[Tuple[HtmlNode, int, int]] = [(doc, -1, 0)]
+    while stack:
+        node, parent, depth = stack.pop()
+        index = len(nodes)
+        nodes.append(node)
+        parents.append(parent)
+        depths.append(depth)
+        children = [c for c in node.children() if c.tag not in _SKIP_TAGS]
+        stack.extend((child, index, depth + 1) for child in reversed(children))
+
+    count = len(nodes)
+    tags = [node.tag for node in nodes]
+    classes = [_stable_classes(node) for node in nodes]
+    signatures = [_css(tag, cls) for tag, cls in zip(tags, classes)]
+    own_text = [' '.join(node.own_text().split())[:120] for node in nodes]
+    own_flags = [0] * count
+    flags = [0] * count
+    sizes = [1] * count
+    child_text = [''] * count
+    child_price = [False] * count
+
+    for i in range(count - 1, -1, -1):
+        node, tag = nodes[i], tags[i]
+        if tag == 'img' and any(node.get(a) for a in _IMAGE_ATTRS):
+            own_flags[i] |= _IMAGE
+        elif tag == 'a':
+            href = (node.get('href') or '').strip()
+            if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                own_flags[i] |= _LINK
+        # Precio partido en hijos (<span>$</span><span>1.500</span>): texto propio + el de los hijos,
+        # solo si ningún hijo tiene el precio completo (así gana el elemento más ajustado)
+        text = own_text[i]
+        if (text and _PRICE_LIKE_RE.search(text)) or (
+            not child_price[i] and child_text[i] and len(child_text[i]) < 60
+            and _PRICE_LIKE_RE.search(f"{text} {child_text[i]}")
+        ):
+            own_flags[i] |= _PRICE
+        flags[i] |= own_flags[i]
+        parent = parents[i]
+        if parent >= 0:
+            flags[parent] |= flags[i]
+            sizes[parent] += sizes[i]
+            child_price[parent] = child_price[parent] or bool(own_flags[i] & _PRICE)
+            if len(child_text[parent]) < 60:
+                child_text[parent] = f"{child_text[parent]} {text}".strip()
+
+    groups: Dict[Tuple[str, str], _Group] = {}
+    for i in range(1, count):
+        parent = parents[i]
+        group = groups.setdefault((signatures[parent], tags[i]), _Group())
+        group.members.append(i)
+        group.parents.add(parent)
+        if flags[i] == _COMPLETE:
+            group.complete.append(i)
+
+    best_key, best = None, None
+    for key, group in groups.items():
+        complete = len(group.complete)
+        # Repetición real entre hermanos y mayoría de items completos (no una columna de layout)
+        if complete < min_items or len(group.members) <= len(group.parents) or complete * 2 < len(group.members):
+            continue
+        rank = (complete, -depths[group.complete[0]])
+        if best is None or rank > (len(best.complete), -depths[best.complete[0]]):
+            best_key, best = key, group
+    if best is None:
+        return None
+
+    items = best.complete
+    shared = set(classes[items[0]]).intersection(*(classes[i] for i in items[1:]))
+    item_css = _css(best_key[1], shared)
+    parent_css = best_key[0]
+    if not shared or len(doc.select(item_css)) > len(best.members) * 1.5:
+        # Item sin clases propias (o genéricas): se ancla en la ruta hasta un ancestro con id o clases
+        path, ancestor = [item_css], parents[items[0]]
+        while ancestor > 0 and len(path) <= 4:
+            node = nodes[ancestor]
+            node_id = node.get('id') or ''
+            if _CLASS_RE.match(node_id) and not _STATE_CLASS_RE.search(node_id):
+                path.insert(0, f"{node.tag}#{node_id}")
+                break
+            path.insert(0, signatures[ancestor])
+            if classes[ancestor]:
+                break
+            ancestor = parents[ancestor]
+        item_css = ' > '.join(path)
+
+    fields = {'nombre': Counter(), 'precio': Counter(), 'imagen': Counter(), 'url_producto': Counter()}
+    for item in items:
+        found: Dict[str, str] = {}
+        # Nombre: encabezado; si no hay, enlace con texto; si no, el primer texto que no es precio
+        link_name = text_name = ''
+        for j in range(item + 1, item + sizes[item]):
+            tag, css = tags[j], signatures[j]
+            if not classes[j] and tag not in _SELF_EVIDENT_TAGS:
+                # Un 'div' o 'span' sin clases también matchea a los que sí tienen: se ancla en el padre
+                css = f"{signatures[parents[j]]} > {css}"
+            if 'precio' not in found and own_flags[j] & _PRICE:
+                found['precio'] = css
+            elif 'imagen' not in found and own_flags[j] & _IMAGE:
+                found['imagen'] = css
+            if 'url_producto' not in found and own_flags[j] & _LINK:
+                found['url_producto'] = css
+            if 'nombre' not in found and tag in _HEADINGS:
+                found['nombre'] = css
+            elif len(own_text[j]) >= 3 and not own_flags[j] & _PRICE and tag not in _NOT_NAME_TAGS:
+                if tag == 'a':
+                    link_name = link_name or css
+                else:
+                    text_name = text_name or css
+        if 'nombre' not in found and (link_name or text_name):
+            found['nombre'] = link_name or text_name
+        for name, css in found.items():
+            fields[name][css] += 1
+
+    selectors = {name: counter.most_common(1)[0][0] for name, counter in fields.items() if counter}
+    selectors['producto'] = item_css
+    selectors.setdefault('descripcion', '')
+    return ProductGrid(
+        selectors=selectors,
+        items=len(items),
+        signature=f"{parent_css} > {_css(best_key[1], shared)}",
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1)
+    )
+
+
+class GridSelectorCache:
+    """Selectores de grilla detectados, por dominio (archivo JSON, como el router de render)."""
+
+    def __init__(self, path: str = ".cache/product_grids.json", save_interval: float = 5.0):
+        """
+        Args:
+            path: Archivo JSON donde se guardan las grillas por dominio
+            save_interval: Segundos mínimos entre escrituras del archivo (lo pendiente se guarda al salir)
+        """
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._grids: Dict[str, Dict] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+        atexit.register(self.flush)
+
+    def lookup(self, url: str) -> Optional[Dict[str, str]]:
+        """Selectores guardados para el dominio de la URL (None si no hay)."""
+        with self._lock:
+            entry = self._grids.get(self._domain(url))
+        return dict(entry['selectors']) if entry else None
+
+    def record(self, url: str, grid: ProductGrid):
+        """Guarda (o reemplaza) la grilla detectada para el dominio."""
+        domain = self._domain(url)
+        with self._lock:
+            entry = self._grids.get(domain, {'detections': 0})
+            entry.update({
+                'selectors': grid.selectors,
+                'items': grid.items,
+                'signature': grid.signature,
+                'detections': entry['detections'] + 1,
+                'updated_at': time.time()
+            })
+            self._grids[domain] = entry
+        self._changed()
+
+    def forget(self, url: str):
+        """Descarta la grilla del dominio (p. ej. si el sitio cambió de estructura)."""
+        with self._lock:
+            removed = self._grids.pop(self._domain(url), None) is not None
+        if removed:
+            self._changed()
+
+    def flush(self):
+        """Escribe las grillas pendientes (fuera del lock de consultas)."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({'grids': self._grids}, ensure_ascii=False, indent=2)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            try:
+                self._save(data)
+            except OSError:
+                # No se pierden las grillas: vuelven a quedar pendientes para el próximo flush
+                with self._lock:
+                    self._dirty = True
+
+    def _changed(self):
+        """Marca cambios pendientes y los escribe si pasó save_interval desde la última escritura."""
+        with self._lock:
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.flush()
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._grids = json.load(f).get('grids', {})
+        except (OSError, ValueError):
+            pass
+
+    def _save(self, data: str):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+_cache: Optional[GridSelectorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_grid_cache(**cache_kwargs) -> GridSelectorCache:
+    """
+    Obtiene la caché de grillas compartida del proceso.
+
+    Args:
+        **cache_kwargs: Opciones de GridSelectorCache; solo aplican al crearla
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GridSelectorCache(**cache_kwargs)
+        return _cache
@@ -0,0 +1,326 @@
+"""
+Abstracción de parser HTML con backends intercambiables.
+El backend 'lxml' usa lxml.html con selectores CSS compilados a XPath (rápido);
+el backend 'bs4' envuelve BeautifulSoup y se mantiene como fallback compatible.
+"""
+
+from functools import lru_cache
+from typing import Dict, Hashable, Iterator, List, Optional, Union
+
+import lxml.html
+import soupsieve
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+DEFAULT_BACKEND = 'lxml'
+BACKENDS = ('lxml', 'bs4')
+
+# Igual que BeautifulSoup.get_text(): sin texto de scripts, estilos, templates ni comentarios
+_TEXT_XPATH = etree.XPath(
+    './/text()[not(ancestor::script or ancestor::style or ancestor::template)]',
+    smart_strings=False
+)
+
+
+class HtmlNode:
+    """Interfaz común de un elemento HTML, independiente del backend."""
+
+    tag: str = ""
+    backend: str = ""
+
+    @property
+    def attrs(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    @property
+    def classes(self) -> List[str]:
+        raise NotImplementedError
+
+    def get(self, name: str, default=None):
+        """Valor de un atributo."""
+        return self.attrs.get(name, default)
+
+    def text(self, strip: bool = True, separator: str = "") -> str:
+        """Texto visible del elemento (equivalente a get_text de BeautifulSoup)."""
+        raise NotImplementedError
+
+    def raw_text(self) -> str:
+        """Texto crudo del elemento, incluido el de <script> (p. ej. bloques JSON-LD)."""
+        raise NotImplementedError
+
+    def own_text(self) -> str:
+        """Texto propio del elemento, sin el de sus hijos (sin strip)."""
+        raise NotImplementedError
+
+    def select(self, css) -> List['HtmlNode']:
+        """
+        Descendientes que cumplen el selector CSS, en orden de documento.
+        Acepta el selector como texto o ya compilado con compile_selector().
+        """
+        raise NotImplementedError
+
+    def select_one(self, css) -> Optional['HtmlNode']:
+        """Primer descendiente que cumple el selector CSS (texto o compilado)."""
+        raise NotImplementedError
+
+    def children(self) -> List['HtmlNode']:
+        """Hijos directos que son elementos."""
+        raise NotImplementedError
+
+    def parent(self) -> Optional['HtmlNode']:
+        """Elemento padre (None en la raíz del documento)."""
+        raise NotImplementedError
+
+    @property
+    def key(self) -> Hashable:
+        """
+        Identidad del elemento subyacente, igual para todos los nodos que lo envuelven.
+        Es válida mientras se conserve la clave (lxml recrea los proxies que nadie referencia).
+        """
+        raise NotImplementedError
+
+    def iter(self) -> Iterator['HtmlNode']:
+        """Recorre el elemento y todos sus descendientes en orden de documento."""
+        raise NotImplementedError
+
+    @property
+    def title(self) -> str:
+        """Texto del primer <title> del documento."""
+        elem = self.select_one('title')
+        return elem.text() if elem else ""
+
+
+# ---------------------------------------------------------------------------
+# Backend lxml
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=1024)
+def compile_css(css: str) -> CSSSelector:
+    """Compila (una vez) un selector CSS a XPath."""
+    return CSSSelector(css, translator='html')
+
+
+class LxmlNode(HtmlNode):
+    """Elemento respaldado por lxml.html."""
+
+    __slots__ = ('_el',)
+    backend = 'lxml'
+
+    def __init__(self, element):
+        self._el = element
+
+    @property
+    def element(self):
+        """Elemento lxml subyacente."""
+        return self._el
+
+    @property
+    def tag(self) -> str:
+        return self._el.tag if isinstance(self._el.tag, str) else ""
+
+    @property
+    def attrs(self) -> Dict[str, str]:
+        return self._el.attrib
+
+    @property
+    def classes(self) -> List[str]:
+        return (self._el.get('class') or '').split()
+
+    def text(self, strip: bool = True, separator: str = "") -> str:
+        strings = _TEXT_XPATH(self._el)
+        if strip:
+            return separator.join(s.strip() for s in strings if s.strip())
+        return separator.join(strings)
+
+    def raw_text(self) -> str:
+        return ''.join(self._el.itertext())
+
+    def own_text(self) -> str:
+        el = self._el
+        return (el.text or '') + ''.join(child.tail or '' for child in el)
+
+    def select(self, css: Union[str, CSSSelector]) -> List['LxmlNode']:
+        selector = compile_css(css) if isinstance(css, str) else css
+        el = self._el
+        # CSSSelector incluye al propio elemento; BeautifulSoup solo descendientes
+        return [LxmlNode(m) for m in selector(el) if m is not el]
+
+    def select_one(self, css: Union[str, CSSSelector]) -> Optional['LxmlNode']:
+        selector = compile_css(css) if isinstance(css, str) else css
+        el = self._el
+        for match in selector(el):
+            if match is not el:
+                return LxmlNode(match)
+        return None
+
+    def children(self) -> List['LxmlNode']:
+        return [LxmlNode(c) for c in self._el if isinstance(c.tag, str)]
+
+    def parent(self) -> Optional['LxmlNode']:
+        parent = self._el.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    @property
+    def key(self) -> Hashable:
+        # El proxy de lxml se compara por identidad y sigue siendo el mismo mientras esté referenciado
+        return self._el
+
+    def iter(self) -> Iterator['LxmlNode']:
+        for el in self._el.iter():
+            if isinstance(el.tag, str):
+                yield LxmlNode(el)
+
+    def __eq__(self, other):
+        return isinstance(other, LxmlNode) and other._el is self._el
+
+    def __hash__(self):
+        return id(self._el)
+
+
+def _parse_lxml(html: Union[str, bytes]) -> LxmlNode:
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml no acepta str con declaración de encoding: parsear como bytes
+        root = lxml.html.document_fromstring(html.encode('utf-8'))
+    except etree.ParserError:
+        root = lxml.html.document_fromstring('<html></html>')
+    return LxmlNode(root)
+
+
+# ---------------------------------------------------------------------------
+# Backend BeautifulSoup (fallback compatible)
+# ---------------------------------------------------------------------------
+
+class SoupNode(HtmlNode):
+    """Elemento respaldado por BeautifulSoup."""
+
+    __slots__ = ('_el',)
+    backend = 'bs4'
+
+    def __init__(self, element: Tag):
+        self._el = element
+
+    @property
+    def element(self) -> Tag:
+        """Tag de BeautifulSoup subyacente."""
+        return self._el
+
+    @property
+    def tag(self) -> str:
+        return self._el.name or ""
+
+    @property
+    def attrs(self) -> Dict[str, str]:
+        return self._el.attrs
+
+    @property
+    def classes(self) -> List[str]:
+        return self._el.get('class') or []
+
+    def get(self, name: str, default=None):
+        value = self._el.get(name, default)
+        # BeautifulSoup devuelve listas para atributos multivalor (class, rel)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def text(self, strip: bool = True, separator: str = "") -> str:
+        return self._el.get_text(separator, strip=strip)
+
+    def raw_text(self) -> str:
+        # get_text() omite Script/Stylesheet en bs4 recientes: se leen todos los strings
+        return ''.join(str(s) for s in self._el.descendants if isinstance(s, NavigableString))
+
+    def own_text(self) -> str:
+        # Comentarios, CDATA y demás subclases de NavigableString no son texto visible
+        return ''.join(str(s) for s in self._el.contents if type(s) is NavigableString)
+
+    def select(self, css: Union[str, soupsieve.SoupSieve]) -> List['SoupNode']:
+        matches = self._el.select(css) if isinstance(css, str) else css.select(self._el)
+        return [SoupNode(m) for m in matches]
+
+    def select_one(self, css: Union[str, soupsieve.SoupSieve]) -> Optional['SoupNode']:
+        match = self._el.select_one(css) if isinstance(css, str) else css.select_one(self._el)
+        return SoupNode(match) if match is not None else None
+
+    def children(self) -> List['SoupNode']:
+        return [SoupNode(c) for c in self._el.contents if isinstance(c, Tag)]
+
+    def parent(self) -> Optional['SoupNode']:
+        parent = self._el.parent
+        return SoupNode(parent) if parent is not None else None
+
+    @property
+    def key(self) -> Hashable:
+        # Tag define __eq__/__hash__ por contenido: se usa id() (el árbol mantiene vivos los tags)
+        return id(self._el)
+
+    def iter(self) -> Iterator['SoupNode']:
+        if self._el.name != '[document]':
+            yield self
+        for el in self._el.descendants:
+            if isinstance(el, Tag):
+                yield SoupNode(el)
+
+    def __eq__(self, other):
+        return isinstance(other, SoupNode) and other._el is self._el
+
+    def __hash__(self):
+        return id(self._el)
+
+
+def _parse_bs4(html: Union[str, bytes]) -> SoupNode:
+    return SoupNode(BeautifulSoup(html, 'lxml'))
+
+
+@lru_cache(maxsize=1024)
+def compile_soup_css(css: str) -> soupsieve.SoupSieve:
+    """Compila (una vez) un selector CSS con soupsieve."""
+    return soupsieve.compile(css)
+
+
+_COMPILERS = {
+    'lxml': compile_css,
+    'bs4': compile_soup_css,
+}
+
+
+def compile_selector(css: str, backend: Optional[str] = None):
+    """
+    Compila un selector CSS para el backend indicado, para reutilizarlo
+    en select()/select_one() sin volver a parsear el texto.
+
+    Args:
+        css: Selector CSS
+        backend: 'lxml' o 'bs4'; None usa DEFAULT_BACKEND
+
+    Returns:
+        CSSSelector (lxml) o SoupSieve (bs4)
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _COMPILERS:
+        raise ValueError(f"Backend de parser desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return _COMPILERS[backend](css)
+
+
+_PARSERS = {
+    'lxml': _parse_lxml,
+    'bs4': _parse_bs4,
+}
+
+
+def parse_html(html: Union[str, bytes], backend: Optional[str] = None) -> HtmlNode:
+    """
+    Parsea HTML con el backend indicado.
+
+    Args:
+        html: Documento HTML
+        backend: 'lxml' (rápido) o 'bs4' (compatible); None usa DEFAULT_BACKEND
+
+    Returns:
+        Nodo raíz del documento
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _PARSERS:
+        raise ValueError(f"Backend de parser desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    return _PARSERS[backend](html or '<html></html>')
@@ -0,0 +1,162 @@
+"""
+Lectura incremental de HTML mientras se descarga.
+Detecta el charset y los binarios en los primeros bytes, y junta la firma de
+plataforma y los enlaces con una pasada por los tags de cada chunk, sin armar
+un árbol (el documento se parsea una sola vez, después, con html_parser).
+"""
+
+import codecs
+import re
+from dataclasses import dataclass, field
+from html import unescape
+from typing import List, Optional, Set
+
+from selectors_database import SelectorsDatabase
+
+# Bytes que se miran para detectar el charset antes de decodificar
+CHARSET_SNIFF_BYTES = 2048
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_\-:.]+)', re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([A-Za-z0-9_\-:.]+)', re.IGNORECASE)
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+# Firmas de archivos binarios servidos con la URL de una página
+_BINARY_MAGIC = (b'%PDF', b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'PK\x03\x04', b'\x1f\x8b', b'RIFF')
+_ANCHOR_RE = re.compile(r'<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+# Texto del chunk anterior que se vuelve a mirar: firmas en texto del <head> (scripts inline)
+_SIGNATURE_OVERLAP = 64
+# Un tag que quedó abierto al final de un chunk se completa con el siguiente (hasta este largo)
+MAX_CARRY_CHARS = 16384
+
+
+def charset_from_content_type(content_type: str) -> Optional[str]:
+    """Charset declarado en el header Content-Type, si es válido."""
+    match = _HEADER_CHARSET_RE.search(content_type or '')
+    return _normalize_charset(match.group(1)) if match else None
+
+
+def _normalize_charset(name) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+
+
+@dataclass
+class EarlySignals:
+    """Lo que se pudo extraer del documento mientras se descargaba."""
+    charset: str = 'utf-8'
+    platform: Optional[str] = None
+    anchors: List[str] = field(default_factory=list)
+    head_complete: bool = False
+    is_binary: bool = False
+
+
+class StreamSniffer:
+    """Recibe los chunks de la respuesta y extrae las señales tempranas de forma incremental."""
+
+    def __init__(self, content_type: str = ""):
+        """
+        Args:
+            content_type: Header Content-Type de la respuesta (para el charset declarado)
+        """
+        self.signals = EarlySignals()
+        self.bytes_seen = 0
+        self._header_charset = charset_from_content_type(content_type)
+        self._pending = b''
+        self._decoder = None
+        self._carry = ''
+        self._overlap = ''
+        self._signature_hits: Set[int] = set()
+        self._head_open = True
+
+    def feed(self, chunk: bytes):
+        """Procesa un chunk de bytes del cuerpo."""
+        if not chunk:
+            return
+        self.bytes_seen += len(chunk)
+        if self._decoder is None:
+            self._pending += chunk
+            if len(self._pending) < CHARSET_SNIFF_BYTES:
+                return
+            self._start()
+            chunk, self._pending = self._pending, b''
+        self._consume(chunk)
+
+    def close(self) -> EarlySignals:
+        """Termina la lectura con lo recibido hasta ahora."""
+        if self._decoder is None:
+            self._start()
+            pending, self._pending = self._pending, b''
+            self._consume(pending)
+        self._scan(self._carry + self._decoder.decode(b'', final=True))
+        self._carry = ''
+        return self.signals
+
+    def has(self, *names: str) -> bool:
+        """
+        Indica si ya se obtuvieron las señales pedidas.
+
+        Args:
+            names: 'head' (el <head> terminó de llegar), 'platform' o 'anchors'
+        """
+        checks = {
+            'head': self.signals.head_complete,
+            'platform': self.signals.platform is not None,
+            'anchors': bool(self.signals.anchors),
+        }
+        return all(checks[name] for name in names)
+
+    def _start(self):
+        """Detecta el charset y los binarios con los primeros bytes y crea el decodificador."""
+        head = self._pending[:CHARSET_SNIFF_BYTES]
+        charset = None
+        for bom, name in _BOMS:
+            if head.startswith(bom):
+                charset = name
+                break
+        charset = charset or self._header_charset
+        if charset is None:
+            match = _META_CHARSET_RE.search(head)
+            charset = _normalize_charset(match.group(1)) if match else None
+        self.signals.charset = charset or 'utf-8'
+        self.signals.is_binary = head.lstrip().startswith(_BINARY_MAGIC)
+
+        self._decoder = codecs.getincrementaldecoder(self.signals.charset)(errors='replace')
+
+    def _consume(self, chunk: bytes):
+        if not chunk:
+            return
+        text = self._carry + self._decoder.decode(chunk)
+        # Un tag partido entre chunks ('<script src="https://cdn.sho' + 'pify.com/...">')
+        # se deja para el próximo: así ni las firmas ni los enlaces se pierden ni se duplican
+        cut = text.rfind('<')
+        if cut > text.rfind('>') and len(text) - cut <= MAX_CARRY_CHARS:
+            text, self._carry = text[:cut], text[cut:]
+        else:
+            self._carry = ''
+        self._scan(text)
+
+    def _scan(self, text: str):
+        """Firmas de plataforma y enlaces de un tramo de tags completos."""
+        if not text:
+            return
+        signals = self.signals
+        if signals.platform is None:
+            SelectorsDatabase.match_signatures(self._overlap + text, self._signature_hits, in_head=self._head_open)
+            signals.platform = SelectorsDatabase.best_platform(
+                SelectorsDatabase.score_signatures(self._signature_hits)
+            )
+            self._overlap = text[-_SIGNATURE_OVERLAP:]
+        if self._head_open and SelectorsDatabase.head_closed(text):
+            self._head_open = False
+            signals.head_complete = True
+        for match in _ANCHOR_RE.finditer(text):
+            href = unescape(next(g for g in match.groups() if g is not None)).strip()
+            if href:
+                signals.anchors.append(href)
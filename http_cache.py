@@ -0,0 +1,220 @@
+"""
+Caché HTTP en disco (SQLite) con revalidación condicional.
+Guarda cuerpos con su ETag / Last-Modified / Cache-Control y permite
+revalidar con If-None-Match / If-Modified-Since, sirviendo los 304 desde disco.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class CacheEntry:
+    """Respuesta almacenada en la caché."""
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: str
+    stored_at: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('last-modified')
+
+    def max_age(self) -> Optional[int]:
+        """max-age de Cache-Control (None si no hay o exige revalidar)."""
+        cache_control = self.headers.get('cache-control', '').lower()
+        if 'no-cache' in cache_control or 'must-revalidate' in cache_control:
+            return None
+        match = re.search(r'max-age=(\d+)', cache_control)
+        return int(match.group(1)) if match else None
+
+    def is_fresh(self) -> bool:
+        """Indica si puede servirse sin contactar al servidor."""
+        max_age = self.max_age()
+        return max_age is not None and time.time() - self.stored_at < max_age
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers para revalidar la entrada con el servidor."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Caché HTTP en SQLite con desalojo LRU acotado por tamaño."""
+
+    # Entradas leídas por consulta al desalojar
+    EVICT_BATCH = 64
+
+    def __init__(self, path: str = ".cache/http_cache.sqlite", max_size_mb: float = 256):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            path: Ruta del archivo SQLite
+            max_size_mb: Tamaño máximo de los cuerpos almacenados antes de desalojar
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                encoding TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self._conn.commit()
+        # Total de bytes en memoria: se suma una sola vez y se ajusta en cada put/borrado
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Busca una URL en la caché (sin contar hit/miss)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, headers, content, encoding, stored_at FROM entries WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(
+            url=url,
+            status_code=row[0],
+            headers=json.loads(row[1]),
+            content=row[2],
+            encoding=row[3],
+            stored_at=row[4]
+        )
+
+    def put(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, encoding: str) -> bool:
+        """
+        Guarda una respuesta si es cacheable.
+
+        Returns:
+            True si se almacenó
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        if status_code != 200 or 'no-store' in headers.get('cache-control', '').lower():
+            return False
+        if not (headers.get('etag') or headers.get('last-modified') or 'max-age' in headers.get('cache-control', '')):
+            return False
+        if len(content) > self.max_bytes:
+            return False
+
+        # Los cuerpos se guardan ya descomprimidos
+        headers.pop('content-encoding', None)
+        headers.pop('content-length', None)
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status_code, json.dumps(headers), content, encoding, now, now, len(content))
+            )
+            self._total_bytes += len(content) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def refresh(self, url: str, headers: Dict[str, str]):
+        """Actualiza una entrada tras un 304 (nuevos validadores y frescura)."""
+        entry = self.get(url)
+        if entry is None:
+            return
+        updated = dict(entry.headers)
+        for key, value in headers.items():
+            key = key.lower()
+            if key in ('etag', 'last-modified', 'cache-control', 'expires', 'date'):
+                updated[key] = value
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET headers = ?, stored_at = ?, last_access = ? WHERE url = ?",
+                (json.dumps(updated), now, now, url)
+            )
+            self._conn.commit()
+
+    def touch(self, url: str):
+        """Marca una entrada como usada recientemente (orden LRU)."""
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def record_hit(self, revalidated: bool = False):
+        self.hits += 1
+        if revalidated:
+            self.revalidations += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def _evict(self):
+        """Desaloja las entradas menos usadas hasta respetar el tamaño máximo."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM entries ORDER BY last_access ASC LIMIT ?", (self.EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            victims = []
+            for url, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append((url,))
+                self._total_bytes -= size
+            self._conn.executemany("DELETE FROM entries WHERE url = ?", victims)
+            self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de la caché."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = self._total_bytes
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': count,
+            'size_bytes': size
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,471 @@
+"""
+Capa de descarga HTTP asíncrona con pool de conexiones por host.
+Reutiliza conexiones (keep-alive / HTTP/2) entre páginas del mismo sitio
+y ofrece un wrapper sync para los llamadores existentes.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Coroutine, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from browser_pool import DEFAULT_USER_AGENT
+from http_cache import HttpCache
+from html_stream import StreamSniffer
+
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 en httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    'Cache-Control': 'no-cache'
+}
+
+
+@dataclass
+class FetchResult:
+    """Respuesta HTTP ya descargada y desacoplada del cliente."""
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: str = 'utf-8'
+    http_version: str = 'HTTP/1.1'
+    elapsed: float = 0.0
+    from_cache: bool = False
+    extra: Dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        """Cuerpo decodificado (gzip/brotli ya fueron descomprimidos por httpx)."""
+        try:
+            return self.content.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+
+class HttpFetcher:
+    """
+    Cliente HTTP asíncrono compartido.
+
+    Corre su propio event loop en un hilo dedicado, de modo que el mismo pool
+    de conexiones sirve tanto a código async (FastAPI) como a código sync.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = DEFAULT_USER_AGENT,
+        timeout: float = 15.0,
+        max_connections: int = 100,
+        max_connections_per_host: int = 6,
+        http2: bool = True,
+        cache_path: Optional[str] = None,
+        cache_max_mb: float = 256,
+        max_body_bytes: Optional[int] = None
+    ):
+        """
+        Inicializa el fetcher (el cliente se crea bajo demanda).
+
+        Args:
+            user_agent: User-Agent enviado en cada request
+            timeout: Timeout total por request en segundos
+            max_connections: Conexiones abiertas máximas en total
+            max_connections_per_host: Requests simultáneos máximos por host
+            http2: Negociar HTTP/2 cuando el servidor y h2 lo permitan
+            cache_path: Archivo SQLite de la caché HTTP (None = sin caché)
+            cache_max_mb: Tamaño máximo de la caché en MB
+            max_body_bytes: Tope de bytes por defecto para fetch_stream (None = sin tope)
+        """
+        self.headers = {'User-Agent': user_agent, **DEFAULT_HEADERS}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max(1, max_connections_per_host)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.cache = HttpCache(cache_path, cache_max_mb) if cache_path else None
+        # SQLite es bloqueante: sus lecturas y escrituras corren fuera del loop, en orden
+        self._cache_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='http-cache') if self.cache else None
+        self.max_body_bytes = max_body_bytes
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # API asíncrona
+    # ------------------------------------------------------------------
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        Descarga una URL. Puede llamarse desde cualquier event loop.
+
+        Args:
+            url: URL a descargar
+            headers: Headers adicionales para este request
+
+        Returns:
+            FetchResult con el cuerpo descomprimido
+        """
+        return await self._bridge(self._fetch(url, headers))
+
+    async def fetch_stream(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None,
+        stop_when: Optional[Callable[[StreamSniffer], bool]] = None
+    ) -> FetchResult:
+        """
+        Descarga una URL en streaming, extrayendo señales tempranas a medida que llegan los chunks.
+
+        Args:
+            url: URL a descargar
+            max_bytes: Tope de bytes del cuerpo (None = max_body_bytes del fetcher)
+            stop_when: Predicado sobre el StreamSniffer; si devuelve True se deja de leer
+
+        Returns:
+            FetchResult con lo leído; extra['signals'] tiene las EarlySignals y
+            extra['truncated'] / extra['stopped_early'] indican si el cuerpo está incompleto
+        """
+        return await self._bridge(self._fetch(url, max_bytes=max_bytes, stop_when=stop_when, stream=True))
+
+    async def stream_into(
+        self,
+        url: str,
+        consumer: Callable[[bytes], bool],
+        max_bytes: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        on_response: Optional[Callable[[int, Dict[str, str]], bool]] = None
+    ) -> FetchResult:
+        """
+        Entrega el cuerpo crudo chunk a chunk a un consumidor (sin caché ni buffer).
+
+        Args:
+            url: URL a descargar
+            consumer: Recibe cada chunk; si devuelve True se deja de leer
+            max_bytes: Tope de bytes del cuerpo (None = max_body_bytes del fetcher)
+            headers: Headers adicionales (p. ej. Range: las respuestas 206 también se leen)
+            on_response: Recibe status y headers antes del cuerpo; si devuelve True no se lee el cuerpo
+
+        Returns:
+            FetchResult sin contenido; extra['bytes_read'] y extra['stopped_early']
+        """
+        return await self._bridge(self._stream_into(url, consumer, max_bytes, headers, on_response))
+
+    async def _stream_into(
+        self,
+        url: str,
+        consumer: Callable[[bytes], bool],
+        max_bytes: Optional[int],
+        headers: Optional[Dict[str, str]] = None,
+        on_response: Optional[Callable[[int, Dict[str, str]], bool]] = None
+    ) -> FetchResult:
+        if max_bytes is None:
+            max_bytes = self.max_body_bytes
+        client = self._get_client()
+        received = 0
+        stopped_early = False
+        async with self._host_slot(url):
+            start = time.perf_counter()
+            async with client.stream('GET', url, headers=headers or None) as response:
+                if on_response is not None and on_response(response.status_code, dict(response.headers)):
+                    stopped_early = True
+                elif response.status_code in (200, 206):
+                    async for chunk in response.aiter_bytes():
+                        if max_bytes is not None and received + len(chunk) > max_bytes:
+                            chunk = chunk[:max_bytes - received]
+                            stopped_early = True
+                        received += len(chunk)
+                        if consumer(chunk) or stopped_early:
+                            stopped_early = True
+                            break
+            elapsed = time.perf_counter() - start
+        return FetchResult(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            content=b'',
+            http_version=response.http_version,
+            elapsed=elapsed,
+            extra={'bytes_read': received, 'stopped_early': stopped_early}
+        )
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[Optional[FetchResult]]:
+        """
+        Descarga varias URLs en paralelo respetando el límite por host.
+        Las URLs que fallan devuelven None en su posición.
+        """
+        return await self._bridge(self._fetch_many(list(urls)))
+
+    async def _fetch_many(self, urls: List[str]) -> List[Optional[FetchResult]]:
+        results = await asyncio.gather(*(self._fetch(u) for u in urls), return_exceptions=True)
+        return [r if isinstance(r, FetchResult) else None for r in results]
+
+    async def _fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_bytes: Optional[int] = None,
+        stop_when: Optional[Callable[[StreamSniffer], bool]] = None,
+        stream: bool = False
+    ) -> FetchResult:
+        """Descarga dentro del loop del fetcher, revalidando contra la caché."""
+        entry = await self._cache_call(self.cache.get, url) if self.cache else None
+        if entry is not None and entry.is_fresh():
+            self.cache.record_hit()
+            await self._cache_call(self.cache.touch, url)
+            return self._sniff_cached(self._from_cache(entry)) if stream else self._from_cache(entry)
+
+        if stream:
+            return await self._fetch_streaming(url, entry, headers, max_bytes, stop_when)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(entry.conditional_headers())
+
+        client = self._get_client()
+        async with self._host_slot(url):
+            start = time.perf_counter()
+            response = await client.get(url, headers=request_headers or None)
+            elapsed = time.perf_counter() - start
+
+        if entry is not None and response.status_code == 304:
+            # Sin cambios: solo viajaron headers, el cuerpo sale del disco
+            self.cache.record_hit(revalidated=True)
+            await self._cache_call(self.cache.refresh, url, dict(response.headers))
+            return self._from_cache(entry, elapsed)
+
+        result = FetchResult(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+            encoding=response.encoding or 'utf-8',
+            http_version=response.http_version,
+            elapsed=elapsed
+        )
+        if self.cache:
+            self.cache.record_miss()
+            await self._cache_call(self.cache.put, url, result.status_code, result.headers, result.content, result.encoding)
+        return result
+
+    async def _fetch_streaming(
+        self,
+        url: str,
+        entry,
+        headers: Optional[Dict[str, str]],
+        max_bytes: Optional[int],
+        stop_when: Optional[Callable[[StreamSniffer], bool]]
+    ) -> FetchResult:
+        """Lee el cuerpo chunk a chunk con tope de bytes y corte temprano."""
+        if max_bytes is None:
+            max_bytes = self.max_body_bytes
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(entry.conditional_headers())
+
+        client = self._get_client()
+        chunks: List[bytes] = []
+        truncated = stopped_early = False
+        async with self._host_slot(url):
+            start = time.perf_counter()
+            async with client.stream('GET', url, headers=request_headers or None) as response:
+                if entry is not None and response.status_code == 304:
+                    self.cache.record_hit(revalidated=True)
+                    await self._cache_call(self.cache.refresh, url, dict(response.headers))
+                    return self._sniff_cached(self._from_cache(entry, time.perf_counter() - start))
+
+                sniffer = StreamSniffer(response.headers.get('content-type', ''))
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    if max_bytes is not None and received + len(chunk) > max_bytes:
+                        chunk = chunk[:max_bytes - received]
+                        truncated = True
+                    received += len(chunk)
+                    chunks.append(chunk)
+                    sniffer.feed(chunk)
+                    if truncated:
+                        break
+                    if stop_when is not None and stop_when(sniffer):
+                        stopped_early = True
+                        break
+            elapsed = time.perf_counter() - start
+
+        signals = sniffer.close()
+        result = FetchResult(
+            url=str(response.url),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            content=b''.join(chunks),
+            encoding=signals.charset,
+            http_version=response.http_version,
+            elapsed=elapsed,
+            extra={'signals': signals, 'truncated': truncated, 'stopped_early': stopped_early}
+        )
+        if self.cache:
+            self.cache.record_miss()
+            # Solo se cachean cuerpos completos
+            if not (truncated or stopped_early):
+                await self._cache_call(
+                    self.cache.put, url, result.status_code, result.headers, result.content, result.encoding
+                )
+        return result
+
+    async def _cache_call(self, fn: Callable, *args):
+        """Ejecuta una operación de la caché en su hilo para no frenar al resto de las descargas."""
+        return await asyncio.get_running_loop().run_in_executor(self._cache_io, fn, *args)
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """Contadores de la caché HTTP (None si está desactivada)."""
+        return self.cache.stats() if self.cache else None
+
+    @staticmethod
+    def _sniff_cached(result: FetchResult) -> FetchResult:
+        """Agrega las EarlySignals a una respuesta servida desde la caché."""
+        sniffer = StreamSniffer(result.headers.get('content-type', ''))
+        sniffer.feed(result.content)
+        result.extra.update({'signals': sniffer.close(), 'truncated': False, 'stopped_early': False})
+        return result
+
+    @staticmethod
+    def _from_cache(entry, elapsed: float = 0.0) -> FetchResult:
+        """Convierte una entrada de la caché en FetchResult."""
+        return FetchResult(
+            url=entry.url,
+            status_code=entry.status_code,
+            headers=entry.headers,
+            content=entry.content,
+            encoding=entry.encoding,
+            elapsed=elapsed,
+            from_cache=True
+        )
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Semáforo que limita los requests simultáneos a un mismo host."""
+        host = urlparse(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return slot
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Crea el cliente la primera vez (debe ocurrir dentro del loop)."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                http2=self.http2,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30
+                )
+            )
+        return self._client
+
+    async def _bridge(self, coro: Coroutine):
+        """Ejecuta la corrutina en el loop del fetcher y la espera desde el loop actual."""
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    # ------------------------------------------------------------------
+    # API sync
+    # ------------------------------------------------------------------
+
+    def fetch_sync(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Versión bloqueante de fetch() para código sync."""
+        return self.run(self._fetch(url, headers))
+
+    def fetch_stream_sync(
+        self,
+        url: str,
+        max_bytes: Optional[int] = None,
+        stop_when: Optional[Callable[[StreamSniffer], bool]] = None
+    ) -> FetchResult:
+        """Versión bloqueante de fetch_stream()."""
+        return self.run(self._fetch(url, max_bytes=max_bytes, stop_when=stop_when, stream=True))
+
+    def fetch_many_sync(self, urls: Iterable[str]) -> List[Optional[FetchResult]]:
+        """Versión bloqueante de fetch_many()."""
+        return self.run(self._fetch_many(list(urls)))
+
+    def run(self, coro: Coroutine):
+        """
+        Ejecuta una corrutina en el loop del fetcher y bloquea hasta su resultado.
+
+        Args:
+            coro: Corrutina que usa este fetcher
+
+        Returns:
+            Resultado de la corrutina
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("HttpFetcher.run() no puede llamarse desde su propio loop; usar await")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Arranca el hilo con el event loop del fetcher si no existe."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='http-fetcher',
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def close(self):
+        """Cierra las conexiones abiertas y detiene el loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        self._host_slots.clear()
+        loop.call_soon_threadsafe(loop.stop)
+        if self._cache_io is not None:
+            self._cache_io.shutdown(wait=True)
+
+
+_fetcher: Optional[HttpFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_http_fetcher(**fetcher_kwargs) -> HttpFetcher:
+    """
+    Obtiene el fetcher compartido del proceso.
+
+    Args:
+        **fetcher_kwargs: Opciones de HttpFetcher; solo aplican al crearlo
+
+    Returns:
+        HttpFetcher compartido
+    """
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HttpFetcher(**fetcher_kwargs)
+        return _fetcher
@@ -0,0 +1,456 @@
+"""
+Descarga de imágenes de producto a disco, direccionadas por contenido.
+Cada archivo se guarda como <sha256>.<ext>: la misma foto publicada en varias URLs
+(o en varias corridas) se escribe una sola vez. Un manifiesto en la carpeta recuerda
+qué URL corresponde a qué archivo, de modo que una segunda corrida no vuelve a bajar
+nada, y las descargas cortadas (presupuesto, timeout, red) se retoman con Range.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, IO, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from http_fetcher import HttpFetcher
+from image_probe import sniff_format
+
+MANIFEST_FILE = 'manifest.json'
+PARTIAL_DIR = '.partial'
+
+_DOWNLOAD_HEADERS = {
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+    # Sin compresión: los offsets de Range son los del archivo
+    'Accept-Encoding': 'identity',
+}
+_EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'gif': 'gif', 'webp': 'webp', 'avif': 'avif',
+               'heic': 'heic', 'bmp': 'bmp', 'svg': 'svg'}
+_HASH_BLOCK = 1024 * 1024
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-\d+/(?:\d+|\*)$', re.IGNORECASE)
+_MANIFEST_LOCK = threading.Lock()
+
+# Toda la E/S de disco pasa por un único hilo: el loop del fetcher nunca espera al disco
+# y, al ser FIFO, las escrituras de cada descarga llegan en orden
+_DISK = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-disk')
+
+# Parciales en uso: dos tandas del proceso no escriben a la vez el mismo .part
+_PARTS_IN_USE: Set[str] = set()
+_PARTS_LOCK = threading.Lock()
+
+
+async def _on_disk(fn, *args):
+    """Ejecuta fn en el hilo de disco y espera su resultado."""
+    return await asyncio.wrap_future(_DISK.submit(fn, *args))
+
+
+@asynccontextmanager
+async def _claim_part(part_path: str):
+    """Reserva el archivo parcial de una URL mientras dura su descarga."""
+    while True:
+        with _PARTS_LOCK:
+            if part_path not in _PARTS_IN_USE:
+                _PARTS_IN_USE.add(part_path)
+                break
+        await asyncio.sleep(0.05)
+    try:
+        yield
+    finally:
+        with _PARTS_LOCK:
+            _PARTS_IN_USE.discard(part_path)
+
+
+def _resume_state(part_path: str) -> Tuple[int, Optional['hashlib._Hash']]:
+    """Tamaño y hash de lo ya escrito en un parcial (0, None si no existe)."""
+    if not os.path.exists(part_path):
+        return 0, None
+    hasher = hashlib.sha256()
+    offset = 0
+    with open(part_path, 'rb') as existing:
+        for block in iter(lambda: existing.read(_HASH_BLOCK), b''):
+            hasher.update(block)
+            offset += len(block)
+    return offset, hasher
+
+
+def _range_start(content_range: str) -> Optional[int]:
+    """Primer byte de un Content-Range 'bytes 100-199/200' (None si no se entiende)."""
+    match = _CONTENT_RANGE_RE.match(content_range.strip())
+    return int(match.group(1)) if match else None
+
+
+def _sniff_part(part_path: str) -> Optional[str]:
+    with open(part_path, 'rb') as f:
+        return sniff_format(f.read(512))
+
+
+def _store_part(part_path: str, target: str) -> bool:
+    """Mueve el parcial a su nombre por contenido; False si ese contenido ya estaba en disco."""
+    if os.path.exists(target):
+        os.remove(part_path)
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(part_path, target)
+    return True
+
+
+def _remove_part(part_path: str):
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+
+@dataclass
+class DownloadResult:
+    """Resultado de una tanda de descargas."""
+    files: Dict[str, str] = field(default_factory=dict)  # URL -> ruta local
+    downloaded: int = 0   # archivos nuevos escritos
+    duplicates: int = 0   # descargas cuyo contenido ya estaba en disco
+    reused: int = 0       # URLs ya descargadas en corridas anteriores (sin request)
+    resumed: int = 0      # descargas retomadas desde un archivo parcial
+    errors: int = 0
+    bytes: int = 0        # bytes recibidos en esta corrida
+    elapsed: float = 0.0
+    stopped_by: str = 'end'  # 'end', 'max_images', 'max_bytes' o 'max_seconds'
+
+
+class _Download:
+    """
+    Estado de una descarga en curso (consumidor de stream_into).
+    Los callbacks corren en el loop del fetcher: solo deciden y encolan; abrir,
+    escribir, hashear y cerrar el parcial ocurre en el hilo de disco.
+    """
+
+    def __init__(self, part_path: str, offset: int, validator: str, max_file_bytes: int, budget: Dict,
+                 prefix: Optional['hashlib._Hash'] = None):
+        self.part_path = part_path
+        self.offset = offset
+        self.validator = validator
+        self.max_file_bytes = max_file_bytes
+        self.budget = budget
+        self.prefix = prefix  # hash de los bytes ya presentes en el parcial
+        self.handle: Optional[IO[bytes]] = None
+        self.hasher = hashlib.sha256()
+        self.written = 0
+        self.expected: Optional[int] = None
+        self.content_type = ''
+        self.error = ''
+        self.disk_error = ''
+        self.interrupted = False
+        self.opened = False
+        self.closed = False
+        self._last: Optional[Future] = None
+
+    def on_response(self, status_code: int, headers: Dict[str, str]) -> bool:
+        """Decide si se anexa (206), se reescribe (200) o se descarta la respuesta."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        if status_code == 206 and self.offset and self.prefix is not None:
+            # Solo se anexa si el servidor retoma justo donde termina el parcial
+            if _range_start(headers.get('content-range', '')) != self.offset:
+                self.error = 'Content-Range no coincide con el parcial'
+                return True
+            mode = 'ab'
+            self.hasher = self.prefix.copy()
+        elif status_code == 200:
+            self.offset, mode = 0, 'wb'
+        else:
+            self.error = f'HTTP {status_code}'
+            return True
+        length = headers.get('content-length', '')
+        if length.isdigit():
+            self.expected = int(length)
+            if self.offset + self.expected > self.max_file_bytes:
+                self.error = 'archivo demasiado grande'
+                return True
+        etag = headers.get('etag', '')
+        # If-Range solo admite ETags fuertes; si no hay, sirve Last-Modified
+        self.validator = etag if etag and not etag.startswith('W/') else headers.get('last-modified', '')
+        self.content_type = headers.get('content-type', '').lower()
+        self.opened = True
+        self._submit(self._open, mode)
+        return False
+
+    def __call__(self, chunk: bytes) -> bool:
+        if self.budget['bytes'] + len(chunk) > self.budget['max_bytes']:
+            self.budget['exhausted'] = True
+            self.interrupted = True
+            return True
+        if self.offset + self.written + len(chunk) > self.max_file_bytes:
+            self.error = 'archivo demasiado grande'
+            return True
+        self._submit(self._write, chunk)
+        self.written += len(chunk)
+        self.budget['bytes'] += len(chunk)
+        return bool(self.disk_error)
+
+    def close(self) -> Optional[Future]:
+        """Encola el cierre; el Future se resuelve cuando todo lo escrito llegó a disco."""
+        if self.opened and not self.closed:
+            self.closed = True
+            self._submit(self._close)
+        return self._last
+
+    def _submit(self, fn, *args):
+        self._last = _DISK.submit(fn, *args)
+
+    # Estos tres corren en el hilo de disco, en el orden en que se encolaron
+
+    def _open(self, mode: str):
+        try:
+            self.handle = open(self.part_path, mode)
+        except OSError as e:
+            self.disk_error = str(e)
+
+    def _write(self, chunk: bytes):
+        if self.handle is None:
+            return
+        try:
+            self.handle.write(chunk)
+        except OSError as e:
+            self.disk_error = str(e)
+        self.hasher.update(chunk)
+
+    def _close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    @property
+    def complete(self) -> bool:
+        return (
+            self.closed and not self.error and not self.disk_error and not self.interrupted
+            and self.written + self.offset > 0
+            and (self.expected is None or self.written == self.expected)
+        )
+
+
+class ImageDownloader:
+    """Descarga imágenes en paralelo a una carpeta direccionada por contenido."""
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        folder: str,
+        max_images: int = 500,
+        concurrency: int = 8,
+        max_per_host: int = 4,
+        per_host_delay: float = 0.1,
+        max_total_mb: float = 200,
+        max_file_mb: float = 15,
+        max_seconds: float = 120.0
+    ):
+        """
+        Args:
+            fetcher: Fetcher HTTP compartido (pool de conexiones)
+            folder: Carpeta de las imágenes (se crea si no existe)
+            max_images: Imágenes máximas por tanda
+            concurrency: Descargas simultáneas en total
+            max_per_host: Descargas simultáneas contra un mismo host
+            per_host_delay: Segundos mínimos entre requests al mismo host
+            max_total_mb: Tope de MB a descargar por tanda (lo cortado queda para retomar)
+            max_file_mb: Tamaño máximo de un archivo
+            max_seconds: Tiempo máximo de la tanda
+        """
+        self.fetcher = fetcher
+        self.folder = folder
+        self.max_images = max_images
+        self.concurrency = max(1, concurrency)
+        self.max_per_host = max(1, max_per_host)
+        self.per_host_delay = per_host_delay
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.max_seconds = max_seconds
+        os.makedirs(os.path.join(folder, PARTIAL_DIR), exist_ok=True)
+        self.manifest = self._load_manifest()
+        self._discarded: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # Manifiesto
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(os.path.join(self.folder, MANIFEST_FILE), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        return {'urls': dict(data.get('urls') or {}), 'partial': dict(data.get('partial') or {})}
+
+    def _save_manifest(self):
+        """Guarda el manifiesto fusionado con el de disco (varios scrapers pueden compartir la carpeta)."""
+        path = os.path.join(self.folder, MANIFEST_FILE)
+        with _MANIFEST_LOCK:
+            merged = self._load_manifest()
+            merged['urls'].update(self.manifest['urls'])
+            merged['partial'].update(self.manifest['partial'])
+            for url in self._discarded:
+                merged['partial'].pop(url, None)
+            merged['partial'] = {u: v for u, v in merged['partial'].items() if u not in merged['urls']}
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+            self.manifest = merged
+
+    def local_path(self, url: str) -> Optional[str]:
+        """Ruta local de una URL ya descargada (None si no está en disco)."""
+        relative = self.manifest['urls'].get(url)
+        if relative:
+            path = os.path.join(self.folder, relative)
+            if os.path.exists(path):
+                return path
+        return None
+
+    # ------------------------------------------------------------------
+    # Descargas
+    # ------------------------------------------------------------------
+
+    def download_sync(self, urls: Iterable[str]) -> DownloadResult:
+        """Versión sync de download (corre en el loop del fetcher)."""
+        return self.fetcher.run(self.download(list(urls)))
+
+    async def download(self, urls: Iterable[str]) -> DownloadResult:
+        """
+        Descarga las URLs que no estén ya en disco.
+
+        Args:
+            urls: URLs de imágenes, en orden de prioridad (se descartan duplicadas y data:)
+
+        Returns:
+            DownloadResult con la ruta local de cada URL disponible
+        """
+        started = time.monotonic()
+        result = DownloadResult()
+        pending = []
+        for url in dict.fromkeys(u.strip() for u in urls if u):
+            if not url.startswith(('http://', 'https://')):
+                continue
+            path = self.local_path(url)
+            if path:
+                result.files[url] = path
+                result.reused += 1
+            else:
+                pending.append(url)
+        if len(pending) > self.max_images:
+            pending = pending[:self.max_images]
+            result.stopped_by = 'max_images'
+
+        deadline = started + self.max_seconds
+        budget = {'bytes': 0, 'max_bytes': self.max_total_bytes, 'exhausted': False}
+        pool = asyncio.Semaphore(self.concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+        pacing: Dict[str, Dict] = {}
+
+        async def polite_wait(host: str):
+            state = pacing.setdefault(host, {'lock': asyncio.Lock(), 'last': 0.0})
+            async with state['lock']:
+                wait = state['last'] + self.per_host_delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                state['last'] = time.monotonic()
+
+        async def fetch(url: str):
+            host = urlparse(url).netloc.lower()
+            host_slot = hosts.setdefault(host, asyncio.Semaphore(self.max_per_host))
+            # Cupo del host y pausa de cortesía antes del cupo global: la espera de un host
+            # lento no deja ociosos los cupos que podrían estar bajando de otros hosts
+            async with host_slot:
+                if budget['exhausted'] or time.monotonic() >= deadline:
+                    return
+                await polite_wait(host)
+                async with pool:
+                    remaining = deadline - time.monotonic()
+                    if budget['exhausted'] or remaining <= 0:
+                        return
+                    try:
+                        await asyncio.wait_for(self._download_one(url, budget, result), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+        try:
+            await asyncio.gather(*(fetch(url) for url in pending))
+        finally:
+            self._save_manifest()
+
+        if budget['exhausted']:
+            result.stopped_by = 'max_bytes'
+        elif time.monotonic() >= deadline and not all(url in result.files for url in pending):
+            result.stopped_by = 'max_seconds'
+        result.bytes = budget['bytes']
+        result.elapsed = round(time.monotonic() - started, 2)
+        return result
+
+    async def _download_one(self, url: str, budget: Dict, result: DownloadResult):
+        """Descarga (o retoma) una URL al archivo parcial y lo mueve a su nombre por contenido."""
+        part_path = os.path.join(self.folder, PARTIAL_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+        async with _claim_part(os.path.abspath(part_path)):
+            await self._download_claimed(url, part_path, budget, result)
+
+    async def _download_claimed(self, url: str, part_path: str, budget: Dict, result: DownloadResult):
+        validator = self.manifest['partial'].get(url, '')
+        offset, prefix = await _on_disk(_resume_state, part_path) if validator else (0, None)
+        headers = dict(_DOWNLOAD_HEADERS)
+        if offset:
+            headers.update({'Range': f'bytes={offset}-', 'If-Range': validator})
+
+        download = _Download(part_path, offset, validator, self.max_file_bytes, budget, prefix)
+        try:
+            # Un byte más que el tope: un archivo más grande se detecta en vez de quedar truncado
+            await self.fetcher.stream_into(url, download, max_bytes=self.max_file_bytes + 1, headers=headers,
+                                           on_response=download.on_response)
+        except Exception as e:
+            download.error = download.error or type(e).__name__
+            download.interrupted = True
+        finally:
+            # También si el timeout de la tanda cancela la descarga: lo escrito queda para retomar
+            flushed = download.close()
+            if download.written and download.validator:
+                self.manifest['partial'][url] = download.validator
+        if flushed is not None:
+            await asyncio.wrap_future(flushed)
+
+        if not download.complete:
+            if not download.interrupted:
+                self._discard(url, part_path)
+            # Cortada por el presupuesto de bytes: no es un error, se retoma en la próxima tanda
+            result.errors += bool(download.error or download.disk_error) or not download.interrupted
+            return
+        if download.offset:
+            result.resumed += 1
+
+        fmt = await _on_disk(_sniff_part, part_path)
+        if fmt is None and not download.content_type.startswith('image/'):
+            result.errors += 1
+            self._discard(url, part_path)
+            return
+        digest = download.hasher.hexdigest()
+        extension = _EXTENSIONS.get(fmt) or os.path.splitext(urlparse(url).path)[1].lstrip('.').lower()[:5] or 'img'
+        relative = os.path.join(digest[:2], f"{digest}.{extension}")
+        target = os.path.join(self.folder, relative)
+        if await _on_disk(_store_part, part_path, target):
+            result.downloaded += 1
+        else:
+            result.duplicates += 1
+        self.manifest['partial'].pop(url, None)
+        self.manifest['urls'][url] = relative
+        result.files[url] = target
+
+    def _discard(self, url: str, part_path: str):
+        self.manifest['partial'].pop(url, None)
+        self._discarded.add(url)
+        # Encolado detrás de las escrituras pendientes del mismo parcial
+        _DISK.submit(_remove_part, part_path)
+
+    def download_catalog(self, products: List[Dict[str, str]], max_per_product: int = 3) -> DownloadResult:
+        """
+        Descarga las imágenes de un catálogo: primero la principal de cada producto,
+        después las secundarias (si el presupuesto se agota, todos tienen al menos una).
+        """
+        per_product = [[u for u in (p.get('url_imagenes') or '').split(', ') if u][:max_per_product] for p in products]
+        ordered = [images[rank] for rank in range(max_per_product) for images in per_product if len(images) > rank]
+        return self.download_sync(ordered)
@@ -0,0 +1,347 @@
+"""
+Sondeo de imágenes sin descargarlas.
+Lee solo los primeros KB de cada imagen (request con Range, cortando el stream apenas
+aparecen las dimensiones) y obtiene formato, ancho x alto y peso total del archivo.
+Sirve para detectar imágenes rotas o de baja resolución en catálogos grandes.
+"""
+
+import asyncio
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from http_fetcher import HttpFetcher
+
+# Primer Range: alcanza para PNG/GIF/WebP/AVIF y para el SOF de la mayoría de los JPEG.
+# Si un JPEG trae EXIF con miniatura o perfil ICC, se pide el resto hasta HEADER_BYTES.
+FIRST_RANGE_BYTES = 16 * 1024
+HEADER_BYTES = 64 * 1024
+MIN_SIDE = 600  # lado menor por debajo del cual una foto de producto se ve pixelada
+
+_PROBE_HEADERS = {
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+    # Sin compresión: los offsets del Range y el Content-Length son los del archivo
+    'Accept-Encoding': 'identity',
+}
+# Marcadores SOF de JPEG (C4, C8 y CC son DHT, JPG y DAC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_HEIF_BRANDS = (b'avif', b'avis', b'heic', b'heix', b'hevc', b'mif1', b'msf1')
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """Formato de imagen por sus magic bytes (None si no se reconoce)."""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8'):
+        return 'jpeg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data[4:8] == b'ftyp':
+        box = data[8:int.from_bytes(data[:4], 'big') or 32]
+        if b'avif' in box or b'avis' in box:
+            return 'avif'
+        if any(brand in box for brand in _HEIF_BRANDS):
+            return 'heic'
+    if data.startswith(b'BM'):
+        return 'bmp'
+    head = data[:512].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head):
+        return 'svg'
+    return None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """
+    Formato y dimensiones a partir del comienzo de un archivo de imagen.
+
+    Args:
+        data: Primeros bytes del archivo
+
+    Returns:
+        (formato, ancho, alto); None si el formato no se reconoce o faltan bytes.
+        Las imágenes SVG (vectoriales) devuelven ancho y alto 0.
+    """
+    fmt = sniff_format(data)
+    try:
+        if fmt == 'png':
+            if len(data) >= 24:
+                width, height = struct.unpack('>II', data[16:24])
+                return fmt, width, height
+        elif fmt == 'gif':
+            if len(data) >= 10:
+                width, height = struct.unpack('<HH', data[6:10])
+                return fmt, width, height
+        elif fmt == 'jpeg':
+            size = _jpeg_size(data)
+            if size:
+                return (fmt,) + size
+        elif fmt == 'webp':
+            size = _webp_size(data)
+            if size:
+                return (fmt,) + size
+        elif fmt in ('avif', 'heic'):
+            # Propiedad 'ispe' (image spatial extent) de la caja meta
+            at = data.find(b'ispe')
+            if at != -1 and len(data) >= at + 16:
+                width, height = struct.unpack('>II', data[at + 8:at + 16])
+                return fmt, width, height
+        elif fmt == 'bmp':
+            if len(data) >= 26:
+                width, height = struct.unpack('<ii', data[18:26])
+                return fmt, abs(width), abs(height)
+        elif fmt == 'svg':
+            return fmt, 0, 0
+    except struct.error:
+        return None
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Recorre los segmentos del JPEG hasta el primer SOF (ancho, alto)."""
+    i, n = 2, len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # bytes de relleno
+            i += 1
+            continue
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # marcadores sin longitud
+            i += 2
+            continue
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Dimensiones de un WebP con pérdida (VP8), sin pérdida (VP8L) o extendido (VP8X)."""
+    chunk = data[12:16]
+    if chunk == b'VP8 ' and len(data) >= 30:
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(data) >= 25:
+        b0, b1, b2, b3 = data[21:25]
+        return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+    if chunk == b'VP8X' and len(data) >= 30:
+        return 1 + int.from_bytes(data[24:27], 'little'), 1 + int.from_bytes(data[27:30], 'little')
+    return None
+
+
+def _total_size(status_code: int, headers: Dict[str, str]) -> Optional[int]:
+    """Peso del archivo completo: Content-Range en un 206, Content-Length en un 200."""
+    headers = {k.lower(): v for k, v in headers.items()}
+    if status_code == 206:
+        total = headers.get('content-range', '').rpartition('/')[2].strip()
+        return int(total) if total.isdigit() else None
+    length = headers.get('content-length', '')
+    return int(length) if status_code == 200 and length.isdigit() else None
+
+
+@dataclass
+class ImageInfo:
+    """Resultado del sondeo de una imagen."""
+    url: str
+    status_code: int = 0     # 0 si el request no llegó a responder
+    format: str = ''
+    width: int = 0
+    height: int = 0
+    size: Optional[int] = None  # bytes del archivo completo, si el servidor lo informa
+    bytes_read: int = 0
+    error: str = ''
+
+    @property
+    def ok(self) -> bool:
+        """Respondió una imagen (aunque sus dimensiones no entraran en los bytes leídos)."""
+        return bool(self.format) and not self.error
+
+    @property
+    def missing(self) -> bool:
+        """Imagen rota: error HTTP, request fallido o contenido que no es imagen."""
+        return not self.ok
+
+    @property
+    def min_side(self) -> int:
+        """Lado menor en píxeles (0 si es vectorial o no se pudo leer)."""
+        return min(self.width, self.height)
+
+    def is_low_res(self, min_side: int = MIN_SIDE) -> bool:
+        """Bitmap con el lado menor por debajo de min_side (SVG y dimensiones desconocidas no cuentan)."""
+        return self.ok and 0 < self.min_side < min_side
+
+
+class _HeaderReader:
+    """Consumidor de stream_into: acumula bytes hasta poder leer las dimensiones."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.found: Optional[Tuple[str, int, int]] = None
+
+    def __call__(self, chunk: bytes) -> bool:
+        self.data += chunk
+        if len(self.data) < 32:
+            return False
+        if sniff_format(bytes(self.data[:512])) is None:
+            return True  # no es una imagen: no tiene sentido seguir leyendo
+        self.found = image_dimensions(bytes(self.data))
+        return self.found is not None
+
+
+@dataclass
+class ImageReport:
+    """Resumen del sondeo de las imágenes de un catálogo."""
+    images: List[ImageInfo] = field(default_factory=list)
+    min_side: int = MIN_SIDE
+    elapsed: float = 0.0
+    stopped_by: str = 'end'  # 'end', 'max_images' o 'max_seconds'
+
+    @property
+    def probed(self) -> int:
+        return len(self.images)
+
+    @property
+    def missing(self) -> List[ImageInfo]:
+        return [i for i in self.images if i.missing]
+
+    @property
+    def low_res(self) -> List[ImageInfo]:
+        return [i for i in self.images if i.is_low_res(self.min_side)]
+
+    @property
+    def formats(self) -> Dict[str, int]:
+        return dict(Counter(i.format for i in self.images if i.ok).most_common())
+
+    @property
+    def median_side(self) -> int:
+        """Mediana del lado menor de los bitmaps leídos."""
+        sides = sorted(i.min_side for i in self.images if i.ok and i.min_side)
+        return sides[len(sides) // 2] if sides else 0
+
+    @property
+    def bytes_read(self) -> int:
+        return sum(i.bytes_read for i in self.images)
+
+
+class ImageProbe:
+    """Sondea imágenes en paralelo leyendo solo sus headers."""
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        max_images: int = 300,
+        concurrency: int = 16,
+        max_per_host: int = 6,
+        header_bytes: int = HEADER_BYTES,
+        min_side: int = MIN_SIDE,
+        max_seconds: float = 30.0
+    ):
+        """
+        Args:
+            fetcher: Fetcher HTTP compartido (pool de conexiones)
+            max_images: Imágenes máximas a sondear
+            concurrency: Requests simultáneos en total
+            max_per_host: Requests simultáneos contra un mismo host (CDN)
+            header_bytes: Bytes máximos a leer por imagen
+            min_side: Lado menor mínimo en píxeles para no considerarla de baja resolución
+            max_seconds: Tiempo máximo del sondeo
+        """
+        self.fetcher = fetcher
+        self.max_images = max_images
+        self.concurrency = max(1, concurrency)
+        self.max_per_host = max(1, max_per_host)
+        self.header_bytes = header_bytes
+        self.min_side = min_side
+        self.max_seconds = max_seconds
+
+    async def probe(self, url: str) -> ImageInfo:
+        """
+        Formato, dimensiones y peso de una imagen, leyendo a lo sumo header_bytes.
+        Un primer Range corto resuelve casi todo; solo si las dimensiones no aparecieron
+        (JPEG con metadatos largos) se pide el tramo siguiente.
+        """
+        reader = _HeaderReader()
+        info = ImageInfo(url=url)
+        first = min(FIRST_RANGE_BYTES, self.header_bytes)
+        try:
+            response = await self._read_range(url, reader, 0, first)
+            info.status_code = response.status_code
+            info.size = _total_size(response.status_code, response.headers)
+            if (
+                response.status_code == 206 and reader.found is None and first < self.header_bytes
+                and len(reader.data) == first and sniff_format(bytes(reader.data[:512])) == 'jpeg'
+                and (info.size is None or info.size > first)
+            ):
+                await self._read_range(url, reader, first, self.header_bytes)
+        except Exception as e:
+            info.error = type(e).__name__
+            return info
+        info.bytes_read = len(reader.data)
+        if info.status_code not in (200, 206):
+            info.error = f'HTTP {info.status_code}'
+        elif reader.found is not None:
+            info.format, info.width, info.height = reader.found
+        else:
+            info.format = sniff_format(bytes(reader.data[:512])) or ''
+            if not info.format:
+                info.error = 'no es una imagen'
+        return info
+
+    async def _read_range(self, url: str, reader: _HeaderReader, start: int, end: int):
+        """Pide los bytes [start, end) y los pasa al lector (un servidor sin Range responde 200 y se corta igual)."""
+        headers = {**_PROBE_HEADERS, 'Range': f'bytes={start}-{end - 1}'}
+        return await self.fetcher.stream_into(url, reader, max_bytes=end - start, headers=headers)
+
+    async def probe_many(self, urls: Iterable[str]) -> ImageReport:
+        """
+        Sondea varias imágenes con el pool acotado (global y por host).
+
+        Args:
+            urls: URLs de imágenes (se descartan duplicadas y data:)
+
+        Returns:
+            ImageReport con el resultado de cada imagen que entró en el presupuesto
+        """
+        started = time.monotonic()
+        report = ImageReport(min_side=self.min_side)
+        unique = [u for u in dict.fromkeys(u.strip() for u in urls if u) if u.startswith(('http://', 'https://'))]
+        if len(unique) > self.max_images:
+            unique = unique[:self.max_images]
+            report.stopped_by = 'max_images'
+        deadline = started + self.max_seconds
+        pool = asyncio.Semaphore(self.concurrency)
+        hosts: Dict[str, asyncio.Semaphore] = {}
+
+        async def probe(url: str) -> Optional[ImageInfo]:
+            host_slot = hosts.setdefault(urlparse(url).netloc.lower(), asyncio.Semaphore(self.max_per_host))
+            # Primero el cupo del host: quien espera a un host ocupado no retiene un cupo global
+            async with host_slot, pool:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    return await asyncio.wait_for(self.probe(url), remaining)
+                except asyncio.TimeoutError:
+                    return None
+
+        results = await asyncio.gather(*(probe(url) for url in unique))
+        report.images = [info for info in results if info is not None]
+        if len(report.images) < len(unique):
+            report.stopped_by = 'max_seconds'
+        report.elapsed = round(time.monotonic() - started, 2)
+        return report
+
+    def probe_many_sync(self, urls: Iterable[str]) -> ImageReport:
+        """Versión sync de probe_many (corre en el loop del fetcher)."""
+        return self.fetcher.run(self.probe_many(list(urls)))
+
+    def probe_catalog(self, products: List[Dict[str, str]]) -> ImageReport:
+        """Sondea la imagen principal (la primera de url_imagenes) de cada producto."""
+        urls = [(p.get('url_imagenes') or '').split(', ')[0] for p in products]
+        return self.probe_many_sync(u for u in urls if u)
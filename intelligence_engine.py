@@ -193,7 +193,38 @@ class IntelligenceEngine:
                         severity=5,
                         adnexum_solution="Generación de descripciones con IA + optimización SEO automática"
                     ))
-        
+
+            # Calidad de las imágenes (sondeo de headers: sin descargar los archivos)
+            imagenes = data.get("imagenes") or {}
+            sondeadas = imagenes.get("sondeadas", 0)
+            if sondeadas:
+                rotas = imagenes.get("rotas", 0)
+                baja = imagenes.get("baja_resolucion", 0)
+
+                if rotas / sondeadas >= 0.1:
+                    ejemplos = ", ".join(imagenes.get("ejemplos_rotas", [])[:3])
+                    diagnosis.insights.append(Insight(
+                        type=InsightType.PROBLEM,
+                        category=InsightCategory.VENTAS,
+                        title="Imágenes rotas en el catálogo",
+                        description=f"{int(rotas / sondeadas * 100)}% de las imágenes de producto no cargan. El cliente ve un recuadro vacío donde debería estar el producto.",
+                        evidence=f"{rotas} de {sondeadas} imágenes con error" + (f" (ej: {ejemplos})" if ejemplos else ""),
+                        source="Análisis de Catálogo",
+                        severity=8
+                    ))
+
+                if baja / sondeadas >= 0.3:
+                    diagnosis.insights.append(Insight(
+                        type=InsightType.OPPORTUNITY,
+                        category=InsightCategory.VENTAS,
+                        title="Fotos de producto en baja resolución",
+                        description=f"{int(baja / sondeadas * 100)}% de las fotos tienen menos de {imagenes.get('lado_minimo', 600)}px de lado. Se ven pixeladas en zoom y en pantallas grandes.",
+                        evidence=f"{baja} de {sondeadas} imágenes bajo {imagenes.get('lado_minimo', 600)}px (lado mediano: {imagenes.get('lado_mediano', 0)}px)",
+                        source="Análisis de Catálogo",
+                        severity=5,
+                        adnexum_solution="Mejora y reescalado de fotos de producto con IA"
+                    ))
+
         # Verificar políticas
         politicas = context.get("politicas", {})
         if not politicas.get("envio") and not politicas.get("devoluciones"):
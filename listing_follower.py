@@ -0,0 +1,547 @@
+"""
+Seguimiento de listados paginados.
+Detecta rel=next, paginación numerada, botones "cargar más" y scroll infinito,
+y recorre el resto del listado dentro de presupuestos de páginas y productos:
+por HTTP (en paralelo cuando las URLs de página se pueden generar) o, en modo
+HEAVY, scrolleando / cliqueando hasta que la grilla deja de crecer.
+"""
+
+import asyncio
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from html_parser import HtmlNode, compile_selector, parse_html
+from http_fetcher import HttpFetcher
+from render_readiness import wait_for_ready
+from site_crawler import normalize_url, site_key
+
+# Parámetros de query que llevan el número de página (en orden de preferencia)
+PAGE_PARAMS = ('page', 'pagina', 'pg', 'paged', 'p', 'page_number', 'currentpage')
+# /page/2 (WordPress), /pagina/2, /p/2
+_PAGE_PATH_RE = re.compile(r'/(?:page|pagina|p)/(\d+)(?=/|$)', re.IGNORECASE)
+# Marcador del número de página en los templates de URL
+PAGE_PLACEHOLDER = '{page}'
+
+# Contenedores de paginación habituales (temas de Shopify, WooCommerce, Tiendanube, VTEX)
+_PAGINATION_LINKS_CSS = ', '.join(
+    f'{scope} a[href]' for scope in (
+        '.pagination', '.pager', '.page-numbers', '.paginate', '.paginacion',
+        '[class*="pagination"]', '[class*="Pagination"]', 'nav[aria-label*="agina"]',
+    )
+)
+_CANDIDATES_CSS = 'a[href], link[rel~="next"], button, [role="button"], [class*="infinite"], [data-infinite-scroll]'
+
+# Textos de "página siguiente" y de "cargar más" (el patrón se comparte con el JS del navegador)
+_NEXT_TEXT_RE = re.compile(
+    r'^(?:siguiente|pr[oó]xima|next|p[aá]gina siguiente|next page)?\s*[›»>→]*$', re.IGNORECASE
+)
+LOAD_MORE_PATTERN = r'(?:cargar|ver|mostrar)\s+m[aá]s|load\s+more|show\s+more|view\s+more|see\s+more'
+_LOAD_MORE_RE = re.compile(LOAD_MORE_PATTERN, re.IGNORECASE)
+_NEXT_CLASS_RE = re.compile(r'(?:^|[\s_-])next(?:$|[\s_-])', re.IGNORECASE)
+_LOAD_MORE_CLASS_RE = re.compile(r'load-?more|ver-?mas|cargar-?mas', re.IGNORECASE)
+_MAX_BUTTON_TEXT = 40
+
+
+def page_number(url: str) -> Optional[Tuple[int, str]]:
+    """
+    Número de página de una URL y su template.
+
+    Returns:
+        (número, URL con PAGE_PLACEHOLDER en lugar del número) o None si la URL no lo lleva
+    """
+    parsed = urlparse(url)
+    pairs = parse_qsl(parsed.query, keep_blank_values=True)
+    params = {k.lower(): i for i, (k, _) in enumerate(pairs)}
+    for name in PAGE_PARAMS:
+        i = params.get(name)
+        if i is not None and pairs[i][1].isdigit():
+            marker = '__page__'
+            query = urlencode(pairs[:i] + [(pairs[i][0], marker)] + pairs[i + 1:])
+            template = urlunparse(parsed._replace(query=query)).replace(marker, PAGE_PLACEHOLDER)
+            return int(pairs[i][1]), template
+    match = _PAGE_PATH_RE.search(parsed.path)
+    if match:
+        path = parsed.path[:match.start(1)] + PAGE_PLACEHOLDER + parsed.path[match.end(1):]
+        return int(match.group(1)), urlunparse(parsed._replace(path=path))
+    return None
+
+
+def listing_key(url: str) -> str:
+    """URL normalizada del listado sin el número de página (identifica al listado)."""
+    normalized = normalize_url(url) or url
+    numbered = page_number(normalized)
+    if numbered is None:
+        return normalized
+    # La página 1 suele ser la URL sin número: se quita el parámetro o el segmento
+    parsed = urlparse(numbered[1])
+    query = urlencode([(k, v) for k, v in parse_qsl(parsed.query) if v != PAGE_PLACEHOLDER])
+    path = re.sub(r'/(?:page|pagina|p)/' + re.escape(PAGE_PLACEHOLDER), '', parsed.path, flags=re.IGNORECASE)
+    return urlunparse(parsed._replace(path=path or '/', query=query))
+
+
+@dataclass
+class Pagination:
+    """Paginación detectada en una página de listado."""
+    current: int = 1                                   # número de la página analizada
+    next_url: Optional[str] = None                     # rel=next o enlace "siguiente"
+    pages: Dict[int, str] = field(default_factory=dict)  # enlaces numerados: número -> URL
+    template: Optional[str] = None                     # URL de página con PAGE_PLACEHOLDER
+    same_listing: bool = True                          # el template pagina el listado analizado
+    load_more: bool = False                            # botón "cargar más" (sin URL: solo navegador)
+    infinite_scroll: bool = False                      # marcas de scroll infinito en el HTML
+
+    @property
+    def kind(self) -> Optional[str]:
+        """'numbered', 'next', 'load_more', 'infinite_scroll' o None si no hay paginación."""
+        if self.template and len(self.pages) > 1:
+            return 'numbered'
+        if self.next_url:
+            return 'next'
+        if self.load_more:
+            return 'load_more'
+        if self.infinite_scroll:
+            return 'infinite_scroll'
+        return None
+
+    @property
+    def last_page(self) -> int:
+        """Mayor número de página enlazado (o el siguiente al actual si solo hay "siguiente")."""
+        last = max(self.pages, default=self.current)
+        return max(last, self.current + 1) if self.next_url else last
+
+    def page_url(self, number: int) -> Optional[str]:
+        """URL de la página N según el template (None si no hay template)."""
+        if number in self.pages:
+            return self.pages[number]
+        return self.template.replace(PAGE_PLACEHOLDER, str(number)) if self.template else None
+
+
+def detect_pagination(doc: HtmlNode, url: str) -> Pagination:
+    """
+    Analiza un listado y devuelve su paginación.
+
+    Los enlaces numerados se aceptan si están en un contenedor de paginación o si su
+    texto es el mismo número que llevan en la URL (así '?p=123' de WordPress no cuenta).
+
+    Args:
+        doc: Documento de html_parser
+        url: URL de la página (base de los enlaces relativos)
+
+    Returns:
+        Pagination (kind None si el listado no pagina)
+    """
+    result = Pagination()
+    site = site_key(url)
+    current = page_number(url)
+    if current is not None:
+        result.current = current[0]
+    own_listing = listing_key(url)
+
+    in_scope = {node.key for node in doc.select(compile_selector(_PAGINATION_LINKS_CSS, doc.backend))}
+    next_candidates: List[str] = []
+
+    for node in doc.select(compile_selector(_CANDIDATES_CSS, doc.backend)):
+        tag = node.tag
+        classes = ' '.join(node.classes)
+        if 'infinite' in classes.lower() or node.get('data-infinite-scroll') is not None:
+            result.infinite_scroll = True
+
+        href = node.get('href') if tag in ('a', 'link') else None
+        link = normalize_url(href, url) if href and not href.startswith(('#', 'javascript:')) else None
+        if link is not None and site_key(link) != site:
+            link = None
+        text = node.text(separator=' ') if tag != 'link' else ''
+
+        if tag != 'link' and len(text) <= _MAX_BUTTON_TEXT and (
+            _LOAD_MORE_RE.search(text) or _LOAD_MORE_CLASS_RE.search(classes)
+        ):
+            # "Cargar más" con URL real se sigue por HTTP como página siguiente
+            if link is not None:
+                next_candidates.append(link)
+            else:
+                result.load_more = True
+            continue
+        if link is None:
+            continue
+
+        rel = (node.get('rel') or '').lower().split()
+        label = (node.get('aria-label') or '').lower()
+        if 'next' in rel:
+            next_candidates.insert(0, link)
+        elif text and _NEXT_TEXT_RE.match(text):
+            # Un símbolo suelto ('›') solo cuenta dentro de la paginación o con número de página
+            if node.key in in_scope or page_number(link) or text.strip('›»>→ '):
+                next_candidates.append(link)
+        elif _NEXT_CLASS_RE.search(classes) or 'next' in label or 'siguiente' in label:
+            next_candidates.append(link)
+
+        numbered = page_number(link)
+        if numbered is not None and (node.key in in_scope or text.strip() == str(numbered[0])):
+            result.pages.setdefault(numbered[0], link)
+            if result.template is None:
+                result.template = numbered[1]
+
+    for candidate in next_candidates:
+        if candidate != normalize_url(url):
+            result.next_url = candidate
+            numbered = page_number(candidate)
+            if result.template is None and numbered is not None:
+                result.template = numbered[1]
+                result.pages.setdefault(numbered[0], candidate)
+            break
+
+    if result.template is not None:
+        result.same_listing = listing_key(result.template.replace(PAGE_PLACEHOLDER, '2')) == own_listing
+        if result.same_listing:
+            result.pages.setdefault(result.current, normalize_url(url) or url)
+    return result
+
+
+@dataclass
+class FollowResult:
+    """Resultado de recorrer un listado por HTTP."""
+    kind: Optional[str] = None
+    pages: List[str] = field(default_factory=list)  # páginas descargadas que aportaron productos
+    items: int = 0                                  # productos nuevos aportados
+    errors: int = 0
+    elapsed: float = 0.0
+    stopped_by: str = 'end'  # 'end', 'no_new_items', 'max_pages', 'max_items' o 'max_seconds'
+
+
+def _resolve(future: asyncio.Future, value, error: Optional[BaseException]):
+    """Completa en su loop el future de una página procesada en otro hilo (si sigue pendiente)."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+
+
+class ListingFollower:
+    """Recorre las páginas siguientes de un listado por HTTP."""
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        max_pages: int = 20,
+        max_items: int = 2000,
+        concurrency: int = 4,
+        max_seconds: float = 60.0,
+        parser: Optional[str] = None
+    ):
+        """
+        Args:
+            fetcher: Fetcher HTTP compartido (el recorrido corre en su event loop)
+            max_pages: Páginas máximas a descargar además de la inicial
+            max_items: Productos máximos del listado (contando los de la página inicial)
+            concurrency: Páginas numeradas pedidas en paralelo
+            max_seconds: Tiempo máximo del recorrido
+            parser: Backend de html_parser para las páginas descargadas
+        """
+        self.fetcher = fetcher
+        self.max_pages = max_pages
+        self.max_items = max_items
+        self.concurrency = max(1, concurrency)
+        self.max_seconds = max_seconds
+        self.parser = parser
+
+    def follow_sync(
+        self,
+        url: str,
+        doc: HtmlNode,
+        extract: Callable[[HtmlNode, str], int],
+        items: int = 0,
+        seen: Optional[Set[str]] = None
+    ) -> FollowResult:
+        """
+        Versión bloqueante de follow().
+
+        Las descargas corren en el loop del fetcher; el parseo y la extracción de cada
+        página, en el hilo que llama (como en DetailEnricher), para no frenar los
+        requests de los demás scrapes que comparten el loop.
+        """
+        pages: queue.Queue = queue.Queue()
+        done = object()
+        outcome: Dict[str, object] = {}
+
+        async def hand_off(page_url: str, html: str) -> Tuple[int, Optional[Pagination]]:
+            future = asyncio.get_running_loop().create_future()
+            pages.put((page_url, html, future))
+            return await future
+
+        def walk():
+            try:
+                outcome['result'] = self.fetcher.run(self.follow(url, doc, extract, items, seen, hand_off))
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                pages.put(done)
+
+        threading.Thread(target=walk, name='listing-follower', daemon=True).start()
+        while True:
+            item = pages.get()
+            if item is done:
+                break
+            page_url, html, future = item
+            try:
+                value, error = self._extract_page(page_url, html, extract), None
+            except Exception as e:
+                value, error = None, e
+            future.get_loop().call_soon_threadsafe(_resolve, future, value, error)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    async def follow(
+        self,
+        url: str,
+        doc: HtmlNode,
+        extract: Callable[[HtmlNode, str], int],
+        items: int = 0,
+        seen: Optional[Set[str]] = None,
+        hand_off: Optional[Callable[[str, str], Awaitable[Tuple[int, Optional[Pagination]]]]] = None
+    ) -> FollowResult:
+        """
+        Recorre el listado a partir de una página ya descargada.
+
+        Con paginación numerada las páginas se generan desde el template y se piden de a
+        `concurrency` en paralelo; con solo "siguiente" se avanza de a una. Se corta al
+        llegar a una página sin productos nuevos o al agotar un presupuesto.
+
+        Args:
+            url: URL de la página inicial
+            doc: Documento de la página inicial
+            extract: Recibe (documento, url) de cada página nueva y devuelve cuántos productos nuevos aportó
+            items: Productos que ya tiene el listado (cuentan para max_items)
+            seen: URLs normalizadas ya procesadas (no se piden de nuevo; se actualiza)
+            hand_off: Procesa (url, html) fuera del loop y devuelve (productos nuevos, paginación);
+                      None = en el loop (follow_sync lo pasa al hilo que llama)
+
+        Returns:
+            FollowResult
+        """
+        started = time.monotonic()
+        deadline = started + self.max_seconds
+        pagination = detect_pagination(doc, url)
+        result = FollowResult(kind=pagination.kind)
+        seen = seen if seen is not None else set()
+        seen.add(normalize_url(url) or url)
+        state = {'items': items}
+
+        def budget_left() -> bool:
+            if state['items'] >= self.max_items:
+                result.stopped_by = 'max_items'
+            elif len(result.pages) + result.errors >= self.max_pages:
+                result.stopped_by = 'max_pages'
+            elif time.monotonic() >= deadline:
+                result.stopped_by = 'max_seconds'
+            else:
+                return True
+            return False
+
+        async def process(page_url: str, html: str) -> Optional[Pagination]:
+            """Extrae una página; None si no aportó productos nuevos."""
+            if hand_off is not None:
+                new_items, found = await hand_off(page_url, html)
+            else:
+                new_items, found = self._extract_page(page_url, html, extract)
+            if new_items <= 0:
+                result.stopped_by = 'no_new_items'
+                return None
+            state['items'] += new_items
+            result.items += new_items
+            result.pages.append(page_url)
+            return found
+
+        if pagination.template is not None:
+            number = pagination.current + 1 if pagination.same_listing else 1
+            last = pagination.last_page
+            more = True
+            while (number <= last or more) and budget_left():
+                # Páginas conocidas en paralelo; después del último número enlazado, a ciegas de a un lote
+                room = self.max_pages - len(result.pages) - result.errors
+                end = number + min(self.concurrency, room)
+                if number <= last:
+                    end = min(end, last + 1)
+                urls = [pagination.page_url(n) for n in range(number, end)]
+                pending = [u for u in urls if u not in seen]
+                seen.update(pending)
+                fetched = await asyncio.gather(*(self._fetch_page(u, deadline) for u in pending))
+                pages = dict(zip(pending, fetched))
+                more = False
+                for n, page_url in zip(range(number, end), urls):
+                    if page_url not in pages:
+                        continue
+                    page = pages[page_url]
+                    if page is None:
+                        result.errors += 1
+                        result.stopped_by = 'end'
+                        more, last = False, 0
+                        break
+                    found = await process(*page)
+                    if found is None:
+                        more, last = False, 0
+                        break
+                    last = max(last, found.last_page if found.template else n)
+                    more = found.next_url is not None or found.last_page > n
+                    if not budget_left():
+                        more, last = False, 0
+                        break
+                number = end
+        else:
+            next_url = pagination.next_url
+            while next_url and next_url not in seen and budget_left():
+                seen.add(next_url)
+                page = await self._fetch_page(next_url, deadline)
+                if page is None:
+                    result.errors += 1
+                    break
+                found = await process(*page)
+                next_url = found.next_url if found is not None else None
+
+        result.elapsed = round(time.monotonic() - started, 2)
+        return result
+
+    def _extract_page(
+        self, page_url: str, html: str, extract: Callable[[HtmlNode, str], int]
+    ) -> Tuple[int, Optional[Pagination]]:
+        """Parsea y extrae una página: (productos nuevos, paginación si aportó productos)."""
+        page_doc = parse_html(html, self.parser)
+        new_items = extract(page_doc, page_url)
+        return new_items, detect_pagination(page_doc, page_url) if new_items > 0 else None
+
+    async def _fetch_page(self, url: str, deadline: float) -> Optional[Tuple[str, str]]:
+        """Descarga una página HTML del mismo sitio; (url final, html) o None."""
+        try:
+            response = await asyncio.wait_for(
+                self.fetcher.fetch_stream(url, stop_when=lambda sniffer: sniffer.signals.is_binary),
+                max(0.1, deadline - time.monotonic())
+            )
+        except Exception:
+            return None
+        signals = response.extra.get('signals')
+        content_type = response.headers.get('content-type', 'text/html').lower()
+        if (
+            response.status_code != 200
+            or (signals is not None and signals.is_binary)
+            or 'html' not in content_type
+            or site_key(response.url) != site_key(url)
+        ):
+            return None
+        return normalize_url(response.url) or url, response.text
+
+
+# ---------------------------------------------------------------------------
+# Modo HEAVY: scroll infinito y "cargar más"
+# ---------------------------------------------------------------------------
+
+# Máximo de coincidencias entre los selectores de contenedor (la grilla de productos)
+_COUNT_JS = """
+selectors => Math.max(0, ...selectors.map(sel => {
+    try { return document.querySelectorAll(sel).length; } catch (e) { return 0; }
+}))
+"""
+
+# Cliquea un "cargar más" visible (botones, o enlaces sin URL real); si no hay, scrollea al final
+_ADVANCE_JS = """
+({pattern, classPattern, maxText}) => {
+    const textRe = new RegExp(pattern, 'i');
+    const classRe = new RegExp(classPattern, 'i');
+    const candidates = document.querySelectorAll('button, a, [role="button"], input[type="button"]');
+    for (const el of candidates) {
+        const text = (el.innerText || el.value || '').trim();
+        const cls = typeof el.className === 'string' ? el.className : '';
+        if (!(text.length <= maxText && (textRe.test(text) || classRe.test(cls)))) continue;
+        if (el.disabled || el.offsetParent === null) continue;
+        const href = el.tagName === 'A' ? (el.getAttribute('href') || '') : '';
+        if (href && !href.startsWith('#') && !href.startsWith('javascript:')) continue;
+        el.scrollIntoView({block: 'center'});
+        el.click();
+        return 'load_more';
+    }
+    window.scrollTo(0, Math.max(document.body.scrollHeight, document.documentElement.scrollHeight));
+    return 'scroll';
+}
+"""
+
+
+@dataclass
+class ScrollResult:
+    """Resultado de expandir un listado en el navegador."""
+    rounds: int = 0
+    clicks: int = 0
+    items_before: int = 0
+    items: int = 0
+    elapsed_ms: float = 0.0
+    stopped_by: str = 'no_growth'  # 'no_growth', 'max_items', 'max_rounds', 'no_listing' o 'error'
+
+
+def expand_listing(
+    page,
+    product_selectors: List[str],
+    max_rounds: int = 15,
+    max_items: int = 2000,
+    quiet_ms: int = 750,
+    timeout_ms: int = 3000,
+    patience: int = 1
+) -> ScrollResult:
+    """
+    Scrollea (o cliquea "cargar más") hasta que la cantidad de productos deja de crecer.
+
+    Args:
+        page: Page de Playwright con el listado ya renderizado
+        product_selectors: Selectores de contenedor de producto (para contar la grilla)
+        max_rounds: Scrolls / clics máximos
+        max_items: Corta al llegar a esta cantidad de productos
+        quiet_ms: Ventana sin mutaciones para dar por terminada una carga
+        timeout_ms: Espera máxima por cada carga
+        patience: Rondas seguidas sin crecimiento antes de cortar
+
+    Returns:
+        ScrollResult con los productos antes y después
+    """
+    start = time.perf_counter()
+    result = ScrollResult()
+    selectors = list(product_selectors)
+    try:
+        count = result.items_before = result.items = page.evaluate(_COUNT_JS, selectors)
+        if count == 0:
+            result.stopped_by = 'no_listing'
+            return result
+        stale = 0
+        while True:
+            if result.items >= max_items:
+                result.stopped_by = 'max_items'
+                break
+            if result.rounds >= max_rounds:
+                result.stopped_by = 'max_rounds'
+                break
+            action = page.evaluate(_ADVANCE_JS, {
+                'pattern': LOAD_MORE_PATTERN,
+                'classPattern': _LOAD_MORE_CLASS_RE.pattern,
+                'maxText': _MAX_BUTTON_TEXT
+            })
+            result.rounds += 1
+            result.clicks += action == 'load_more'
+            # Sin selectores objetivo: espera a que el DOM se calme tras la carga
+            wait_for_ready(page, None, timeout_ms=timeout_ms, quiet_ms=quiet_ms, label="scroll")
+            count = page.evaluate(_COUNT_JS, selectors)
+            if count > result.items:
+                result.items = count
+                stale = 0
+            else:
+                stale += 1
+                if stale >= patience:
+                    result.stopped_by = 'no_growth'
+                    break
+    except Exception:
+        result.stopped_by = 'error'
+    finally:
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return result
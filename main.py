@@ -21,6 +21,7 @@ Ejemplos de uso:
   python main.py --url https://example-shop.com
   python main.py --url https://tienda.com --output ./mis_resultados
   python main.py --url https://shop.com --config mi_config.yaml
+  python main.py --url https://shop.com --deep
 
 El scraper extraerá:
   • Catálogo de productos (Excel con nombre, precio, descripción, imágenes)
@@ -49,6 +50,12 @@ El scraper extraerá:
         help='Ruta al archivo de configuración (default: config.yaml)'
     )
     
+    parser.add_argument(
+        '--deep',
+        action='store_true',
+        help='Rastrear el sitio completo (categorías, productos, nosotros, contacto y políticas)'
+    )
+    
     args = parser.parse_args()
     
     # Validar URL
@@ -66,7 +73,6 @@ El scraper extraerá:
         Path(args.output).mkdir(parents=True, exist_ok=True)
         
         # Ejecutar scraper
-        # Se asume que BusinessScraper o scrape_business acepta un argumento 'deep'
         scraper = BusinessScraper(config_path=args.config)
         results = scraper.scrape_business(args.url, output_dir=args.output, deep=args.deep)
         
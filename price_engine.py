@@ -0,0 +1,421 @@
+"""
+Motor de precios: convierte los textos de precio de un catálogo a Decimal + moneda ISO.
+Entiende separadores de miles y decimales de es-AR / es-ES / en-US (y afines),
+rangos ("$ 1.000 - $ 2.000") y precios "desde", y calcula estadísticas del
+catálogo completo con arrays de NumPy.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Separador decimal y moneda por defecto de cada locale
+LOCALES = {
+    'es-AR': (',', 'ARS'),
+    'es-ES': (',', 'EUR'),
+    'es-CL': (',', 'CLP'),
+    'es-CO': (',', 'COP'),
+    'es-UY': (',', 'UYU'),
+    'pt-BR': (',', 'BRL'),
+    'es-MX': ('.', 'MXN'),
+    'en-US': ('.', 'USD'),
+    'en-GB': ('.', 'GBP'),
+}
+DEFAULT_LOCALE = 'es-AR'
+
+# Símbolo con el que se muestra cada moneda
+CURRENCY_SYMBOLS = {
+    'ARS': '$', 'MXN': '$', 'CLP': '$', 'COP': '$', 'UYU': '$U',
+    'USD': 'US$', 'EUR': '€', 'GBP': '£', 'BRL': 'R$', 'PEN': 'S/',
+}
+
+# Monedas que se escriben con '$' solo
+DOLLAR_CURRENCIES = {'ARS', 'MXN', 'CLP', 'COP', 'USD', 'UYU'}
+
+# Separador decimal con que se escribe cada moneda: un código o símbolo propio
+# ('USD 1,500', 'R$ 1.500') decide los números ambiguos antes que el locale
+CURRENCY_DECIMAL_SEPARATORS = {
+    **{currency: sep for sep, currency in LOCALES.values()},
+    'PEN': '.',
+}
+
+# Símbolos y códigos reconocidos (los más largos primero: 'US$' antes que '$')
+_CURRENCY_TOKENS = (
+    ('US$', 'USD'), ('U$S', 'USD'), ('U$D', 'USD'), ('USD', 'USD'),
+    ('R$', 'BRL'), ('BRL', 'BRL'),
+    ('$U', 'UYU'), ('UYU', 'UYU'),
+    ('ARS', 'ARS'), ('MXN', 'MXN'), ('CLP', 'CLP'), ('COP', 'COP'), ('PEN', 'PEN'), ('S/', 'PEN'),
+    ('EUR', 'EUR'), ('€', 'EUR'), ('GBP', 'GBP'), ('£', 'GBP'),
+)
+_CURRENCY_BY_TOKEN = {token.upper(): code for token, code in _CURRENCY_TOKENS}
+# Cualquier marca de moneda, incluido '$' solo (que se resuelve con la moneda del locale).
+# El lookahead con los caracteres iniciales descarta rápido las posiciones que no pueden empezar una.
+_FIRST_CHARS = ''.join(sorted({c for token, _ in _CURRENCY_TOKENS for c in (token[0].upper(), token[0].lower())}))
+_CURRENCY_RE = re.compile(
+    f'(?=[{re.escape(_FIRST_CHARS)}])(?:'
+    + '|'.join(
+        re.escape(token) if not token.isalpha() else rf'\b{token}\b'
+        for token, _ in _CURRENCY_TOKENS
+    )
+    + r'|\$)',
+    re.IGNORECASE
+)
+
+# Número con separadores: 12.500,00 | 12,500.00 | 12 500,00 | 12500 | 12,5
+# (\s incluye los espacios no separables que usan algunos temas para los miles)
+_NUMBER_RE = re.compile(r'\d{1,3}(?:[.,\s]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?')
+_SPACE_RE = re.compile(r'\s')
+# Lo que puede separar los dos extremos de un rango (ya sin símbolos de moneda)
+_RANGE_GAP_RE = re.compile(r'^\s*(?:-|–|—|a|to|hasta)\s*$', re.IGNORECASE)
+# Formato normalizado de los precios de JSON-LD y APIs ('$1500.00', 'US$10.00 - US$20.00'):
+# punto decimal siempre, sin miles. No dice nada de cómo escribe los precios la tienda.
+_STRUCTURED_PRICE_RE = re.compile(
+    r'^\s*(?:[^\d\s]{1,3}|[A-Z]{3} )?\d+\.\d{2}(?:\s*-\s*(?:[^\d\s]{1,3}|[A-Z]{3} )?\d+\.\d{2})?\s*$'
+)
+_FROM_RE = re.compile(r'(?=[dafs])\b(?:desde|a partir de|from|starting at)\b', re.IGNORECASE)
+# Forma de un texto: los dígitos se enmascaran con '0' conservando su cantidad. Todo lo que
+# decide el parseo (dónde hay números, separadores, monedas, rangos) es igual en los textos
+# con la misma forma; solo cambian los importes. Se enmascaran los bytes UTF-8 (translate
+# de bytes es mucho más rápido que el de str) y las posiciones no cambian al decodificar.
+_DIGIT_MASK = bytes.maketrans(b'123456789', b'000000000')
+
+
+def _shape(text: str) -> bytes:
+    """Forma de un texto de precio ('$ 12.500,00' -> b'$ 00.000,00')."""
+    return text.encode('utf-8', 'surrogatepass').translate(_DIGIT_MASK)
+
+
+@dataclass(frozen=True)
+class Price:
+    """Precio parseado."""
+    amount: Decimal                       # precio (o mínimo del rango)
+    currency: str                         # código ISO 4217
+    max_amount: Optional[Decimal] = None  # máximo si es un rango
+    is_from: bool = False                 # "desde $ X"
+
+    @property
+    def is_range(self) -> bool:
+        return self.max_amount is not None and self.max_amount != self.amount
+
+
+@dataclass
+class PriceStats:
+    """Estadísticas de los precios de un catálogo en una moneda."""
+    currency: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    p25: float
+    p75: float
+
+
+def locale_settings(locale: Optional[str]) -> Tuple[str, str]:
+    """(separador decimal, moneda por defecto) del locale; el idioma solo alcanza ('es' -> es-AR)."""
+    if locale in LOCALES:
+        return LOCALES[locale]
+    language = (locale or '').split('-')[0].lower()
+    for name, settings in LOCALES.items():
+        if name.split('-')[0] == language:
+            return settings
+    return LOCALES[DEFAULT_LOCALE]
+
+
+def _decimal_separator_evidence(token: str) -> Optional[str]:
+    """Separador decimal que el número deja claro por sí solo (None si es ambiguo)."""
+    has_dot, has_comma = '.' in token, ',' in token
+    if has_dot and has_comma:
+        return '.' if token.rfind('.') > token.rfind(',') else ','
+    for sep in ('.', ','):
+        if sep in token:
+            if token.count(sep) > 1:
+                return ',' if sep == '.' else '.'
+            decimals = len(token) - token.rfind(sep) - 1
+            if decimals != 3:
+                return sep
+    return None
+
+
+def _clean_number(token: str, decimal_sep: str) -> str:
+    """Número con separadores reescrito como literal de Decimal ('12.500,5' -> '12500.5')."""
+    sep = _decimal_separator_evidence(token) or decimal_sep
+    thousands = ',' if sep == '.' else '.'
+    return _SPACE_RE.sub('', token.replace(thousands, '')).replace(sep, '.')
+
+
+def _to_decimal(token: str, decimal_sep: str) -> Optional[Decimal]:
+    """Convierte un número con separadores al Decimal que representa."""
+    try:
+        return Decimal(_clean_number(token, decimal_sep))
+    except InvalidOperation:
+        return None
+
+
+def parse_amount(value, decimal_sep: str = '.') -> Optional[Decimal]:
+    """
+    Importe de un valor suelto (número o texto como '12,50', '1.234,56', '1500 ARS').
+
+    Args:
+        value: Número o texto con el importe
+        decimal_sep: Separador decimal si el número es ambiguo ('1.500'); el default
+                     es el de schema.org y las APIs
+
+    Returns:
+        Decimal o None si no hay un número
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    match = _NUMBER_RE.search(str(value or ''))
+    return _to_decimal(match.group(0), decimal_sep) if match else None
+
+
+@dataclass(frozen=True)
+class _PricePlan:
+    """Análisis de la forma de un texto de precio, compartido por los textos con esa forma."""
+    numbers: Tuple[Tuple[int, int, str, str, bool], ...]  # (inicio, fin, miles, decimal, con espacios)
+    pair: Optional[Tuple[int, int]]                        # índices de los extremos si es un rango
+    candidates: Tuple[int, ...]                            # si no: índices entre los que vale el menor
+    currency: str
+    is_from: bool
+
+    def amount(self, text: str, index: int) -> Decimal:
+        """Importe del número `index` de un texto con esta forma."""
+        start, end, thousands, sep, spaced = self.numbers[index]
+        token = text[start:end].replace(thousands, '').replace(sep, '.')
+        return Decimal(_SPACE_RE.sub('', token) if spaced else token)
+
+
+class PriceEngine:
+    """Parsea precios con las convenciones de un locale."""
+
+    def __init__(self, locale: Optional[str] = None, currency: Optional[str] = None):
+        """
+        Args:
+            locale: Locale por defecto para números ambiguos ('12.500') y moneda de '$'
+            currency: Moneda de los precios sin símbolo ni código (None = la del locale)
+        """
+        self.locale = locale or DEFAULT_LOCALE
+        self.decimal_sep, locale_currency = locale_settings(self.locale)
+        self.currency = (currency or locale_currency).upper()
+        self._parse = lru_cache(maxsize=65536)(self._parse_uncached)
+        self._plan = lru_cache(maxsize=4096)(self._plan_uncached)
+
+    def parse(self, text: Optional[str], decimal_sep: Optional[str] = None) -> Optional[Price]:
+        """
+        Parsea un texto de precio.
+
+        Args:
+            text: Texto tal como aparece en la tienda ('$ 12.500,00', 'Desde US$ 10', '$1.000 - $2.000')
+            decimal_sep: Separador decimal para números ambiguos (None = el de la moneda
+                         si el texto trae código o símbolo propio, si no el del locale)
+
+        Returns:
+            Price o None si el texto no tiene un importe
+        """
+        if not text:
+            return None
+        return self._parse(str(text), decimal_sep)
+
+    def _parse_uncached(self, text: str, decimal_sep: Optional[str]) -> Optional[Price]:
+        plan = self._plan(_shape(text), decimal_sep)
+        if plan is None:
+            return None
+        if plan.pair is not None:
+            low, high = sorted(plan.amount(text, i) for i in plan.pair)
+            return Price(low, plan.currency, high if high != low else None, plan.is_from)
+        if len(plan.candidates) == 1:
+            low = plan.amount(text, plan.candidates[0])
+        else:
+            low = min(plan.amount(text, i) for i in plan.candidates)
+        return Price(low, plan.currency, None, plan.is_from)
+
+    def _plan_uncached(self, shape_bytes: bytes, decimal_sep: Optional[str]) -> Optional[_PricePlan]:
+        shape = shape_bytes.decode('utf-8', 'surrogatepass')
+        # Una pasada por las marcas de moneda: dónde empiezan y terminan, y la primera con código
+        mark_starts, mark_ends, currency = set(), set(), None
+        for mark in _CURRENCY_RE.finditer(shape):
+            mark_starts.add(mark.start())
+            mark_ends.add(mark.end())
+            if currency is None and mark.group(0) != '$':
+                currency = _CURRENCY_BY_TOKEN[mark.group(0).upper()]
+        if decimal_sep is None:
+            decimal_sep = CURRENCY_DECIMAL_SEPARATORS.get(currency, self.decimal_sep)
+
+        numbers = []
+        for match in _NUMBER_RE.finditer(shape):
+            token = match.group(0)
+            try:
+                Decimal(_clean_number(token, decimal_sep))
+            except InvalidOperation:
+                continue
+            start, end = match.span()
+            while start and shape[start - 1].isspace():
+                start -= 1
+            while end < len(shape) and shape[end].isspace():
+                end += 1
+            numbers.append([match.start(), match.end(), start in mark_ends, end in mark_starts, token])
+        if not numbers:
+            return None
+        # Anclado a la moneda: con símbolo delante ('$ 9.999'); el símbolo detrás ('9.999 €')
+        # solo cuenta si ningún número lo tiene delante ('Talle 38 $ 9.999' -> 9.999, no 38)
+        if not any(n[2] for n in numbers):
+            for number in numbers:
+                number[2] = number[3]
+
+        # Con símbolo de moneda, los números sueltos ('Talle 38', '3 cuotas') no son precios
+        any_anchored = any(n[2] for n in numbers)
+        pair = None
+        for i, (first, second) in enumerate(zip(numbers, numbers[1:])):
+            if any_anchored and not first[2]:
+                continue
+            gap = shape[first[1]:second[0]]
+            gap_without_currency = _CURRENCY_RE.sub('', gap)
+            if _RANGE_GAP_RE.match(gap_without_currency) and (second[2] or gap == gap_without_currency):
+                pair = (i, i + 1)
+                break
+        # Precio de lista y precio de oferta juntos ('$ 2.000 $ 1.500'): vale el menor
+        candidates = tuple(i for i, n in enumerate(numbers) if n[2] or not any_anchored)
+
+        separators = []
+        for start, end, _, _, token in numbers:
+            sep = _decimal_separator_evidence(token) or decimal_sep
+            separators.append((start, end, ',' if sep == '.' else '.', sep, bool(_SPACE_RE.search(token))))
+        return _PricePlan(
+            numbers=tuple(separators),
+            pair=pair,
+            candidates=candidates,
+            currency=currency or self._currency(shape),
+            is_from=bool(_FROM_RE.search(shape))
+        )
+
+    def _currency(self, text: str) -> str:
+        """Moneda de un texto sin código explícito: '$' es la del locale si se escribe con '$'."""
+        if '$' in text:
+            return self.currency if self.currency in DOLLAR_CURRENCIES else 'USD'
+        return self.currency
+
+    def infer_decimal_separator(self, texts: Sequence[str]) -> str:
+        """
+        Separador decimal del catálogo: el que indican los precios no ambiguos
+        ('1.234,56', '12,5'); si no hay ninguno, el del locale.
+        Los precios en el formato normalizado de JSON-LD / APIs ('$1500.00') no votan:
+        se parsean solos y no dicen nada de los precios que vienen del HTML.
+        """
+        return self._vote_decimal_separator(texts) or self.decimal_sep
+
+    @staticmethod
+    def _vote_decimal_separator(texts: Sequence[Optional[str]]) -> Optional[str]:
+        """Separador que votan los precios no ambiguos (None si empatan); un voto por texto y número."""
+        # La evidencia depende solo de la forma: se analiza una vez por forma
+        shapes: Dict[bytes, int] = {}
+        for text in texts:
+            if text:
+                shape = _shape(text)
+                shapes[shape] = shapes.get(shape, 0) + 1
+        votes = {'.': 0, ',': 0}
+        for shape_bytes, count in shapes.items():
+            shape = shape_bytes.decode('utf-8', 'surrogatepass')
+            if _STRUCTURED_PRICE_RE.match(shape):
+                continue
+            for token in _NUMBER_RE.findall(shape):
+                evidence = _decimal_separator_evidence(token)
+                if evidence:
+                    votes[evidence] += count
+        if votes['.'] == votes[',']:
+            return None
+        return '.' if votes['.'] > votes[','] else ','
+
+    def parse_many(self, texts: Sequence[Optional[str]]) -> 'PriceColumn':
+        """
+        Parsea los precios de todo un catálogo.
+        Cada texto distinto se parsea una sola vez y los resultados se reparten
+        con un índice inverso (los catálogos repiten mucho los importes); dentro
+        del parseo, el análisis de cada forma de texto ('$ 0.000,00') también se
+        hace una sola vez y por texto solo se convierten los importes.
+
+        Returns:
+            PriceColumn con arrays alineados a texts
+        """
+        if not texts:
+            return PriceColumn.empty()
+        unique = list(dict.fromkeys(texts))
+        positions = {text: i for i, text in enumerate(unique)}
+        indices = list(map(positions.__getitem__, texts))
+        inverse = np.array(indices, dtype=np.intp)
+        decimal_sep = self._vote_decimal_separator(unique)
+        parsed = [self.parse(text, decimal_sep) for text in unique]
+
+        low = np.array([float(p.amount) if p else np.nan for p in parsed], dtype=np.float64)
+        high = np.array([float(p.max_amount if p.max_amount is not None else p.amount) if p else np.nan
+                         for p in parsed], dtype=np.float64)
+        currency = np.array([p.currency if p else '' for p in parsed], dtype=object)
+        is_from = np.array([bool(p and p.is_from) for p in parsed], dtype=bool)
+        return PriceColumn(
+            low=low[inverse],
+            high=high[inverse],
+            currency=currency[inverse],
+            is_from=is_from[inverse],
+            prices=list(map(parsed.__getitem__, indices))
+        )
+
+    def stats(self, texts: Sequence[Optional[str]]) -> Dict[str, PriceStats]:
+        """Estadísticas por moneda (la más frecuente primero)."""
+        return self.parse_many(texts).stats()
+
+
+@dataclass
+class PriceColumn:
+    """Precios de un catálogo como arrays de NumPy (NaN donde no hay precio)."""
+    low: np.ndarray
+    high: np.ndarray
+    currency: np.ndarray
+    is_from: np.ndarray
+    prices: List[Optional[Price]]
+
+    @classmethod
+    def empty(cls) -> 'PriceColumn':
+        return cls(
+            low=np.empty(0, dtype=np.float64),
+            high=np.empty(0, dtype=np.float64),
+            currency=np.empty(0, dtype=object),
+            is_from=np.empty(0, dtype=bool),
+            prices=[]
+        )
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Máscara de los productos con precio."""
+        return ~np.isnan(self.low)
+
+    def stats(self) -> Dict[str, PriceStats]:
+        """
+        Estadísticas por moneda sobre el precio de cada producto
+        (el mínimo en rangos y precios "desde").
+        """
+        result: Dict[str, PriceStats] = {}
+        valid = self.valid
+        if not valid.any():
+            return result
+        counts = Counter(self.currency[valid].tolist())
+        for code in sorted(counts, key=lambda c: (-counts[c], c)):
+            amounts = self.low[valid & (self.currency == code)]
+            p25, median, p75 = np.percentile(amounts, [25, 50, 75])
+            result[str(code)] = PriceStats(
+                currency=str(code),
+                count=int(amounts.size),
+                min=float(amounts.min()),
+                max=float(amounts.max()),
+                mean=float(amounts.mean()),
+                median=float(median),
+                p25=float(p25),
+                p75=float(p75)
+            )
+        return result
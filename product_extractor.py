@@ -3,25 +3,106 @@ Módulo de extracción de productos desde páginas web.
 Detecta y extrae nombre, precio, descripción e imágenes de productos.
 """
 
+import itertools
 import re
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
 from playwright.sync_api import Page
+from app_config import get_config
+from catalog_api import CatalogResult, get_catalog_adapter
+from catalog_index import CatalogIndex
+from http_fetcher import get_http_fetcher
+from html_parser import HtmlNode, compile_selector, parse_html
 from selectors_database import SelectorsDatabase
+from structured_data import StructuredData, extract_structured_data, product_record
+
+_PRICE_RE = re.compile(r'[\$\€\£]\s*[\d,.]+|[\d,.]+\s*[\$\€\£]')
+_SPACE_RE = re.compile(r'\s+')
+
+# Campos de SelectorsDatabase que usa el extractor
+PLAN_FIELDS = ('producto', 'nombre', 'precio', 'descripcion', 'imagen', 'url_producto')
+
+
+class CompiledSelector(NamedTuple):
+    """Una alternativa de selector ya compilada."""
+    css: str
+    matcher: Any  # CSSSelector (lxml) o SoupSieve (bs4), para select()/select_one()
+
+
+@dataclass(frozen=True)
+class SelectorPlan:
+    """
+    Selectores de una plataforma ya compilados para un backend de parser.
+    Cada campo es la lista de alternativas (las separadas por coma), en orden.
+    """
+    producto: Tuple[CompiledSelector, ...]
+    nombre: Tuple[CompiledSelector, ...]
+    precio: Tuple[CompiledSelector, ...]
+    descripcion: Tuple[CompiledSelector, ...]
+    imagen: Tuple[CompiledSelector, ...]
+    url_producto: Tuple[CompiledSelector, ...]
+    encabezados: Tuple[CompiledSelector, ...]
+    parrafos: CompiledSelector
+
+
+def _compile(css: str, backend: str) -> CompiledSelector:
+    return CompiledSelector(css, compile_selector(css, backend))
+
+
+@lru_cache(maxsize=64)
+def _compile_plan(backend: str, platform: Optional[str], selectors: Tuple[Tuple[str, str], ...]) -> SelectorPlan:
+    def compile_list(css_list: str) -> Tuple[CompiledSelector, ...]:
+        return tuple(_compile(css.strip(), backend) for css in css_list.split(',') if css.strip())
+
+    fields = dict(selectors)
+    return SelectorPlan(
+        **{name: compile_list(fields.get(name, '')) for name in PLAN_FIELDS},
+        encabezados=tuple(_compile(tag, backend) for tag in ('h1', 'h2', 'h3', 'h4')),
+        parrafos=_compile('p', backend)
+    )
+
+
+def get_selector_plan(selectors: Dict[str, str], backend: str, platform: Optional[str] = None) -> SelectorPlan:
+    """
+    Plan de extracción compilado, cacheado por backend, plataforma y selectores
+    (si la config cambia los selectores, se compila un plan nuevo).
+
+    Args:
+        selectors: Selectores de SelectorsDatabase.get_selectors()
+        backend: Backend de los nodos sobre los que se va a usar ('lxml' o 'bs4')
+        platform: Plataforma de los selectores
+
+    Returns:
+        SelectorPlan listo para select()/select_one()
+    """
+    key = tuple((name, selectors.get(name, '')) for name in PLAN_FIELDS)
+    return _compile_plan(backend, platform, key)
 
 
 class ProductExtractor:
     """Extrae información de productos desde páginas web."""
     
-    def __init__(self, platform: Optional[str] = None):
+    def __init__(
+        self,
+        platform: Optional[str] = None,
+        parser: Optional[str] = None,
+        selectors: Optional[Dict[str, str]] = None
+    ):
         """
         Inicializa el extractor de productos.
         
         Args:
             platform: Plataforma de e-commerce detectada (opcional)
+            parser: Backend de html_parser ('lxml' o 'bs4'; None = general.html_parser de la config)
+            selectors: Selectores detectados para el sitio (grilla de grid_detector),
+                con prioridad sobre los de la plataforma o los genéricos
         """
+        general = get_config().section('general')
         self.platform = platform
-        self.selectors = SelectorsDatabase.get_selectors(platform)
+        self.parser = parser or general.get('html_parser')
+        self.selectors = SelectorsDatabase.get_selectors(platform, selectors)
     
     def extract_products_from_page(self, page: Page, base_url: str) -> List[Dict[str, str]]:
         """
@@ -34,95 +115,161 @@ class ProductExtractor:
         Returns:
             Lista de diccionarios con datos de productos
         """
-        products = []
-        
         # Obtener el contenido HTML
         html_content = page.content()
-        soup = BeautifulSoup(html_content, 'lxml')
+        doc = parse_html(html_content, self.parser)
+        
+        return self.extract_products_from_document(doc, base_url)
+    
+    def extract_products_from_api(self, base_url: str) -> Optional[CatalogResult]:
+        """
+        Intenta traer el catálogo completo desde la API JSON pública de la plataforma.
+        
+        Args:
+            base_url: URL del sitio
+            
+        Returns:
+            CatalogResult con productos, o None si la plataforma no tiene API
+            o la API no respondió (en ese caso se usa la extracción por CSS)
+        """
+        config = get_config()
+        api_config = config.section('catalog_api')
+        if not api_config.get('enabled', True):
+            return None
+        fetcher = get_http_fetcher(**config.section('http'))
+        adapter = get_catalog_adapter(
+            self.platform, fetcher,
+            max_products=api_config.get('max_products', 2000),
+            concurrency=api_config.get('concurrency', 4)
+        )
+        if adapter is None:
+            return None
+        try:
+            result = fetcher.run(adapter.fetch_catalog(base_url))
+        except Exception:
+            return None
+        return result if result and result.products else None
+    
+    def extract_products_from_document(
+        self,
+        doc: HtmlNode,
+        base_url: str,
+        structured: Optional[StructuredData] = None,
+        catalog: Optional[CatalogIndex] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Extrae todos los productos de un documento ya parseado (HTML estático o renderizado).
+        Los datos estructurados (JSON-LD / microdata) son la fuente principal;
+        los selectores CSS solo completan campos vacíos y productos faltantes.
+        Los repetidos (carruseles, destacados) se fusionan con CatalogIndex.
+        
+        Args:
+            doc: Documento de html_parser
+            base_url: URL base del sitio
+            structured: Datos estructurados ya extraídos del documento (opcional)
+            catalog: Catálogo al que sumar los productos, deduplicando contra los de
+                otras páginas del mismo listado (None = catálogo nuevo solo para esta página)
+            
+        Returns:
+            Lista de diccionarios con datos de productos (todos los del catálogo)
+        """
+        if structured is None:
+            structured = extract_structured_data(doc)
+        if catalog is None:
+            catalog = CatalogIndex()
+        for entity in structured.products:
+            product_data = product_record(entity, base_url)
+            if product_data['nombre_articulo']:
+                catalog.add(product_data, url=product_data['url_producto'] or None)
         
         # Buscar elementos de productos
-        product_elements = self._find_product_elements(soup)
+        plan = self._plan(doc)
+        product_elements = self._find_product_elements(doc, plan)
         
         for product_elem in product_elements:
-            product_data = self._extract_product_data(product_elem, base_url)
-            if product_data and product_data.get('nombre'):
-                products.append(product_data)
+            product_data = self._extract_product_data(product_elem, base_url, plan)
+            if product_data and product_data.get('nombre_articulo'):
+                catalog.add(product_data)
         
-        return products
+        return catalog.products()
     
-    def _find_product_elements(self, soup: BeautifulSoup) -> List:
+    def _plan(self, doc: HtmlNode) -> SelectorPlan:
+        """Plan de selectores compilado para el backend del documento."""
+        return get_selector_plan(self.selectors, doc.backend, self.platform)
+    
+    def _find_product_elements(self, doc: HtmlNode, plan: SelectorPlan) -> List[HtmlNode]:
         """
         Encuentra todos los elementos de productos en la página.
         
         Args:
-            soup: Objeto BeautifulSoup
+            doc: Documento parseado
+            plan: Selectores compilados
             
         Returns:
             Lista de elementos de productos
         """
         # Intentar con selectores de la plataforma
-        for selector in self.selectors['producto'].split(','):
-            selector = selector.strip()
-            products = soup.select(selector)
+        for selector in plan.producto:
+            products = doc.select(selector.matcher)
             if len(products) > 0:
                 return products
         
         return []
     
-    def _extract_product_data(self, product_elem, base_url: str) -> Dict[str, str]:
+    def _extract_product_data(self, product_elem, base_url: str, plan: SelectorPlan) -> Dict[str, str]:
         """
         Extrae datos de un elemento de producto individual.
         
         Args:
             product_elem: Elemento HTML del producto
             base_url: URL base para resolver URLs relativas
+            plan: Selectores compilados
             
         Returns:
             Diccionario con datos del producto
         """
         return {
-            'nombre_articulo': self._extract_name(product_elem),
-            'precio': self._extract_price(product_elem),
-            'descripcion': self._extract_description(product_elem),
-            'url_imagenes': self._extract_image_urls(product_elem, base_url)
+            'nombre_articulo': self._extract_name(product_elem, plan),
+            'precio': self._extract_price(product_elem, plan),
+            'descripcion': self._extract_description(product_elem, plan),
+            'url_imagenes': self._extract_image_urls(product_elem, base_url, plan),
+            'url_producto': self._extract_product_url(product_elem, base_url, plan)
         }
     
-    def _extract_name(self, product_elem) -> str:
+    def _extract_name(self, product_elem, plan: SelectorPlan) -> str:
         """Extrae el nombre del producto."""
-        for selector in self.selectors['nombre'].split(','):
-            selector = selector.strip()
-            elem = product_elem.select_one(selector)
+        for selector in plan.nombre:
+            elem = product_elem.select_one(selector.matcher)
             if elem:
                 # Obtener texto limpio
-                text = elem.get_text(strip=True)
+                text = elem.text()
                 if text:
                     return text
         
         # Fallback: buscar cualquier heading
-        for tag in ['h1', 'h2', 'h3', 'h4']:
-            elem = product_elem.find(tag)
+        for heading in plan.encabezados:
+            elem = product_elem.select_one(heading.matcher)
             if elem:
-                text = elem.get_text(strip=True)
+                text = elem.text()
                 if text:
                     return text
         
         return ""
     
-    def _extract_price(self, product_elem) -> str:
+    def _extract_price(self, product_elem, plan: SelectorPlan) -> str:
         """Extrae y normaliza el precio del producto."""
-        for selector in self.selectors['precio'].split(','):
-            selector = selector.strip()
-            elem = product_elem.select_one(selector)
+        for selector in plan.precio:
+            elem = product_elem.select_one(selector.matcher)
             if elem:
-                price_text = elem.get_text(strip=True)
+                price_text = elem.text()
                 # Normalizar el precio
                 normalized_price = self._normalize_price(price_text)
                 if normalized_price:
                     return normalized_price
         
         # Buscar patrones de precio en el texto
-        text_content = product_elem.get_text()
-        price_match = re.search(r'[\$\€\£]\s*[\d,.]+|[\d,.]+\s*[\$\€\£]', text_content)
+        text_content = product_elem.text(strip=False)
+        price_match = _PRICE_RE.search(text_content)
         if price_match:
             return self._normalize_price(price_match.group(0))
         
@@ -146,36 +293,45 @@ class ProductExtractor:
         
         # Extraer números y símbolos monetarios
         # Mantener el formato original pero limpiar
-        price_text = re.sub(r'\s+', ' ', price_text)
+        price_text = _SPACE_RE.sub(' ', price_text)
         
         return price_text
     
-    def _extract_description(self, product_elem) -> str:
+    def _extract_description(self, product_elem, plan: SelectorPlan) -> str:
         """Extrae la descripción del producto."""
-        for selector in self.selectors['descripcion'].split(','):
-            selector = selector.strip()
-            elem = product_elem.select_one(selector)
+        for selector in plan.descripcion:
+            elem = product_elem.select_one(selector.matcher)
             if elem:
-                desc = elem.get_text(strip=True)
+                desc = elem.text()
                 if desc and len(desc) > 10:  # Evitar descripciones muy cortas
                     return desc[:500]  # Limitar longitud
         
         # Fallback: buscar párrafos
-        paragraphs = product_elem.find_all('p')
+        paragraphs = product_elem.select(plan.parrafos.matcher)[:2]
         if paragraphs:
-            desc = ' '.join(p.get_text(strip=True) for p in paragraphs[:2])
+            desc = ' '.join(p.text() for p in paragraphs)
             if desc:
                 return desc[:500]
         
         return ""
     
-    def _extract_image_urls(self, product_elem, base_url: str) -> str:
+    def _extract_product_url(self, product_elem, base_url: str, plan: SelectorPlan) -> str:
+        """URL de la ficha del producto (enlace de la tarjeta, o la tarjeta si es un enlace)."""
+        elements = (product_elem.select_one(selector.matcher) for selector in plan.url_producto)
+        for elem in itertools.chain(elements, [product_elem] if product_elem.tag == 'a' else []):
+            href = (elem.get('href') or '').strip() if elem else ''
+            if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                return urljoin(base_url, href)
+        return ""
+    
+    def _extract_image_urls(self, product_elem, base_url: str, plan: SelectorPlan) -> str:
         """
         Extrae URLs de imágenes del producto.
         
         Args:
-            product_elem: Elemento del producto
+            product_elem: Elemento HTML del producto
             base_url: URL base para resolver URLs relativas
+            plan: Selectores compilados
             
         Returns:
             URLs de imágenes separadas por coma
@@ -183,11 +339,10 @@ class ProductExtractor:
         image_urls = []
         
         # Buscar imágenes con los selectores
-        for selector in self.selectors['imagen'].split(','):
-            selector = selector.strip()
-            images = product_elem.select(selector)
+        for selector in plan.imagen:
+            images = product_elem.select(selector.matcher)[:3]  # Máximo 3 imágenes por producto
             
-            for img in images[:3]:  # Máximo 3 imágenes por producto
+            for img in images:
                 # Intentar obtener URL de diferentes atributos
                 url = (
                     img.get('src') or 
@@ -212,12 +367,12 @@ class ProductExtractor:
         
         return ', '.join(image_urls) if image_urls else ""
     
-    def extract_product_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+    def extract_product_links(self, doc: HtmlNode, base_url: str) -> List[str]:
         """
         Extrae enlaces a páginas de productos individuales.
         
         Args:
-            soup: Objeto BeautifulSoup
+            doc: Documento parseado
             base_url: URL base del sitio
             
         Returns:
@@ -227,9 +382,8 @@ class ProductExtractor:
         
         # Intentar con selector específico de URLs de productos
         if 'url_producto' in self.selectors:
-            for selector in self.selectors['url_producto'].split(','):
-                selector = selector.strip()
-                links = soup.select(selector)
+            for selector in self._plan(doc).url_producto:
+                links = doc.select(selector.matcher)
                 
                 for link in links:
                     href = link.get('href')
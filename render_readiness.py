@@ -0,0 +1,142 @@
+"""
+Detección adaptativa de "página lista" para Playwright.
+Reemplaza las esperas fijas: termina cuando aparece un selector objetivo,
+cuando el DOM deja de cambiar o cuando vence el plazo, lo que ocurra primero.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+# Se ejecuta en la página: MutationObserver + timers, resuelve con el motivo
+_READY_JS = """
+async ({selectors, timeoutMs, quietMs}) => {
+    const start = performance.now();
+    const hasTarget = () => selectors.some(sel => {
+        try { return document.querySelector(sel) !== null; } catch (e) { return false; }
+    });
+    if (hasTarget()) {
+        return {reason: 'selector', elapsed: 0};
+    }
+    return await new Promise(resolve => {
+        let done = false;
+        let quietTimer = null;
+        let deadline = null;
+        let observer = null;
+        const finish = (reason) => {
+            if (done) return;
+            done = true;
+            if (observer) observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(deadline);
+            resolve({reason, elapsed: performance.now() - start});
+        };
+        const armQuiet = () => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish('dom_stable'), quietMs);
+        };
+        observer = new MutationObserver(() => {
+            if (hasTarget()) return finish('selector');
+            armQuiet();
+        });
+        observer.observe(document.documentElement || document, {
+            childList: true, subtree: true, characterData: true
+        });
+        armQuiet();
+        deadline = setTimeout(() => finish('deadline'), timeoutMs);
+    });
+}
+"""
+
+
+@dataclass
+class ReadinessResult:
+    """Resultado de una espera de renderizado."""
+    reason: str  # 'selector', 'dom_stable', 'deadline' o 'error'
+    elapsed_ms: float
+
+    @property
+    def ready(self) -> bool:
+        return self.reason in ('selector', 'dom_stable')
+
+
+class SettleStats:
+    """
+    Acumula cuánto tardó cada tipo de página en quedar lista.
+    Conteo, promedio y máximo son de toda la vida del proceso; el p95 se calcula
+    sobre las últimas `window` mediciones para que la memoria no crezca sin tope.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.window = max(1, window)
+        self._recent: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._reasons: Dict[str, Dict[str, int]] = {}
+
+    def record(self, label: str, result: ReadinessResult):
+        with self._lock:
+            self._recent.setdefault(label, deque(maxlen=self.window)).append(result.elapsed_ms)
+            totals = self._totals.setdefault(label, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            totals['count'] += 1
+            totals['sum'] += result.elapsed_ms
+            totals['max'] = max(totals['max'], result.elapsed_ms)
+            reasons = self._reasons.setdefault(label, {})
+            reasons[result.reason] = reasons.get(result.reason, 0) + 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """Promedio, p95 y máximo (ms) y conteo por motivo, por etiqueta."""
+        with self._lock:
+            summary = {}
+            for label, recent in self._recent.items():
+                ordered = sorted(recent)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                totals = self._totals[label]
+                summary[label] = {
+                    'count': int(totals['count']),
+                    'avg_ms': round(totals['sum'] / totals['count'], 1),
+                    'p95_ms': round(p95, 1),
+                    'max_ms': round(totals['max'], 1),
+                    'reasons': dict(self._reasons[label])
+                }
+            return summary
+
+
+settle_stats = SettleStats()
+
+
+def wait_for_ready(
+    page,
+    selectors: Optional[List[str]] = None,
+    timeout_ms: int = 5000,
+    quiet_ms: int = 500,
+    label: str = "page"
+) -> ReadinessResult:
+    """
+    Espera a que la página esté lista para leer el DOM.
+
+    Args:
+        page: Page de Playwright
+        selectors: Selectores CSS cuya aparición indica que el contenido cargó
+        timeout_ms: Plazo máximo de espera
+        quiet_ms: Ventana sin mutaciones para considerar el DOM estable
+        label: Etiqueta para las métricas de settle_stats
+
+    Returns:
+        ReadinessResult con el motivo y el tiempo real de espera
+    """
+    start = time.perf_counter()
+    try:
+        outcome = page.evaluate(_READY_JS, {
+            'selectors': list(selectors or []),
+            'timeoutMs': timeout_ms,
+            'quietMs': quiet_ms
+        })
+        result = ReadinessResult(outcome['reason'], round(outcome['elapsed'], 1))
+    except Exception:
+        # Navegación en curso o contexto destruido: no bloquear más allá de lo transcurrido
+        result = ReadinessResult('error', round((time.perf_counter() - start) * 1000, 1))
+    settle_stats.record(label, result)
+    return result
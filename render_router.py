@@ -0,0 +1,266 @@
+"""
+Router LIGHT vs HEAVY por dominio.
+Predice a partir del HTML inicial si la página necesita renderizado JS,
+recuerda la decisión por dominio/plataforma y mide su precisión.
+"""
+
+import atexit
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+LIGHT = 'light'
+HEAVY = 'heavy'
+
+# Plataformas que sirven el catálogo en el HTML vs. las que lo arman en el cliente
+PLATFORM_PRIORS = {
+    'shopify': LIGHT,
+    'woocommerce': LIGHT,
+    'tiendanube': LIGHT,
+    'mercadoshops': HEAVY,
+    'vtex': HEAVY,
+}
+
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+_STYLE_RE = re.compile(r'<style\b[^>]*>.*?</style\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+_SPA_SHELL_RE = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|__nuxt|___gatsby)["\'][^>]*>\s*</div>',
+    re.IGNORECASE
+)
+_NOSCRIPT_JS_RE = re.compile(r'<noscript[^>]*>[^<]*(?:enable|habilit|activ)[^<]*javascript', re.IGNORECASE)
+_NEXT_DATA_RE = re.compile(r'id=["\']__NEXT_DATA__["\']', re.IGNORECASE)
+_PRODUCT_HINT_RE = re.compile(r'class=["\'][^"\']*product', re.IGNORECASE)
+
+
+@dataclass
+class RenderDecision:
+    """Decisión de ruteo para una página."""
+    mode: str
+    confidence: float
+    reason: str
+    source: str  # 'learned' o 'predicted'
+    platform: Optional[str] = None  # plataforma de la ruta aprendida
+
+
+def visible_text_length(html: str) -> int:
+    """Largo aproximado del texto visible (sin scripts, estilos ni tags)."""
+    text = _STYLE_RE.sub(' ', _SCRIPT_RE.sub(' ', html))
+    return len(_SPACE_RE.sub(' ', _TAG_RE.sub(' ', text)).strip())
+
+
+class RenderRouter:
+    """Decide si una página se procesa con HTTP (LIGHT) o con Chromium (HEAVY)."""
+
+    def __init__(self, path: str = ".cache/render_routes.json", heavy_threshold: float = 0.5,
+                 save_interval: float = 5.0, verify_rate: float = 0.05):
+        """
+        Carga las decisiones aprendidas.
+
+        Args:
+            path: Archivo JSON donde se guardan rutas y métricas
+            heavy_threshold: Score a partir del cual se predice HEAVY
+            save_interval: Segundos mínimos entre escrituras del archivo (lo pendiente se guarda al salir)
+            verify_rate: Fracción de predicciones LIGHT exitosas que igual se renderizan para medir la precisión
+        """
+        self.path = path
+        self.heavy_threshold = heavy_threshold
+        self.save_interval = save_interval
+        self.verify_rate = verify_rate
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+        self._latest: Dict[str, str] = {}  # dominio -> clave de su ruta más reciente
+        self._stats = {'predictions': 0, 'verified': 0, 'correct': 0}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+        atexit.register(self.flush)
+
+    def lookup(self, url: str, platform: Optional[str] = None) -> Optional[RenderDecision]:
+        """
+        Busca una decisión aprendida para el dominio (y plataforma, si se conoce).
+
+        Returns:
+            RenderDecision aprendida o None
+        """
+        domain = self._domain(url)
+        key = self._key(domain, platform)
+        with self._lock:
+            route = self._routes.get(key)
+            if route is None and platform is None and domain in self._latest:
+                # Sin plataforma todavía: sirve la última ruta aprendida para el dominio
+                key = self._latest[domain]
+                route = self._routes.get(key)
+        if route is None:
+            return None
+        return RenderDecision(
+            route['mode'], 1.0, f"aprendido ({route['visits']} visitas)", 'learned',
+            platform=key.split('|', 1)[1] or None
+        )
+
+    def predict(self, html: str, platform: Optional[str] = None) -> RenderDecision:
+        """
+        Predice si el HTML inicial necesita renderizado.
+
+        Args:
+            html: HTML descargado por HTTP
+            platform: Plataforma detectada (opcional)
+
+        Returns:
+            RenderDecision predicha
+        """
+        size = max(len(html), 1)
+        text_len = visible_text_length(html)
+        script_bytes = sum(len(m) for m in _SCRIPT_RE.findall(html))
+        script_ratio = script_bytes / size
+
+        score = 0.0
+        reasons = []
+        if _SPA_SHELL_RE.search(html):
+            score += 0.45
+            reasons.append("shell SPA vacío")
+        if _NOSCRIPT_JS_RE.search(html):
+            score += 0.2
+            reasons.append("noscript pide JavaScript")
+        if text_len < 500:
+            score += 0.3
+            reasons.append(f"poco texto visible ({text_len})")
+        if script_ratio > 0.6:
+            score += 0.25
+            reasons.append(f"ratio script/HTML {script_ratio:.0%}")
+        if _NEXT_DATA_RE.search(html) and text_len >= 500:
+            # Next.js con SSR: el contenido ya viene en el HTML
+            score -= 0.3
+            reasons.append("__NEXT_DATA__ con SSR")
+        if _PRODUCT_HINT_RE.search(html):
+            score -= 0.15
+            reasons.append("grilla de productos en el HTML")
+
+        prior = PLATFORM_PRIORS.get(platform)
+        if prior == HEAVY:
+            score += 0.35
+            reasons.append(f"plataforma {platform} renderiza en cliente")
+        elif prior == LIGHT:
+            score -= 0.25
+            reasons.append(f"plataforma {platform} sirve HTML")
+
+        mode = HEAVY if score >= self.heavy_threshold else LIGHT
+        confidence = min(1.0, abs(score - self.heavy_threshold) + 0.5)
+        with self._lock:
+            self._stats['predictions'] += 1
+        return RenderDecision(mode, round(confidence, 2), ", ".join(reasons) or "HTML completo", 'predicted')
+
+    def should_verify(self) -> bool:
+        """Indica si esta predicción LIGHT entra en la muestra que se verifica renderizando."""
+        return random.random() < self.verify_rate
+
+    def record(self, url: str, platform: Optional[str], predicted_mode: Optional[str], actual_mode: str):
+        """
+        Guarda el modo verificado para el dominio y actualiza la precisión.
+
+        Args:
+            url: URL visitada
+            platform: Plataforma detectada
+            predicted_mode: Modo predicho (None si no fue una predicción o no se pudo verificar)
+            actual_mode: Modo que resultó necesario
+        """
+        domain = self._domain(url)
+        key = self._key(domain, platform)
+        with self._lock:
+            route = self._routes.get(key, {'visits': 0})
+            route.update({'mode': actual_mode, 'visits': route['visits'] + 1, 'updated_at': time.time()})
+            self._routes[key] = route
+            self._latest[domain] = key
+            if predicted_mode is not None:
+                self._stats['verified'] += 1
+                if predicted_mode == actual_mode:
+                    self._stats['correct'] += 1
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if due:
+            self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        """Métricas del router (la precisión solo cuenta predicciones verificadas)."""
+        with self._lock:
+            verified = self._stats['verified']
+            return {
+                **self._stats,
+                'accuracy': round(self._stats['correct'] / verified, 3) if verified else 0.0,
+                'learned_routes': len(self._routes)
+            }
+
+    def flush(self):
+        """Escribe las rutas pendientes (fuera del lock de consultas)."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({'routes': self._routes, 'stats': self._stats}, ensure_ascii=False, indent=2)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            try:
+                self._save(data)
+            except OSError:
+                # Escritura fallida: lo pendiente queda marcado y se reintenta en la próxima
+                with self._lock:
+                    self._dirty = True
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    @staticmethod
+    def _key(domain: str, platform: Optional[str]) -> str:
+        return f"{domain}|{platform or ''}"
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._routes = data.get('routes', {})
+            self._stats.update(data.get('stats', {}))
+        except (OSError, ValueError):
+            pass
+        for key, route in sorted(self._routes.items(), key=lambda item: item[1].get('updated_at', 0)):
+            self._latest[key.split('|', 1)[0]] = key
+
+    def _save(self, data: str):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+_router: Optional[RenderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_render_router(**router_kwargs) -> RenderRouter:
+    """
+    Obtiene el router compartido del proceso.
+
+    Args:
+        **router_kwargs: Opciones de RenderRouter; solo aplican al crearlo
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = RenderRouter(**router_kwargs)
+        return _router
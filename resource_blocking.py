@@ -0,0 +1,144 @@
+"""
+Bloqueo de recursos en Playwright para los scrapers que solo leen el DOM.
+Aborta imágenes, fuentes, video y trackers conocidos, con allowlist por scraper,
+y reporta cuántos requests (y bytes estimados) se ahorraron por trabajo.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from app_config import get_config
+
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+
+DEFAULT_BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'connect.facebook.net',
+    'analytics.tiktok.com',
+    'hotjar.com',
+    'clarity.ms',
+    'segment.io',
+    'cdn.segment.com',
+    'criteo.com',
+    'taboola.com',
+    'outbrain.com',
+    'mercadolibre.com/tracks',
+    'newrelic.com',
+    'nr-data.net',
+)
+
+# Tamaño promedio de cada tipo de recurso (bytes) para estimar el ahorro;
+# un request abortado nunca informa su tamaño real.
+AVERAGE_RESOURCE_BYTES = {
+    'image': 45_000,
+    'media': 500_000,
+    'font': 35_000,
+    'stylesheet': 30_000,
+    'script': 40_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+
+@dataclass
+class BlockingPolicy:
+    """Qué tipos de recurso y hosts se bloquean, y qué se permite siempre."""
+    blocked_types: Set[str] = field(default_factory=lambda: set(DEFAULT_BLOCKED_TYPES))
+    blocked_hosts: Tuple[str, ...] = DEFAULT_BLOCKED_HOSTS
+    allow_types: Set[str] = field(default_factory=set)
+    allow_hosts: Tuple[str, ...] = ()
+    enabled: bool = True
+
+    @classmethod
+    def for_scraper(cls, scraper: str, config: Optional[Dict] = None) -> 'BlockingPolicy':
+        """
+        Construye la política de un scraper a partir de la sección resource_blocking.
+
+        Args:
+            scraper: Nombre del scraper (business_scraper, google_maps, social, ...)
+            config: Configuración completa (dict de config.yaml); None usa la configuración compartida
+
+        Returns:
+            BlockingPolicy con los overrides del scraper aplicados
+        """
+        if config is None:
+            config = get_config().data
+        section = config.get('resource_blocking', {}) or {}
+        overrides = (section.get('scrapers') or {}).get(scraper, {}) or {}
+        return cls(
+            blocked_types=set(section.get('blocked_types', DEFAULT_BLOCKED_TYPES)),
+            blocked_hosts=tuple(section.get('blocked_hosts', DEFAULT_BLOCKED_HOSTS)),
+            allow_types=set(overrides.get('allow_types', [])),
+            allow_hosts=tuple(overrides.get('allow_hosts', [])),
+            enabled=overrides.get('enabled', section.get('enabled', True))
+        )
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Indica si un request debe abortarse."""
+        if not self.enabled:
+            return False
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if _matches_host(host, parsed.path, self.allow_hosts):
+            return False
+        if _matches_host(host, parsed.path, self.blocked_hosts):
+            return True
+        return resource_type in self.blocked_types and resource_type not in self.allow_types
+
+
+def _matches_host(host: str, path: str, patterns: Tuple[str, ...]) -> bool:
+    """Compara host (y prefijo de path opcional) contra patrones tipo 'dominio.com/ruta'."""
+    for pattern in patterns:
+        pattern_host, _, pattern_path = pattern.partition('/')
+        if host == pattern_host or host.endswith('.' + pattern_host):
+            if not pattern_path or path.lstrip('/').startswith(pattern_path):
+                return True
+    return False
+
+
+class ResourceBlocker:
+    """Instala la política en un BrowserContext y cuenta lo bloqueado."""
+
+    def __init__(self, policy: BlockingPolicy):
+        self.policy = policy
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.blocked_by_type: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+
+    def install(self, context):
+        """
+        Registra el handler de intercepción en el contexto.
+
+        Args:
+            context: BrowserContext de Playwright
+        """
+        if self.policy.enabled:
+            context.route("**/*", self._handle)
+
+    def _handle(self, route, request):
+        resource_type = request.resource_type
+        if self.policy.should_block(resource_type, request.url):
+            self.blocked_requests += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.estimated_bytes_saved += AVERAGE_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES)
+            route.abort()
+        else:
+            self.allowed_requests += 1
+            route.continue_()
+
+    def report(self) -> Dict:
+        """Resumen del trabajo: requests bloqueados y bytes ahorrados (estimados)."""
+        return {
+            'blocked_requests': self.blocked_requests,
+            'allowed_requests': self.allowed_requests,
+            'blocked_by_type': dict(self.blocked_by_type),
+            'estimated_bytes_saved': self.estimated_bytes_saved
+        }
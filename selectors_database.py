@@ -4,34 +4,54 @@ Detecta automáticamente la plataforma y aplica los selectores apropiados.
 """
 
 import re
-from typing import Dict, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from app_config import get_config
+
+_HEAD_END_RE = re.compile(r'</head\s*>|<body[\s>]', re.IGNORECASE)
+# Tags del body donde la plataforma deja sus firmas (recursos, generator, clases de layout)
+_SIGNATURE_TAG_RE = re.compile(
+    r'<(?:script|link|meta|img|source|body|form|div|section)\b[^>]*>', re.IGNORECASE
+)
 
 
 class SelectorsDatabase:
     """Gestiona selectores CSS para diferentes plataformas de e-commerce."""
     
+    # Firmas por plataforma con su peso (qué tan concluyente es encontrarla).
+    # Los nombres sueltos ('woocommerce', 'vtex.com') pesan poco: aparecen en blogs y textos.
+    # En minúsculas: se comparan contra el HTML pasado a minúsculas.
     PLATFORM_SIGNATURES = {
         'shopify': [
-            r'cdn\.shopify\.com',
-            r'myshopify\.com',
-            r'Shopify\.theme',
+            (r'cdn\.shopify\.com', 0.9),
+            (r'myshopify\.com', 0.8),
+            (r'shopify\.theme', 0.9),
+            (r'shopify-section', 0.6),
         ],
         'woocommerce': [
-            r'woocommerce',
-            r'wp-content/plugins/woocommerce',
+            (r'wp-content/plugins/woocommerce', 0.9),
+            (r'content=["\']woocommerce \d', 0.9),
+            (r'wc_add_to_cart_params', 0.8),
+            (r'woocommerce', 0.35),
         ],
         'tiendanube': [
-            r'tiendanube\.com',
-            r'nube\.com\.ar',
+            (r'd26lpennugtm8s\.cloudfront\.net', 0.9),
+            (r'tiendanube\.com', 0.8),
+            (r'nube\.com\.ar', 0.5),
         ],
         'mercadoshops': [
-            r'mercadoshops\.com',
+            (r'mercadoshops\.com', 0.9),
         ],
         'vtex': [
-            r'vteximg\.com\.br',
-            r'vtex\.com',
+            (r'vteximg\.com\.br', 0.9),
+            (r'vtexassets\.com', 0.9),
+            (r'vtex\.com', 0.5),
         ]
     }
+    # Score mínimo para dar una plataforma por detectada
+    MIN_PLATFORM_SCORE = 0.5
     
     PLATFORM_SELECTORS = {
         'shopify': {
@@ -76,46 +96,193 @@ class SelectorsDatabase:
         }
     }
     
+    GENERIC_SELECTORS = {
+        'producto': '.product, .product-item, .item, [data-product]',
+        'nombre': 'h2, h3, .product-title, .product-name, .item-name',
+        'precio': '.price, .product-price, .precio, [data-price]',
+        'descripcion': '.description, .product-description, p',
+        'imagen': 'img',
+        'url_producto': 'a'
+    }
+    
+    # Selectores combinados (config.yaml + built-in) por (archivo, versión de config, plataforma)
+    _merged_cache: Dict[Tuple[str, int, Optional[str]], Dict[str, str]] = {}
+    _merged_lock = threading.Lock()  # los workers de un batch la leen y escriben a la vez
+    
     @staticmethod
-    def detect_platform(html_content: str) -> Optional[str]:
+    def detect_platform(html_content: str, min_score: Optional[float] = None) -> Optional[str]:
         """
         Detecta la plataforma de e-commerce basándose en el contenido HTML.
         
         Args:
             html_content: Contenido HTML de la página
+            min_score: Score mínimo (None = MIN_PLATFORM_SCORE)
+            
+        Returns:
+            Plataforma con mayor score, o None si ninguna alcanza el mínimo
+        """
+        return SelectorsDatabase.best_platform(SelectorsDatabase.platform_scores(html_content), min_score)
+    
+    @staticmethod
+    def best_platform(scores: Dict[str, float], min_score: Optional[float] = None) -> Optional[str]:
+        """
+        Plataforma con mayor score (en empate, la primera de PLATFORM_SIGNATURES).
+        
+        Args:
+            scores: Resultado de platform_scores / score_signatures
+            min_score: Score mínimo (None = MIN_PLATFORM_SCORE)
+        """
+        threshold = SelectorsDatabase.MIN_PLATFORM_SCORE if min_score is None else min_score
+        platform = max(scores, key=scores.get, default=None)
+        return platform if platform and scores[platform] >= threshold else None
+    
+    @staticmethod
+    def platform_scores(html_content: str) -> Dict[str, float]:
+        """
+        Score de 0 a 1 para cada plataforma, con una sola pasada por el documento.
+        
+        Args:
+            html_content: Contenido HTML de la página
+            
+        Returns:
+            {plataforma: score} para todas las plataformas conocidas
+        """
+        return SelectorsDatabase.score_signatures(SelectorsDatabase.match_signatures(html_content))
+    
+    @staticmethod
+    def match_signatures(text: str, matches: Optional[Set[int]] = None, in_head: bool = False) -> Set[int]:
+        """
+        Busca todas las firmas a la vez (una alternancia compilada) solo donde las pone la
+        plataforma: el <head> completo y, en el body, los tags de apertura que cargan recursos
+        o marcan el layout (script/link/img src y href, meta generator, clases de body/div).
+        El texto visible queda afuera: un artículo que menciona 'WooCommerce' no es una tienda.
+        
+        Args:
+            text: HTML (o un fragmento, al leer en streaming)
+            matches: Hallazgos previos a acumular
+            in_head: El texto empieza dentro del <head> (chunks en streaming); sin cierre
+                     de head a la vista, todo el texto cuenta como head
+            
+        Returns:
+            Índices de las firmas encontradas (en el orden de _signature_table)
+        """
+        matches = set() if matches is None else matches
+        head_end = _HEAD_END_RE.search(text)
+        head_end = head_end.start() if head_end else (len(text) if in_head else 0)
+        regions = [text[:head_end]]
+        regions.extend(tag.group(0) for tag in _SIGNATURE_TAG_RE.finditer(text, head_end))
+        # Sin IGNORECASE ni grupos la alternancia conserva el prefiltro de primer carácter
+        # del motor de re (varias veces más rápido); cada hallazgo se resuelve después
+        seen: Dict[str, Optional[int]] = {}
+        for hit in _signature_regex().findall('\n'.join(regions).lower()):
+            if hit not in seen:
+                seen[hit] = next(
+                    (i for i, pattern in enumerate(_signature_patterns()) if pattern.fullmatch(hit)), None
+                )
+                if seen[hit] is not None:
+                    matches.add(seen[hit])
+        return matches
+    
+    @staticmethod
+    def head_closed(text: str) -> bool:
+        """Indica si el texto contiene el cierre del <head> (o el inicio del <body>)."""
+        return _HEAD_END_RE.search(text) is not None
+    
+    @staticmethod
+    def score_signatures(matches: Set[int]) -> Dict[str, float]:
+        """
+        Combina los hallazgos por plataforma como evidencia independiente:
+        score = 1 - Π(1 - peso).
+        
+        Args:
+            matches: Resultado de match_signatures
             
         Returns:
-            Nombre de la plataforma detectada o None
+            {plataforma: score} para todas las plataformas conocidas
         """
-        for platform, signatures in SelectorsDatabase.PLATFORM_SIGNATURES.items():
-            for signature in signatures:
-                if re.search(signature, html_content, re.IGNORECASE):
-                    return platform
-        return None
+        misses = {platform: 1.0 for platform in SelectorsDatabase.PLATFORM_SIGNATURES}
+        table = _signature_table()
+        for index in matches:
+            platform, weight = table[index]
+            misses[platform] *= 1.0 - weight
+        return {platform: round(1.0 - miss, 3) for platform, miss in misses.items()}
     
     @staticmethod
-    def get_selectors(platform: Optional[str] = None) -> Dict[str, str]:
+    def get_selectors(platform: Optional[str] = None, detected: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         Obtiene los selectores CSS para una plataforma específica.
+        Los selectores de config.yaml (platforms / default_selectors) tienen
+        prioridad sobre los incorporados y se releen si el archivo cambia.
         
         Args:
             platform: Nombre de la plataforma (opcional)
+            detected: Selectores detectados para el sitio (grid_detector); van
+                      antes que todos los demás
             
         Returns:
             Diccionario con selectores CSS
         """
+        if detected:
+            base = SelectorsDatabase.get_selectors(platform)
+            return {
+                field: SelectorsDatabase._merge_selector_lists(detected.get(field, ''), selector)
+                for field, selector in base.items()
+            }
+        config = get_config()
+        cache_key = (config.path, config.version, platform)
+        with SelectorsDatabase._merged_lock:
+            cached = SelectorsDatabase._merged_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         if platform and platform in SelectorsDatabase.PLATFORM_SELECTORS:
-            return SelectorsDatabase.PLATFORM_SELECTORS[platform]
+            builtin = SelectorsDatabase.PLATFORM_SELECTORS[platform]
+            custom = config.section('platforms').get(platform) or {}
+        else:
+            # Selectores genéricos por defecto
+            builtin = SelectorsDatabase.GENERIC_SELECTORS
+            custom = {
+                field: ', '.join(selectors)
+                for field, selectors in config.section('default_selectors').items()
+            }
         
-        # Selectores genéricos por defecto
-        return {
-            'producto': '.product, .product-item, .item, [data-product]',
-            'nombre': 'h2, h3, .product-title, .product-name, .item-name',
-            'precio': '.price, .product-price, .precio, [data-price]',
-            'descripcion': '.description, .product-description, p',
-            'imagen': 'img',
-            'url_producto': 'a'
+        merged = {
+            field: SelectorsDatabase._merge_selector_lists(custom.get(field, ''), selector)
+            for field, selector in builtin.items()
         }
+        with SelectorsDatabase._merged_lock:
+            # Una versión nueva de la configuración invalida todo lo anterior
+            if any(key[:2] != cache_key[:2] for key in SelectorsDatabase._merged_cache):
+                SelectorsDatabase._merged_cache.clear()
+            SelectorsDatabase._merged_cache[cache_key] = merged
+        return merged
+    
+    @staticmethod
+    def _merge_selector_lists(first: str, second: str) -> str:
+        """Une dos listas de selectores separados por coma (primero tiene prioridad) sin duplicados."""
+        merged = []
+        for selector in f"{first},{second}".split(','):
+            selector = selector.strip()
+            if selector and selector not in merged:
+                merged.append(selector)
+        return ', '.join(merged)
+    
+    @staticmethod
+    def get_product_container_selectors() -> List[str]:
+        """
+        Selectores de contenedor de producto de todas las plataformas conocidas.
+        Su aparición indica que la grilla del catálogo ya se renderizó.
+        
+        Returns:
+            Lista de selectores CSS individuales sin duplicados
+        """
+        selectors = []
+        for platform in SelectorsDatabase.PLATFORM_SELECTORS:
+            for selector in SelectorsDatabase.get_selectors(platform)['producto'].split(','):
+                selector = selector.strip()
+                if selector and selector not in selectors:
+                    selectors.append(selector)
+        return selectors
     
     @staticmethod
     def get_business_selectors() -> Dict[str, str]:
@@ -137,3 +304,29 @@ class SelectorsDatabase:
             'contact': 'a[href*="contacto"], a[href*="contact"], #contact, .contact',
             'faq': 'a[href*="preguntas"], a[href*="faq"], #faq, .faq'
         }
+
+
+@lru_cache(maxsize=1)
+def _signature_table() -> List[Tuple[str, float]]:
+    """(plataforma, peso) de cada firma, en el orden de PLATFORM_SIGNATURES."""
+    return [
+        (platform, weight)
+        for platform, signatures in SelectorsDatabase.PLATFORM_SIGNATURES.items()
+        for _, weight in signatures
+    ]
+
+
+@lru_cache(maxsize=1)
+def _signature_patterns() -> List['re.Pattern']:
+    """Cada firma compilada por separado, en el orden de _signature_table."""
+    return [
+        re.compile(pattern)
+        for signatures in SelectorsDatabase.PLATFORM_SIGNATURES.values()
+        for pattern, _ in signatures
+    ]
+
+
+@lru_cache(maxsize=1)
+def _signature_regex() -> 're.Pattern':
+    """Todas las firmas en una sola alternancia, para recorrer el texto una vez."""
+    return re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in _signature_patterns()))
@@ -0,0 +1,339 @@
+"""
+Crawler acotado de un sitio (modo deep).
+Frontera con prioridad (categorías, productos, nosotros, contacto y políticas primero),
+normalización de URLs, robots.txt, cortesía por host, descargas concurrentes
+y presupuestos de páginas y tiempo.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+from browser_pool import DEFAULT_USER_AGENT
+from html_parser import parse_html
+from http_fetcher import HttpFetcher
+from sitemap_discovery import discover_product_urls
+
+# Tipo de página -> prioridad (menor = se visita antes)
+PAGE_PRIORITIES = {
+    'category': 0,
+    'product': 1,
+    'about': 2,
+    'contact': 2,
+    'policy': 3,
+    'other': 5,
+}
+
+# Con fichas descubiertas en el sitemap los listados dejan de hacer falta para encontrar
+# productos: primero las pocas páginas de contexto, después las fichas, los listados al final
+SITEMAP_PAGE_PRIORITIES = {
+    **PAGE_PRIORITIES,
+    'about': 0,
+    'contact': 0,
+    'policy': 1,
+    'sitemap_product': 2,
+    'product': 2,
+    'category': 4,
+}
+
+_PAGE_PATTERNS = (
+    ('product', re.compile(r'/products?/|/productos?/|/p$|/item/|/articulo/', re.IGNORECASE)),
+    ('category', re.compile(
+        r'/collections?/|/categor(?:y|ia|ias|ies)/|/product-category/|/catalog(?:o)?(?:/|$)|/tienda(?:/|$)|/shop(?:/|$)',
+        re.IGNORECASE
+    )),
+    ('about', re.compile(r'nosotros|about|quienes-somos|historia|empresa', re.IGNORECASE)),
+    ('contact', re.compile(r'contact', re.IGNORECASE)),
+    ('policy', re.compile(
+        r'envio|shipping|devoluci|return|refund|terminos|terms|politica|policy|privacidad|faq|preguntas',
+        re.IGNORECASE
+    )),
+)
+
+# Enlaces que nunca aportan catálogo ni contexto
+_SKIP_PATH_RE = re.compile(
+    r'/(?:cart|carrito|checkout|account|cuenta|login|register|wp-admin|wp-login|search|buscar)(?:/|$)',
+    re.IGNORECASE
+)
+_ASSET_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.pdf', '.zip', '.rar',
+    '.css', '.js', '.json', '.xml', '.mp4', '.mp3', '.woff', '.woff2', '.ttf'
+)
+_TRACKING_PARAMS = ('fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', '_pos', '_sid', '_ss', 'variant')
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normaliza una URL para deduplicar: resuelve relativas, quita fragmento,
+    parámetros de tracking y barra final, y ordena la query.
+
+    Returns:
+        URL normalizada o None si no es http(s)
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.netloc:
+        return None
+    netloc = parsed.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    path = re.sub(r'/{2,}', '/', parsed.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
+
+def classify_page(url: str) -> str:
+    """Tipo de página según su URL: category, product, about, contact, policy u other."""
+    path = urlparse(url).path
+    for kind, pattern in _PAGE_PATTERNS:
+        if pattern.search(path):
+            return kind
+    return 'other'
+
+
+def site_key(url: str) -> str:
+    """Host sin www, para tratar www.tienda.com y tienda.com como el mismo sitio."""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+@dataclass
+class CrawledPage:
+    """Página descargada por el crawler."""
+    url: str
+    kind: str
+    depth: int
+    html: str
+
+
+@dataclass
+class CrawlResult:
+    """Resultado del rastreo."""
+    pages: List[CrawledPage] = field(default_factory=list)
+    skipped_by_robots: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    stopped_by: str = 'frontier'  # 'frontier', 'max_pages' o 'max_seconds'
+    sitemaps: List[str] = field(default_factory=list)
+    sitemaps_read: List[str] = field(default_factory=list)
+    product_urls: List[str] = field(default_factory=list)
+
+
+class SiteCrawler:
+    """Rastrea un sitio a partir de su home con presupuestos fijos."""
+
+    def __init__(
+        self,
+        fetcher: HttpFetcher,
+        max_pages: int = 25,
+        max_seconds: float = 60.0,
+        concurrency: int = 4,
+        per_host_delay: float = 0.5,
+        max_depth: int = 3,
+        respect_robots: bool = True,
+        use_sitemaps: bool = True,
+        sitemap_max_urls: int = 500,
+        user_agent: str = DEFAULT_USER_AGENT,
+        parser: Optional[str] = None
+    ):
+        """
+        Configura el crawler.
+
+        Args:
+            fetcher: Fetcher HTTP compartido (el rastreo corre en su event loop)
+            max_pages: Páginas máximas a descargar (sin contar la home)
+            max_seconds: Tiempo máximo de rastreo
+            concurrency: Descargas simultáneas
+            per_host_delay: Segundos mínimos entre requests al mismo host
+            max_depth: Profundidad máxima en clics desde la home
+            respect_robots: Respetar Disallow y Crawl-delay de robots.txt
+            use_sitemaps: Descubrir fichas de producto en los sitemaps antes de rastrear
+            sitemap_max_urls: URLs de producto máximas a tomar de los sitemaps
+            user_agent: User-Agent con el que se evalúa robots.txt
+            parser: Backend de html_parser para el HTML de la home
+        """
+        self.fetcher = fetcher
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.concurrency = max(1, concurrency)
+        self.per_host_delay = per_host_delay
+        self.max_depth = max_depth
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.sitemap_max_urls = sitemap_max_urls
+        self.user_agent = user_agent
+        self.parser = parser
+
+    def crawl_sync(
+        self,
+        start_url: str,
+        start_html: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> CrawlResult:
+        """Versión bloqueante de crawl()."""
+        return self.fetcher.run(self.crawl(start_url, start_html, platform))
+
+    async def crawl(
+        self,
+        start_url: str,
+        start_html: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> CrawlResult:
+        """
+        Rastrea el sitio de start_url.
+
+        Args:
+            start_url: Home del sitio
+            start_html: HTML de la home si ya se descargó (no se vuelve a pedir)
+            platform: Plataforma detectada (para reconocer URLs de producto en el sitemap)
+
+        Returns:
+            CrawlResult con las páginas descargadas (sin la home)
+        """
+        started = time.monotonic()
+        deadline = started + self.max_seconds
+        result = CrawlResult()
+        start = normalize_url(start_url)
+        if start is None:
+            return result
+        site = site_key(start)
+
+        robots = await self._load_robots(start) if self.respect_robots else None
+        if robots is not None:
+            result.sitemaps = list(robots.site_maps() or [])
+            crawl_delay = robots.crawl_delay(self.user_agent)
+            delay = max(self.per_host_delay, float(crawl_delay or 0))
+        else:
+            delay = self.per_host_delay
+
+        frontier: List[Tuple[int, int, int, str]] = []
+        seen = {start}
+        counter = itertools.count()
+        priorities = PAGE_PRIORITIES
+
+        def enqueue(links: List[str], base: str, depth: int, kind: Optional[str] = None):
+            if depth > self.max_depth:
+                return
+            for href in links:
+                url = normalize_url(href, base)
+                if url is None or url in seen or site_key(url) != site:
+                    continue
+                path = urlparse(url).path.lower()
+                if path.endswith(_ASSET_EXTENSIONS) or _SKIP_PATH_RE.search(path):
+                    continue
+                seen.add(url)
+                priority = priorities[kind or classify_page(url)]
+                heapq.heappush(frontier, (priority, depth, next(counter), url))
+
+        if self.use_sitemaps:
+            # Unas pocas descargas de XML reemplazan recorrer listados para encontrar fichas
+            discovery = await discover_product_urls(
+                self.fetcher, start, result.sitemaps, platform, max_urls=self.sitemap_max_urls
+            )
+            result.sitemaps_read = discovery.sitemaps_read
+            result.product_urls = discovery.product_urls
+            if discovery.product_urls:
+                priorities = SITEMAP_PAGE_PRIORITIES
+            enqueue(discovery.product_urls, start, 1, kind='sitemap_product')
+
+        if start_html is not None:
+            doc = parse_html(start_html, self.parser)
+            enqueue([a.get('href') for a in doc.select('a[href]')], start, 1)
+        else:
+            heapq.heappush(frontier, (0, 0, next(counter), start))
+
+        changed = asyncio.Condition()
+        in_flight = 0
+        politeness = {'lock': asyncio.Lock(), 'last': 0.0}
+
+        async def polite_wait():
+            async with politeness['lock']:
+                wait = politeness['last'] + delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                politeness['last'] = time.monotonic()
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    await changed.wait_for(lambda: frontier or in_flight == 0)
+                    if time.monotonic() >= deadline:
+                        result.stopped_by = 'max_seconds'
+                        changed.notify_all()
+                        return
+                    if len(result.pages) + in_flight >= self.max_pages:
+                        if frontier:
+                            result.stopped_by = 'max_pages'
+                        changed.notify_all()
+                        return
+                    if not frontier:
+                        # Nada pendiente y nadie descargando: fin del rastreo
+                        changed.notify_all()
+                        return
+                    _, depth, _, url = heapq.heappop(frontier)
+                    if robots is not None and not robots.can_fetch(self.user_agent, url):
+                        result.skipped_by_robots += 1
+                        continue
+                    in_flight += 1
+
+                page, links = None, []
+                try:
+                    await polite_wait()
+                    remaining = max(0.1, deadline - time.monotonic())
+                    page, links = await asyncio.wait_for(self._fetch_page(url, depth, site), remaining)
+                except Exception:
+                    result.errors += 1
+
+                async with changed:
+                    in_flight -= 1
+                    if page is not None and len(result.pages) < self.max_pages:
+                        result.pages.append(page)
+                        enqueue(links, page.url, depth + 1)
+                    changed.notify_all()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        result.elapsed = round(time.monotonic() - started, 2)
+        return result
+
+    async def _fetch_page(self, url: str, depth: int, site: str) -> Tuple[Optional[CrawledPage], List[str]]:
+        """Descarga una página HTML y devuelve sus enlaces (extraídos durante el streaming)."""
+        response = await self.fetcher.fetch_stream(url, stop_when=lambda sniffer: sniffer.signals.is_binary)
+        signals = response.extra.get('signals')
+        content_type = response.headers.get('content-type', 'text/html').lower()
+        if (
+            response.status_code != 200
+            or (signals is not None and signals.is_binary)
+            or 'html' not in content_type
+            or site_key(response.url) != site
+        ):
+            return None, []
+        final_url = normalize_url(response.url) or url
+        page = CrawledPage(url=final_url, kind=classify_page(final_url), depth=depth, html=response.text)
+        return page, list(signals.anchors) if signals is not None else []
+
+    async def _load_robots(self, start: str) -> Optional[RobotFileParser]:
+        """Descarga y parsea robots.txt (si no existe o falla, se permite todo)."""
+        parsed = urlparse(start)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        robots = RobotFileParser(robots_url)
+        try:
+            response = await self.fetcher.fetch(robots_url)
+            lines = response.text.splitlines() if response.status_code == 200 else []
+        except Exception:
+            lines = []
+        robots.parse(lines)
+        return robots
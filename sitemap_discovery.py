@@ -0,0 +1,186 @@
+"""
+Descubrimiento de URLs de producto a partir de los sitemaps del sitio.
+Lee las entradas Sitemap de robots.txt (o /sitemap.xml), recorre índices
+y sitemaps comprimidos con un parser XML en streaming y clasifica las URLs
+de producto según la plataforma.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from lxml import etree
+
+from http_fetcher import HttpFetcher
+
+# Rutas de producto por plataforma (None = cualquiera de las conocidas)
+PRODUCT_URL_PATTERNS = {
+    'shopify': re.compile(r'/products/[^/]+/?$', re.IGNORECASE),
+    'woocommerce': re.compile(r'/product/[^/]+/?$', re.IGNORECASE),
+    'tiendanube': re.compile(r'/productos/[^/]+/?$', re.IGNORECASE),
+    'vtex': re.compile(r'/[^/]+/p/?$', re.IGNORECASE),
+    'mercadoshops': re.compile(r'/(?:ML[A-Z]-?\d+|p/MLA\d+)', re.IGNORECASE),
+}
+_ANY_PRODUCT_URL = re.compile(
+    '|'.join(f'(?:{pattern.pattern})' for pattern in PRODUCT_URL_PATTERNS.values()),
+    re.IGNORECASE
+)
+
+# Ubicaciones habituales cuando robots.txt no declara sitemaps
+DEFAULT_SITEMAP_PATHS = ('/sitemap.xml', '/sitemap_index.xml', '/product-sitemap.xml')
+
+# Tope de descarga por sitemap (el estándar admite hasta 50 MB sin comprimir)
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def is_product_url(url: str, platform: Optional[str] = None) -> bool:
+    """Indica si la URL es de una ficha de producto para la plataforma dada."""
+    path = urlparse(url).path
+    pattern = PRODUCT_URL_PATTERNS.get(platform, _ANY_PRODUCT_URL)
+    return bool(pattern.search(path))
+
+
+def _sitemap_priority(url: str) -> int:
+    """Los sitemaps de productos primero; blog, imágenes y páginas al final."""
+    name = url.lower()
+    if 'product' in name or 'producto' in name:
+        return 0
+    if any(word in name for word in ('blog', 'post', 'image', 'video', 'page', 'author', 'tag')):
+        return 2
+    return 1
+
+
+class SitemapStreamParser:
+    """Parser incremental de un sitemap (urlset o sitemapindex, con o sin gzip)."""
+
+    def __init__(self):
+        self.urls: List[str] = []
+        self.sitemaps: List[str] = []
+        self._parser = etree.XMLPullParser(events=('end',), recover=True, resolve_entities=False)
+        self._decompressor = None
+        self._started = False
+
+    def feed(self, chunk: bytes):
+        """Procesa un chunk crudo de la respuesta."""
+        if not self._started:
+            self._started = True
+            if chunk.startswith(_GZIP_MAGIC):
+                # .xml.gz servido sin Content-Encoding: se descomprime acá
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        if chunk:
+            self._parser.feed(chunk)
+            self._read_events()
+
+    def close(self):
+        """Termina el parseo con lo recibido."""
+        try:
+            if self._decompressor is not None:
+                self._parser.feed(self._decompressor.flush())
+            self._parser.close()
+        except (etree.XMLSyntaxError, zlib.error):
+            pass
+        self._read_events()
+
+    def _read_events(self):
+        for _, el in self._parser.read_events():
+            name = etree.QName(el).localname if isinstance(el.tag, str) else ''
+            if name in ('url', 'sitemap'):
+                loc = next((c.text for c in el if isinstance(c.tag, str) and etree.QName(c).localname == 'loc'), None)
+                if loc and loc.strip():
+                    (self.urls if name == 'url' else self.sitemaps).append(loc.strip())
+                # Liberar memoria: el árbol no crece con el tamaño del sitemap
+                el.clear()
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+
+@dataclass
+class SitemapDiscovery:
+    """URLs de producto encontradas en los sitemaps."""
+    product_urls: List[str] = field(default_factory=list)
+    sitemaps_read: List[str] = field(default_factory=list)
+    urls_seen: int = 0
+
+
+async def discover_product_urls(
+    fetcher: HttpFetcher,
+    site_url: str,
+    sitemaps: Optional[List[str]] = None,
+    platform: Optional[str] = None,
+    max_urls: int = 500,
+    max_sitemaps: int = 10
+) -> SitemapDiscovery:
+    """
+    Recorre los sitemaps del sitio y junta URLs de producto.
+    Debe ejecutarse en el loop del fetcher (fetcher.run o desde otra corrutina suya).
+
+    Args:
+        fetcher: Fetcher HTTP compartido
+        site_url: URL del sitio (para resolver /sitemap.xml)
+        sitemaps: Sitemaps declarados en robots.txt (None o vacío = ubicaciones habituales)
+        platform: Plataforma detectada, para clasificar las URLs de producto
+        max_urls: URLs de producto máximas a devolver
+        max_sitemaps: Sitemaps máximos a descargar (índices incluidos)
+
+    Returns:
+        SitemapDiscovery con las URLs de producto en orden de aparición
+    """
+    parsed = urlparse(site_url)
+    root = f"{parsed.scheme}://{parsed.netloc}"
+    default_locations = tuple(root + path for path in DEFAULT_SITEMAP_PATHS)
+    pending = list(sitemaps or default_locations)
+    discovery = SitemapDiscovery()
+    seen_sitemaps = set()
+    seen_products = set()
+
+    while pending and len(discovery.sitemaps_read) < max_sitemaps and len(discovery.product_urls) < max_urls:
+        pending.sort(key=_sitemap_priority)
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen_sitemaps:
+            continue
+        seen_sitemaps.add(sitemap_url)
+
+        parser = SitemapStreamParser()
+        found: List[str] = []
+        checked = 0
+
+        def collect() -> bool:
+            nonlocal checked
+            for url in parser.urls[checked:]:
+                if url not in seen_products and is_product_url(url, platform):
+                    seen_products.add(url)
+                    found.append(url)
+            checked = len(parser.urls)
+            return len(discovery.product_urls) + len(found) >= max_urls
+
+        def consume(chunk: bytes) -> bool:
+            parser.feed(chunk)
+            # Con suficientes productos no hace falta leer el resto del archivo
+            return collect()
+
+        try:
+            response = await fetcher.stream_into(sitemap_url, consume, max_bytes=MAX_SITEMAP_BYTES)
+        except Exception:
+            continue
+        if response.status_code != 200:
+            continue
+        parser.close()
+        collect()
+
+        discovery.sitemaps_read.append(sitemap_url)
+        discovery.urls_seen += len(parser.urls)
+        discovery.product_urls.extend(found[:max_urls - len(discovery.product_urls)])
+        pending.extend(s for s in parser.sitemaps if s not in seen_sitemaps)
+        if not sitemaps:
+            # Ubicaciones por defecto: alcanza con la primera que exista
+            pending = [s for s in pending if s not in default_locations]
+
+    return discovery
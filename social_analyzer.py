@@ -5,9 +5,13 @@ Extrae métricas públicas de Instagram y Facebook.
 
 import re
 from typing import Dict, Optional
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import Page
 from urllib.parse import urlparse
 
+from browser_pool import get_browser_workers
+from render_readiness import wait_for_ready
+from resource_blocking import BlockingPolicy, ResourceBlocker
+
 
 class SocialAnalyzer:
     """Analiza la presencia digital de un negocio en redes sociales."""
@@ -63,16 +67,18 @@ class SocialAnalyzer:
         if not url.startswith("http"):
             url = "https://www.instagram.com/" + url.replace("@", "")
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            )
+        blocker = ResourceBlocker(BlockingPolicy.for_scraper('social'))
+        def browse(context):
+            """Perfil de Instagram en un hilo dueño de Chromium."""
+            blocker.install(context)
             page = context.new_page()
             
             try:
-                page.goto(url, wait_until="networkidle", timeout=self.timeout)
-                page.wait_for_timeout(2000)
+                page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+                data["settle_ms"] = wait_for_ready(
+                    page, ['header section', 'article', '[role="tablist"]'],
+                    timeout_ms=8000, label="instagram"
+                ).elapsed_ms
                 
                 # Verificar si el perfil existe y es público
                 if self._is_instagram_valid(page):
@@ -94,10 +100,12 @@ class SocialAnalyzer:
             except Exception as e:
                 data["status"] = "error"
                 data["error"] = str(e)
-            
-            finally:
-                browser.close()
         
+        get_browser_workers(headless=self.headless).run(
+            browse, user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        )
+        
+        data["resource_blocking"] = blocker.report()
         return data
     
     def _is_instagram_valid(self, page: Page) -> bool:
@@ -179,16 +187,17 @@ class SocialAnalyzer:
         if not url.startswith("http"):
             url = "https://www.facebook.com/" + url
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            )
+        blocker = ResourceBlocker(BlockingPolicy.for_scraper('social'))
+        def browse(context):
+            """Página de Facebook en un hilo dueño de Chromium."""
+            blocker.install(context)
             page = context.new_page()
             
             try:
-                page.goto(url, wait_until="networkidle", timeout=self.timeout)
-                page.wait_for_timeout(2000)
+                page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+                data["settle_ms"] = wait_for_ready(
+                    page, ['[role="main"] h1'], timeout_ms=8000, label="facebook"
+                ).elapsed_ms
                 
                 # Verificar si la página existe
                 if self._is_facebook_valid(page):
@@ -209,10 +218,12 @@ class SocialAnalyzer:
             except Exception as e:
                 data["status"] = "error"
                 data["error"] = str(e)
-            
-            finally:
-                browser.close()
         
+        get_browser_workers(headless=self.headless).run(
+            browse, user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        )
+        
+        data["resource_blocking"] = blocker.report()
         return data
     
     def _is_facebook_valid(self, page: Page) -> bool:
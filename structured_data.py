@@ -0,0 +1,337 @@
+"""
+Extracción de datos estructurados schema.org (JSON-LD y microdata).
+Una sola pasada por el DOM junta todos los bloques; de ahí salen productos
+con precio, y datos del negocio (dirección, teléfono, redes en sameAs).
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+from urllib.parse import urljoin
+
+from html_parser import HtmlNode
+from price_engine import CURRENCY_SYMBOLS, parse_amount
+
+PRODUCT_TYPES = {'Product', 'ProductGroup', 'IndividualProduct', 'ProductModel'}
+BUSINESS_TYPES = {'Organization', 'LocalBusiness', 'Store', 'OnlineStore', 'OnlineBusiness', 'Corporation'}
+# Subtipos de LocalBusiness (ClothingStore, BarberShop, Restaurant...) se reconocen por sufijo
+_BUSINESS_SUFFIXES = ('Store', 'Business', 'Shop', 'Restaurant', 'Organization')
+
+SOCIAL_NETWORKS = (
+    ('instagram', 'instagram.com'),
+    ('facebook', 'facebook.com'),
+    ('linkedin', 'linkedin.com'),
+    ('twitter', 'twitter.com'),
+    ('twitter', 'x.com'),
+    ('tiktok', 'tiktok.com'),
+    ('youtube', 'youtube.com'),
+)
+
+MAX_DESCRIPTION_CHARS = 500
+MAX_IMAGES_PER_PRODUCT = 3
+MAX_VARIANTS = 30
+
+_CDATA_RE = re.compile(r'^\s*(?://\s*)?<!\[CDATA\[|\]\]>\s*$')
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+
+@dataclass
+class StructuredData:
+    """Entidades schema.org encontradas en la página."""
+    products: List[Dict[str, Any]] = field(default_factory=list)
+    businesses: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def business(self) -> Dict[str, Any]:
+        """Entidad de negocio más completa (la que tiene más propiedades)."""
+        return max(self.businesses, key=len) if self.businesses else {}
+
+
+def schema_type(node: Dict) -> List[str]:
+    """Tipos schema.org de una entidad, sin el prefijo de URL."""
+    raw = node.get('@type') or node.get('itemtype') or []
+    types = raw if isinstance(raw, list) else str(raw).split()
+    return [str(t).rstrip('/').rsplit('/', 1)[-1] for t in types]
+
+
+def _is_business(types: List[str]) -> bool:
+    return any(t in BUSINESS_TYPES or t.endswith(_BUSINESS_SUFFIXES) for t in types)
+
+
+def extract_structured_data(doc: HtmlNode) -> StructuredData:
+    """
+    Recorre el documento una vez y parsea todos los bloques JSON-LD y los
+    ítems de microdata de primer nivel.
+
+    Args:
+        doc: Documento de html_parser
+
+    Returns:
+        StructuredData con productos y negocios
+    """
+    data = StructuredData()
+    entities: List[Dict] = []
+
+    stack = [doc]
+    while stack:
+        node = stack.pop()
+        attrs = node.attrs
+        if node.tag == 'script':
+            if 'ld+json' in (attrs.get('type') or '').lower():
+                entities.extend(_parse_json_ld(node.raw_text()))
+            continue
+        if 'itemscope' in attrs and 'itemprop' not in attrs:
+            entities.append(_parse_microdata_item(node))
+            continue
+        stack.extend(reversed(node.children()))
+
+    for entity in _flatten(entities):
+        types = schema_type(entity)
+        if PRODUCT_TYPES.intersection(types):
+            data.products.append(entity)
+        elif _is_business(types):
+            data.businesses.append(entity)
+    return data
+
+
+def _parse_json_ld(text: str) -> List[Dict]:
+    """Parsea un bloque JSON-LD tolerando CDATA y comas finales."""
+    text = _CDATA_RE.sub('', text.strip())
+    if not text:
+        return []
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        try:
+            payload = json.loads(_TRAILING_COMMA_RE.sub(r'\1', text))
+        except ValueError:
+            return []
+    return payload if isinstance(payload, list) else [payload]
+
+
+def _flatten(entities: List[Any]) -> List[Dict]:
+    """Expande @graph, listas e ItemList en entidades sueltas."""
+    # Pila en orden inverso: las entidades anidadas se expanden en su lugar, en orden de documento
+    flat, pending = [], list(reversed(entities))
+    while pending:
+        entity = pending.pop()
+        if isinstance(entity, list):
+            pending.extend(reversed(entity))
+            continue
+        if not isinstance(entity, dict):
+            continue
+        if '@graph' in entity:
+            pending.extend(reversed(_as_list(entity['@graph'])))
+            continue
+        types = schema_type(entity)
+        if 'ItemList' in types:
+            items = []
+            for element in _as_list(entity.get('itemListElement')):
+                item = element.get('item') if isinstance(element, dict) and 'item' in element else element
+                if isinstance(item, dict) and PRODUCT_TYPES.intersection(schema_type(item)):
+                    items.append(item)
+            pending.extend(reversed(items))
+            continue
+        flat.append(entity)
+    return flat
+
+
+def _parse_microdata_item(node: HtmlNode) -> Dict:
+    """Convierte un elemento itemscope (y sus itemprop) en un dict estilo JSON-LD."""
+    item: Dict[str, Any] = {'@type': node.get('itemtype') or ''}
+    stack = list(reversed(node.children()))
+    while stack:
+        child = stack.pop()
+        attrs = child.attrs
+        prop = attrs.get('itemprop')
+        if prop:
+            value = _parse_microdata_item(child) if 'itemscope' in attrs else _microdata_value(child)
+            for name in prop.split():
+                if name in item:
+                    item[name] = _as_list(item[name]) + [value]
+                else:
+                    item[name] = value
+        if 'itemscope' not in attrs:
+            stack.extend(reversed(child.children()))
+    return item
+
+
+def _microdata_value(node: HtmlNode) -> str:
+    tag, attrs = node.tag, node.attrs
+    if tag == 'meta':
+        return attrs.get('content') or ''
+    if tag in ('a', 'link', 'area'):
+        return attrs.get('href') or ''
+    if tag in ('img', 'source', 'video', 'audio', 'iframe', 'embed'):
+        return attrs.get('src') or ''
+    if tag in ('time',) and attrs.get('datetime'):
+        return attrs['datetime']
+    if tag in ('data', 'meter') and attrs.get('value'):
+        return attrs['value']
+    return attrs.get('content') or node.text(separator=' ')
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _text(value) -> str:
+    """Primer valor de texto de una propiedad (str, lista o entidad con name)."""
+    for v in _as_list(value):
+        if isinstance(v, dict):
+            v = v.get('name') or v.get('@value') or ''
+        if v not in (None, ''):
+            return str(v).strip()
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Productos
+# ---------------------------------------------------------------------------
+
+def format_price(amount, currency: str = "") -> str:
+    """Importe con el símbolo de la moneda ('1500', 'ARS' -> '$1500.00'; '12,50' -> '12.50')."""
+    value = parse_amount(amount)
+    text = f"{value:.2f}" if value is not None else str(amount).strip()
+    if not currency:
+        return text
+    symbol = CURRENCY_SYMBOLS.get(currency.upper())
+    return f"{symbol}{text}" if symbol else f"{currency.upper()} {text}"
+
+
+def offer_price(offers) -> str:
+    """Precio (o rango) a partir de Offer / AggregateOffer / lista de ofertas."""
+    amounts, currency = [], ""
+    for offer in _as_list(offers):
+        if not isinstance(offer, dict):
+            continue
+        currency = currency or _text(offer.get('priceCurrency'))
+        spec = offer.get('priceSpecification')
+        for key in ('price', 'lowPrice', 'highPrice'):
+            value = _text(offer.get(key))
+            if not value and isinstance(spec, dict):
+                value = _text(spec.get(key))
+                currency = currency or _text(spec.get('priceCurrency'))
+            amount = parse_amount(value) if value else None
+            if amount is not None:
+                amounts.append(amount)
+    if not amounts:
+        return ""
+    low, high = min(amounts), max(amounts)
+    if low == high:
+        return format_price(low, currency)
+    return f"{format_price(low, currency)} - {format_price(high, currency)}"
+
+
+def _image_urls(value, base_url: str) -> List[str]:
+    urls = []
+    for image in _as_list(value):
+        if isinstance(image, dict):
+            image = image.get('url') or image.get('contentUrl') or ''
+        if isinstance(image, str) and image.strip():
+            url = urljoin(base_url, image.strip())
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+def variant_names(entity: Dict) -> List[str]:
+    """
+    Nombres de las variantes de un Product / ProductGroup (hasVariant u ofertas con nombre),
+    sin el nombre del producto cuando lo repiten ('Remera - Rojo / M' -> 'Rojo / M').
+    """
+    product_name = _text(entity.get('name'))
+    sources = [v for v in _as_list(entity.get('hasVariant')) if isinstance(v, dict)]
+    if not sources:
+        sources = [o for o in _as_list(entity.get('offers')) if isinstance(o, dict) and o.get('name')]
+    names = []
+    for variant in sources:
+        name = _text(variant.get('name'))
+        if not name:
+            name = ' / '.join(_text(variant.get(prop)) for prop in ('color', 'size', 'material') if variant.get(prop))
+        if product_name and name.startswith(product_name) and name != product_name:
+            name = name[len(product_name):].lstrip(' -–/|:')
+        if name and name not in names:
+            names.append(name)
+    return names[:MAX_VARIANTS]
+
+
+def product_record(entity: Dict, base_url: str) -> Dict[str, str]:
+    """Mapea una entidad Product al esquema de ProductExtractor (con URL, SKU y variantes)."""
+    offers = entity.get('offers')
+    if not offers and entity.get('hasVariant'):
+        offers = [v.get('offers') for v in _as_list(entity['hasVariant']) if isinstance(v, dict)]
+        offers = [o for group in offers for o in _as_list(group)]
+    description = _text(entity.get('description'))
+    url = _text(entity.get('url'))
+    sku = _text(entity.get('sku')) or _text(entity.get('productGroupID')) or _text(entity.get('mpn'))
+    return {
+        'nombre_articulo': _text(entity.get('name')),
+        'precio': offer_price(offers),
+        'descripcion': re.sub(r'\s+', ' ', description)[:MAX_DESCRIPTION_CHARS],
+        'url_imagenes': ', '.join(_image_urls(entity.get('image'), base_url)[:MAX_IMAGES_PER_PRODUCT]),
+        'url_producto': urljoin(base_url, url) if url else "",
+        'sku': sku,
+        'variantes': ', '.join(variant_names(entity))
+    }
+
+
+# ---------------------------------------------------------------------------
+# Negocio
+# ---------------------------------------------------------------------------
+
+def format_address(value) -> str:
+    """Dirección legible a partir de un PostalAddress (o texto)."""
+    for address in _as_list(value):
+        if isinstance(address, str):
+            return address.strip()
+        if isinstance(address, dict):
+            parts = [
+                _text(address.get(key)) for key in
+                ('streetAddress', 'addressLocality', 'addressRegion', 'postalCode', 'addressCountry')
+            ]
+            text = ', '.join(p for p in parts if p)
+            if text:
+                return text
+    return ""
+
+
+def business_record(entity: Dict) -> Dict[str, Any]:
+    """
+    Datos de contacto de una entidad Organization / LocalBusiness.
+
+    Returns:
+        Dict con nombre, telefonos, emails, direccion y redes ({red: url})
+    """
+    phones = [_text(p) for p in _as_list(entity.get('telephone'))]
+    emails = [_text(e).replace('mailto:', '') for e in _as_list(entity.get('email'))]
+    address = format_address(entity.get('address'))
+    for point in _as_list(entity.get('contactPoint')):
+        if isinstance(point, dict):
+            phones.append(_text(point.get('telephone')))
+            emails.append(_text(point.get('email')).replace('mailto:', ''))
+    if not address:
+        for location in _as_list(entity.get('location')):
+            if isinstance(location, dict):
+                address = format_address(location.get('address'))
+                if address:
+                    break
+
+    social: Dict[str, str] = {}
+    for url in _as_list(entity.get('sameAs')):
+        url_lower = str(url).lower()
+        for network, domain in SOCIAL_NETWORKS:
+            if domain in url_lower and network not in social:
+                social[network] = str(url)
+                break
+
+    return {
+        'nombre': _text(entity.get('name')),
+        'telefonos': [p for p in dict.fromkeys(phones) if p],
+        'emails': [e for e in dict.fromkeys(emails) if e],
+        'direccion': address,
+        'redes': social
+    }
@@ -0,0 +1,50 @@
+"""Mapeo de las APIs de catálogo al esquema de ProductExtractor."""
+
+from catalog_api import ShopifyAdapter, VtexAdapter, WooCommerceAdapter, currency_prefix
+
+ROOT = "https://tienda.com"
+
+
+def test_currency_prefix():
+    assert currency_prefix('ARS') == '$'
+    assert currency_prefix('usd') == 'US$'
+    assert currency_prefix('XYZ') == 'XYZ '
+    assert currency_prefix('', '$') == '$'
+    assert currency_prefix(None) == ''
+
+
+def test_shopify_maps_url_and_currency():
+    adapter = ShopifyAdapter(fetcher=None)
+    adapter.currency = 'USD'
+    product = adapter.map_product({
+        'title': ' Remera ',
+        'handle': 'remera-basica',
+        'variants': [{'price': '1500.00'}, {'price': '2000'}],
+        'images': [{'src': 'https://cdn.shopify.com/a.jpg'}],
+    }, ROOT)
+    assert product['nombre_articulo'] == 'Remera'
+    assert product['precio'] == 'US$1500.00 - US$2000.00'
+    assert product['url_producto'] == f"{ROOT}/products/remera-basica"
+
+
+def test_woocommerce_uses_permalink_and_currency_code():
+    adapter = WooCommerceAdapter(fetcher=None)
+    product = adapter.map_product({
+        'name': 'Taza',
+        'permalink': f"{ROOT}/producto/taza/",
+        'prices': {'price': '125000', 'currency_minor_unit': 2, 'currency_code': 'ARS', 'currency_symbol': '&#36;'},
+    }, ROOT)
+    assert product['precio'] == '$1250.00'
+    assert product['url_producto'] == f"{ROOT}/producto/taza/"
+
+
+def test_vtex_builds_link_from_link_text():
+    adapter = VtexAdapter(fetcher=None)
+    adapter.currency = 'BRL'
+    product = adapter.map_product({
+        'productName': 'Zapatilla',
+        'linkText': 'zapatilla-urbana',
+        'items': [{'sellers': [{'commertialOffer': {'Price': 199.9, 'AvailableQuantity': 3}}], 'images': []}],
+    }, ROOT)
+    assert product['precio'] == 'R$199.90'
+    assert product['url_producto'] == f"{ROOT}/zapatilla-urbana/p"
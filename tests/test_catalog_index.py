@@ -0,0 +1,58 @@
+"""CatalogIndex: deduplicación por URL canónica, imagen principal y nombre."""
+
+from catalog_index import CatalogIndex, canonical_product_url, full_size_image_url, image_key, normalize_name
+
+
+def test_keys_normalisation():
+    assert normalize_name('  Remera  Básica!! ') == 'remera basica'
+    assert image_key('https://CDN.shop.com/a_300x300.jpg?v=1') == 'cdn.shop.com/a.jpg'
+    assert image_key('/wp-content/a-300x300.jpg') == '/wp-content/a.jpg'
+    assert full_size_image_url('https://cdn.shop.com/a_300x.jpg?v=1') == 'https://cdn.shop.com/a.jpg?v=1'
+    assert canonical_product_url('https://shop.com/collections/verano/products/remera') == \
+        canonical_product_url('https://shop.com/products/remera')
+
+
+def test_merges_by_url_and_fills_missing_fields():
+    index = CatalogIndex()
+    first = index.add({'nombre_articulo': 'Remera', 'precio': '$ 1.000'}, 'https://shop.com/products/remera?utm_source=x')
+    index.add({'nombre_articulo': 'Remera', 'descripcion': 'Algodón peinado'}, 'https://shop.com/products/remera')
+    assert len(index) == 1 and index.merged == 1
+    assert first['descripcion'] == 'Algodón peinado'
+
+
+def test_different_urls_never_merge():
+    index = CatalogIndex()
+    index.add({'nombre_articulo': 'Remera'}, 'https://shop.com/products/remera-roja')
+    index.add({'nombre_articulo': 'Remera'}, 'https://shop.com/products/remera-azul')
+    assert len(index) == 2
+
+
+def test_merges_by_image_with_truncated_name():
+    index = CatalogIndex()
+    index.add({'nombre_articulo': 'Remera básica de algodón', 'url_imagenes': 'https://cdn/a_300x300.jpg'})
+    index.add({'nombre_articulo': 'Remera básica', 'url_imagenes': 'https://cdn/a.jpg', 'precio': '$ 1.000'})
+    assert len(index) == 1
+    assert index.products()[0]['precio'] == '$ 1.000'
+
+
+def test_same_name_with_different_images_stays_separate():
+    index = CatalogIndex()
+    index.add({'nombre_articulo': 'Remera básica', 'precio': '$1.000', 'url_imagenes': 'https://cdn/a.jpg'})
+    index.add({'nombre_articulo': 'Remera basica', 'precio': '$2.000', 'url_imagenes': 'https://cdn/b.jpg'})
+    assert [p['precio'] for p in index.products()] == ['$1.000', '$2.000']
+
+
+def test_same_name_without_image_merges():
+    index = CatalogIndex()
+    index.add({'nombre_articulo': 'Remera básica', 'url_imagenes': 'https://cdn/a.jpg'})
+    index.add({'nombre_articulo': 'Remera básica', 'descripcion': 'Algodón'})
+    assert len(index) == 1
+    assert index.products()[0]['descripcion'] == 'Algodón'
+
+
+def test_images_accumulate_without_size_duplicates():
+    index = CatalogIndex()
+    index.add({'nombre_articulo': 'Taza', 'url_imagenes': 'https://cdn/t.jpg'}, 'https://shop.com/p/taza')
+    index.add({'nombre_articulo': 'Taza', 'url_imagenes': 'https://cdn/t_600x600.jpg, https://cdn/t2.jpg'},
+              'https://shop.com/p/taza')
+    assert index.products()[0]['url_imagenes'] == 'https://cdn/t.jpg, https://cdn/t2.jpg'
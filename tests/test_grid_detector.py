@@ -0,0 +1,91 @@
+"""Detección estructural de grillas y caché de selectores por dominio."""
+
+import json
+
+import pytest
+
+from grid_detector import GridSelectorCache, ProductGrid, detect_product_grid
+from html_parser import parse_html
+from product_extractor import ProductExtractor
+
+_NAV = '<nav><ul><li><a href="/a">A</a></li><li><a href="/b">B</a></li><li><a href="/c">C</a></li></ul></nav>'
+
+
+def _cards(count: int = 4) -> str:
+    return ''.join(
+        f'<li class="card is-active item-{i}00"><a href="/p/{i}"><img src="/i/{i}.jpg"></a>'
+        f'<h3 class="title">Remera {i}</h3><span class="price">$ {i}.500</span></li>'
+        for i in range(1, count + 1)
+    )
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4'])
+def test_detects_repeated_cards_and_ignores_state_classes(backend):
+    html = f'<html><body>{_NAV}<ul class="products">{_cards()}</ul></body></html>'
+    grid = detect_product_grid(parse_html(html, backend))
+    assert grid.items == 4
+    assert grid.signature == 'ul.products > li.card'
+    assert grid.selectors == {
+        'producto': 'li.card', 'nombre': 'h3.title', 'precio': 'span.price',
+        'imagen': 'img', 'url_producto': 'a', 'descripcion': ''
+    }
+
+
+def test_selectors_extract_the_products():
+    html = f'<html><body>{_NAV}<ul class="products">{_cards()}</ul></body></html>'
+    doc = parse_html(html)
+    grid = detect_product_grid(doc)
+    products = ProductExtractor(selectors=grid.selectors).extract_products_from_document(doc, 'https://shop.com/')
+    assert [p['nombre_articulo'] for p in products] == ['Remera 1', 'Remera 2', 'Remera 3', 'Remera 4']
+
+
+def test_classless_items_anchor_on_ancestor_id_and_split_price():
+    items = ''.join(
+        f'<div><a href="/p/{i}"><img data-src="/i/{i}.jpg"></a><a href="/p/{i}">Producto {i}</a>'
+        f'<div class="amount"><span>$</span><span>{i}.500</span></div></div>'
+        for i in range(1, 5)
+    )
+    grid = detect_product_grid(parse_html(f'<html><body><section id="grid">{items}</section></body></html>'))
+    assert grid.selectors['producto'] == 'section#grid > div'
+    # El precio partido en dos spans se atribuye al contenedor más ajustado
+    assert grid.selectors['precio'] == 'div.amount'
+
+
+def test_no_grid_without_prices_or_repetition():
+    menu = ''.join(f'<li><a href="/c/{i}"><img src="/i{i}.png">Cat {i}</a></li>' for i in range(6))
+    assert detect_product_grid(parse_html(f'<html><body><ul class="menu">{menu}</ul></body></html>')) is None
+    assert detect_product_grid(parse_html(f'<html><body><ul>{_cards(2)}</ul></body></html>')) is None
+
+
+def test_cache_domains_strip_only_leading_www(tmp_path):
+    cache = GridSelectorCache(path=str(tmp_path / 'grids.json'))
+    grid = ProductGrid(selectors={'producto': 'li.card'}, items=4, signature='ul > li.card')
+    cache.record('https://www.shop.com/catalogo', grid)
+    assert cache.lookup('https://shop.com/otra') == {'producto': 'li.card'}
+    assert cache.lookup('https://shop.www.com/') is None
+    cache.forget('https://WWW.shop.com/')
+    assert cache.lookup('https://shop.com/') is None
+
+
+def test_cache_writes_are_deferred_until_flush(tmp_path):
+    path = tmp_path / 'grids.json'
+    cache = GridSelectorCache(path=str(path), save_interval=3600)
+    cache.record('https://a.com/', ProductGrid(selectors={'producto': 'li'}, items=3, signature='ul > li'))
+    cache.record('https://b.com/', ProductGrid(selectors={'producto': 'div.p'}, items=5, signature='main > div.p'))
+    assert list(json.loads(path.read_text())['grids']) == ['a.com']
+
+    cache.flush()
+    assert GridSelectorCache(path=str(path)).lookup('https://b.com/x') == {'producto': 'div.p'}
+
+
+def test_cache_failed_write_keeps_grids_pending(tmp_path, monkeypatch):
+    path = tmp_path / 'grids.json'
+    cache = GridSelectorCache(path=str(path), save_interval=3600)
+
+    def broken(data):
+        raise OSError('disco lleno')
+    monkeypatch.setattr(cache, '_save', broken)
+    cache.record('https://a.com/', ProductGrid(selectors={'producto': 'li'}, items=3, signature='ul > li'))
+    monkeypatch.undo()
+    cache.flush()
+    assert list(json.loads(path.read_text())['grids']) == ['a.com']
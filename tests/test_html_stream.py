@@ -0,0 +1,38 @@
+"""StreamSniffer: señales tempranas con el cuerpo partido en chunks arbitrarios."""
+
+import pytest
+
+from html_stream import StreamSniffer
+
+PAGE = (
+    '<html><head><meta charset="latin-1"><title>Tienda</title>'
+    '<script src="https://cdn.shopify.com/s/files/1/theme.js?v=' + 'x' * 120 + '"></script>'
+    '</head><body>' + ''.join(f'<a class="card" href="/products/p{i}?a=1&amp;b=2">Ñandú {i}</a>' for i in range(20))
+    + '</body></html>'
+).encode('latin-1')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 100, 4096])
+def test_signals_do_not_depend_on_chunk_boundaries(chunk_size):
+    sniffer = StreamSniffer('text/html')
+    for i in range(0, len(PAGE), chunk_size):
+        sniffer.feed(PAGE[i:i + chunk_size])
+    signals = sniffer.close()
+    assert signals.charset == 'iso8859-1'
+    assert signals.platform == 'shopify'
+    assert signals.head_complete
+    assert signals.anchors == [f'/products/p{i}?a=1&b=2' for i in range(20)]
+    assert sniffer.has('head', 'platform', 'anchors')
+
+
+def test_header_charset_and_binary_detection():
+    sniffer = StreamSniffer('application/octet-stream; charset=utf-8')
+    sniffer.feed(b'%PDF-1.7\n' + b'\x00' * 4096)
+    signals = sniffer.close()
+    assert signals.is_binary and signals.charset == 'utf-8'
+
+
+def test_platform_mention_in_text_is_not_a_signature():
+    sniffer = StreamSniffer('text/html')
+    sniffer.feed(b'<html><head></head><body><p>Migramos desde cdn.shopify.com</p></body></html>')
+    assert sniffer.close().platform is None
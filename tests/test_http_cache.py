@@ -0,0 +1,95 @@
+"""HttpCache: revalidación condicional, 304 servidos desde disco y desalojo LRU."""
+
+import itertools
+import types
+
+import httpx
+import pytest
+
+import http_cache
+from http_cache import HttpCache
+from http_fetcher import HttpFetcher
+
+_BODY = b'<html><body>catalogo</body></html>'
+
+
+def test_validators_become_conditional_headers(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    assert cache.put('https://shop.com/', 200, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, _BODY, 'utf-8')
+    entry = cache.get('https://shop.com/')
+    assert entry.content == _BODY
+    assert not entry.is_fresh()
+    assert entry.conditional_headers() == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+
+
+def test_refresh_updates_validators_and_freshness(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    cache.put('https://shop.com/', 200, {'ETag': '"v1"', 'Content-Type': 'text/html'}, _BODY, 'utf-8')
+    cache.refresh('https://shop.com/', {'ETag': '"v2"', 'Cache-Control': 'max-age=60', 'Set-Cookie': 'x=1'})
+    entry = cache.get('https://shop.com/')
+    assert entry.etag == '"v2"' and entry.is_fresh()
+    # Solo se actualizan los headers de validación, el resto queda como estaba
+    assert entry.headers['content-type'] == 'text/html' and 'set-cookie' not in entry.headers
+
+
+def test_uncacheable_responses_are_skipped(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http.sqlite'))
+    assert not cache.put('https://shop.com/a', 200, {}, _BODY, 'utf-8')
+    assert not cache.put('https://shop.com/b', 200, {'ETag': '"x"', 'Cache-Control': 'no-store'}, _BODY, 'utf-8')
+    assert not cache.put('https://shop.com/c', 404, {'ETag': '"x"'}, _BODY, 'utf-8')
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path, monkeypatch):
+    # Reloj que avanza en cada llamada: el orden LRU no depende de la resolución de time()
+    clock = itertools.count(1000)
+    monkeypatch.setattr(http_cache, 'time', types.SimpleNamespace(time=lambda: next(clock)))
+    cache = HttpCache(str(tmp_path / 'http.sqlite'), max_size_mb=250 / (1024 * 1024))
+    cache.EVICT_BATCH = 2
+    for name in 'abcd':
+        cache.put(f'https://shop.com/{name}', 200, {'ETag': name}, b'x' * 60, 'utf-8')
+    cache.touch('https://shop.com/a')
+    cache.put('https://shop.com/e', 200, {'ETag': 'e'}, b'x' * 100, 'utf-8')
+
+    stats = cache.stats()
+    assert stats['evictions'] == 2 and stats['size_bytes'] == 220
+    assert cache.get('https://shop.com/b') is None and cache.get('https://shop.com/c') is None
+    assert cache.get('https://shop.com/a') is not None and cache.get('https://shop.com/e') is not None
+
+
+def test_running_total_survives_replace_and_reopen(tmp_path):
+    path = str(tmp_path / 'http.sqlite')
+    cache = HttpCache(path)
+    cache.put('https://shop.com/', 200, {'ETag': '"v1"'}, b'x' * 500, 'utf-8')
+    cache.put('https://shop.com/', 200, {'ETag': '"v2"'}, b'x' * 200, 'utf-8')
+    assert cache.stats()['size_bytes'] == 200
+    cache.close()
+    assert HttpCache(path).stats()['size_bytes'] == 200
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_fetcher_serves_304_from_disk(tmp_path, stream):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get('if-none-match') == '"v1"':
+            return httpx.Response(304, headers={'ETag': '"v1"'})
+        return httpx.Response(200, headers={'ETag': '"v1"', 'Content-Type': 'text/html'}, content=_BODY)
+
+    fetcher = HttpFetcher(cache_path=str(tmp_path / 'http.sqlite'), http2=False)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        fetch = fetcher.fetch_stream_sync if stream else fetcher.fetch_sync
+        first = fetch('https://shop.com/')
+        second = fetch('https://shop.com/')
+    finally:
+        fetcher.close()
+
+    assert not first.from_cache and second.from_cache
+    assert second.status_code == 200 and second.content == _BODY
+    assert 'if-none-match' not in requests[0].headers and requests[1].headers['if-none-match'] == '"v1"'
+    stats = fetcher.cache_stats()
+    assert stats['hits'] == 1 and stats['revalidations'] == 1 and stats['misses'] == 1
@@ -0,0 +1,41 @@
+"""_Download: decisión sobre la respuesta al retomar un archivo parcial."""
+
+import hashlib
+
+from image_downloader import _Download, _range_start
+
+
+def _resume(tmp_path, offset: int = 100) -> _Download:
+    part = tmp_path / 'a.part'
+    part.write_bytes(b'x' * offset)
+    budget = {'bytes': 0, 'max_bytes': 10 ** 9, 'exhausted': False}
+    return _Download(str(part), offset, '"v1"', 10 ** 6, budget, hashlib.sha256(b'x' * offset))
+
+
+def test_range_start():
+    assert _range_start('bytes 100-199/200') == 100
+    assert _range_start('bytes 0-9/*') == 0
+    assert _range_start('') is None
+    assert _range_start('items 1-2/3') is None
+
+
+def test_resume_appends_only_when_range_matches_partial(tmp_path):
+    download = _resume(tmp_path)
+    assert download.on_response(206, {'Content-Range': 'bytes 100-199/200', 'ETag': '"v1"'}) is False
+    download.close().result()
+    assert not download.error
+
+    mismatched = _resume(tmp_path)
+    assert mismatched.on_response(206, {'Content-Range': 'bytes 0-199/200'}) is True
+    assert mismatched.error and not mismatched.opened
+    assert _resume(tmp_path).on_response(206, {}) is True
+
+
+def test_full_response_restarts_the_partial(tmp_path):
+    download = _resume(tmp_path)
+    assert download.on_response(200, {'Content-Length': '5'}) is False
+    assert download.offset == 0
+    download(b'hello')
+    download.close().result()
+    assert (tmp_path / 'a.part').read_bytes() == b'hello'
+    assert download.complete and download.hasher.hexdigest() == hashlib.sha256(b'hello').hexdigest()
@@ -0,0 +1,79 @@
+"""image_dimensions / sniff_format: encabezados armados a mano para cada formato."""
+
+import struct
+
+import pytest
+
+from image_probe import image_dimensions, sniff_format
+
+
+def _png(width: int, height: int) -> bytes:
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+
+
+def _jpeg(width: int, height: int, sof: int = 0xC0) -> bytes:
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    # Una tabla Huffman (0xC4) antes del SOF: no debe confundirse con un frame
+    dht = b'\xff\xc4' + struct.pack('>H', 5) + b'\x00\x00\x00'
+    sof_segment = bytes([0xFF, sof]) + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app0 + b'\xff\xff' + dht + sof_segment
+
+
+def _riff(chunk: bytes, payload: bytes) -> bytes:
+    return b'RIFF' + struct.pack('<I', 4 + 8 + len(payload)) + b'WEBP' + chunk + struct.pack('<I', len(payload)) + payload
+
+
+def _webp_lossy(width: int, height: int) -> bytes:
+    return _riff(b'VP8 ', b'\x00\x00\x00' + b'\x9d\x01\x2a' + struct.pack('<HH', width, height))
+
+
+def _webp_lossless(width: int, height: int) -> bytes:
+    bits = (width - 1) | ((height - 1) << 14)
+    return _riff(b'VP8L', b'\x2f' + struct.pack('<I', bits))
+
+
+def _webp_extended(width: int, height: int) -> bytes:
+    return _riff(b'VP8X', b'\x10\x00\x00\x00' + (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little'))
+
+
+def _avif(width: int, height: int) -> bytes:
+    ftyp = struct.pack('>I', 24) + b'ftyp' + b'avif' + b'\x00\x00\x00\x00' + b'mif1avif'
+    ispe = struct.pack('>I', 20) + b'ispe' + b'\x00\x00\x00\x00' + struct.pack('>II', width, height)
+    return ftyp + struct.pack('>I', 8 + len(ispe)) + b'meta' + ispe
+
+
+def _bmp(width: int, height: int) -> bytes:
+    return b'BM' + b'\x00' * 16 + struct.pack('<ii', width, height) + b'\x00' * 28
+
+
+@pytest.mark.parametrize('data, expected', [
+    (_png(1200, 800), ('png', 1200, 800)),
+    (b'GIF89a' + struct.pack('<HH', 320, 240) + b'\x00' * 6, ('gif', 320, 240)),
+    (_jpeg(1024, 768), ('jpeg', 1024, 768)),
+    (_jpeg(640, 480, sof=0xC2), ('jpeg', 640, 480)),
+    (_webp_lossy(800, 600), ('webp', 800, 600)),
+    (_webp_lossless(300, 200), ('webp', 300, 200)),
+    (_webp_extended(2000, 1500), ('webp', 2000, 1500)),
+    (_avif(1080, 1350), ('avif', 1080, 1350)),
+    # BMP de arriba hacia abajo: alto negativo
+    (_bmp(500, -400), ('bmp', 500, 400)),
+    (b'  <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10"></svg>', ('svg', 0, 0)),
+])
+def test_dimensions_per_format(data, expected):
+    assert image_dimensions(data) == expected
+    assert sniff_format(data) == expected[0]
+
+
+def test_truncated_headers_return_none():
+    assert image_dimensions(_png(1200, 800)[:20]) is None
+    jpeg = _jpeg(1024, 768)
+    # Cortado antes del SOF: hace falta otro Range, no un tamaño inventado
+    assert image_dimensions(jpeg[:jpeg.index(b'\xff\xc0')]) is None
+    assert image_dimensions(_webp_extended(2000, 1500)[:26]) is None
+
+
+def test_unknown_or_corrupt_data_returns_none():
+    assert image_dimensions(b'<!DOCTYPE html><html></html>') is None
+    assert sniff_format(b'') is None
+    # JPEG sin marcador válido tras el SOI
+    assert image_dimensions(b'\xff\xd8' + b'\x00' * 32) is None
@@ -0,0 +1,139 @@
+"""Paginación: números de página, detección en el HTML y presupuestos del recorrido."""
+
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from html_parser import parse_html
+from http_fetcher import FetchResult
+from listing_follower import ListingFollower, detect_pagination, listing_key, page_number
+
+
+def _detect(body: str, url: str = 'https://shop.com/c'):
+    return detect_pagination(parse_html(f'<html><body>{body}</body></html>'), url)
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://shop.com/c?page=3&sort=precio', (3, 'https://shop.com/c?page={page}&sort=precio')),
+    ('https://shop.com/c?Pagina=2', (2, 'https://shop.com/c?Pagina={page}')),
+    ('https://shop.com/blog/page/2/', (2, 'https://shop.com/blog/page/{page}/')),
+    ('https://shop.com/c?page=todas', None),
+    ('https://shop.com/c', None),
+])
+def test_page_number(url, expected):
+    assert page_number(url) == expected
+
+
+def test_listing_key_drops_only_the_page_number():
+    assert listing_key('https://shop.com/c?sort=precio&page=3') == 'https://shop.com/c?sort=precio'
+    assert listing_key('https://shop.com/c?page=2') == listing_key('https://shop.com/c')
+    assert listing_key('https://shop.com/blog/page/2/') == 'https://shop.com/blog'
+    assert listing_key('https://shop.com/c?page=2') != listing_key('https://shop.com/d?page=2')
+
+
+def test_numbered_query_pagination():
+    pagination = _detect(
+        '<ul class="pagination"><li><a href="/c?page=2">2</a></li>'
+        '<li><a href="/c?page=5">5</a></li><li><a href="/c?page=2">›</a></li></ul>'
+    )
+    assert pagination.kind == 'numbered'
+    assert pagination.next_url == 'https://shop.com/c?page=2'
+    assert pagination.last_page == 5
+    assert pagination.page_url(3) == 'https://shop.com/c?page=3'
+    assert pagination.page_url(1) == 'https://shop.com/c'
+
+
+def test_numbered_path_pagination_outside_a_container():
+    # Sin contenedor de paginación: cuentan porque el texto es el número de la URL
+    pagination = _detect('<a href="/blog/page/2/">2</a><a href="/blog/page/3/">3</a>', 'https://shop.com/blog/')
+    assert pagination.kind == 'numbered'
+    assert pagination.template == 'https://shop.com/blog/page/{page}'
+    assert sorted(pagination.pages) == [1, 2, 3]
+
+
+def test_wordpress_post_ids_are_not_pages():
+    pagination = _detect(
+        '<article><a href="/?p=123">Nueva colección</a></article>'
+        '<article><a href="/?p=456">Ofertas de invierno</a></article>',
+        'https://shop.com/'
+    )
+    assert pagination.kind is None and pagination.pages == {}
+
+
+def test_lone_arrow_needs_pagination_context():
+    assert _detect('<div class="slider"><a href="/ofertas">›</a></div>').next_url is None
+    assert _detect('<nav class="pagination"><a href="/c/ofertas">›</a></nav>').next_url == 'https://shop.com/c/ofertas'
+    assert _detect('<a href="/c?page=2">›</a>').next_url == 'https://shop.com/c?page=2'
+
+
+def test_load_more_and_infinite_scroll():
+    assert _detect('<button class="btn">Ver más</button>').kind == 'load_more'
+    assert _detect('<div class="infinite-scroll-container"></div>').kind == 'infinite_scroll'
+    # "Cargar más" con URL real se sigue como página siguiente
+    assert _detect('<a href="/c?page=2">Cargar más</a>').next_url == 'https://shop.com/c?page=2'
+
+
+class _FakeFetcher:
+    """Sirve páginas de listado generadas: products(n) da los productos de la página n."""
+
+    def __init__(self, products, last: int):
+        self.products = products
+        self.last = last
+        self.requested = []
+
+    def html(self, number: int) -> str:
+        cards = ''.join(f'<a class="card" href="/p/{p}">Producto {p}</a>' for p in self.products(number))
+        links = ''.join(f'<li><a href="/c?page={n}">{n}</a></li>' for n in range(1, self.last + 1))
+        return f'<html><body>{cards}<ul class="pagination">{links}</ul></body></html>'
+
+    async def fetch_stream(self, url, max_bytes=None, stop_when=None):
+        self.requested.append(url)
+        number = int(parse_qs(urlparse(url).query)['page'][0])
+        return FetchResult(
+            url=url, status_code=200, headers={'content-type': 'text/html'}, content=self.html(number).encode()
+        )
+
+
+def _follow(fetcher: _FakeFetcher, **limits):
+    seen_products = set()
+
+    def extract(doc, url):
+        hrefs = {node.get('href') for node in doc.select('a.card')}
+        new = hrefs - seen_products
+        seen_products.update(new)
+        return len(new)
+
+    first = parse_html(fetcher.html(1))
+    extract(first, 'https://shop.com/c')
+    follower = ListingFollower(fetcher, **limits)
+    return asyncio.run(follower.follow('https://shop.com/c', first, extract, items=len(seen_products)))
+
+
+def test_follow_walks_every_numbered_page():
+    fetcher = _FakeFetcher(lambda n: range(n * 10, n * 10 + 10), last=4)
+    result = _follow(fetcher, concurrency=2)
+    assert result.kind == 'numbered' and result.stopped_by == 'end'
+    assert result.pages == [f'https://shop.com/c?page={n}' for n in (2, 3, 4)]
+    assert result.items == 30
+
+
+def test_follow_stops_at_max_pages():
+    fetcher = _FakeFetcher(lambda n: range(n * 10, n * 10 + 10), last=10)
+    result = _follow(fetcher, max_pages=3, concurrency=2)
+    assert result.stopped_by == 'max_pages'
+    assert len(result.pages) == 3 and len(fetcher.requested) == 3
+
+
+def test_follow_stops_when_a_page_brings_nothing_new():
+    # A partir de la página 3 el sitio repite los productos de la 2
+    fetcher = _FakeFetcher(lambda n: range(min(n, 2) * 10, min(n, 2) * 10 + 10), last=8)
+    result = _follow(fetcher, concurrency=1)
+    assert result.stopped_by == 'no_new_items'
+    assert result.pages == ['https://shop.com/c?page=2'] and result.items == 10
+
+
+def test_follow_stops_at_max_items():
+    fetcher = _FakeFetcher(lambda n: range(n * 10, n * 10 + 10), last=10)
+    result = _follow(fetcher, max_items=25, concurrency=1)
+    assert result.stopped_by == 'max_items' and result.items == 20
@@ -0,0 +1,92 @@
+"""PriceEngine: parseo de precios y estadísticas de catálogo."""
+
+from decimal import Decimal
+
+import pytest
+
+from price_engine import PriceEngine
+
+
+@pytest.fixture
+def engine():
+    return PriceEngine('es-AR')
+
+
+@pytest.mark.parametrize('text, amount, currency', [
+    ('$ 12.500,00', '12500.00', 'ARS'),
+    ('$ 12.500', '12500', 'ARS'),
+    ('US$ 1,234.56', '1234.56', 'USD'),
+    ('R$ 99,90', '99.90', 'BRL'),
+    ('9.999 €', '9999', 'EUR'),
+    ('12,5', '12.5', 'ARS'),
+])
+def test_parse_amount_and_currency(engine, text, amount, currency):
+    price = engine.parse(text)
+    assert price.amount == Decimal(amount)
+    assert price.currency == currency
+
+
+def test_parse_range_and_from(engine):
+    price = engine.parse('Desde $1.000 - $2.000')
+    assert (price.amount, price.max_amount, price.is_from) == (Decimal('1000'), Decimal('2000'), True)
+    assert price.is_range
+
+
+def test_loose_numbers_are_not_prices(engine):
+    assert engine.parse('3 cuotas de $ 1.000').amount == Decimal('1000')
+    assert engine.parse('Antes $ 2.000 Ahora $ 1.500').amount == Decimal('1500')
+
+
+def test_suffix_mark_does_not_anchor_when_a_prefix_amount_exists(engine):
+    # '38 $' parece anclado por detrás, pero el precio es el que lleva el símbolo delante
+    assert engine.parse('Talle 38 $ 9.999').amount == Decimal('9999')
+
+
+def test_parse_without_amount(engine):
+    assert engine.parse('Consultar') is None
+    assert engine.parse('') is None
+
+
+def test_infer_decimal_separator_from_unambiguous_prices(engine):
+    assert engine.infer_decimal_separator(['$ 1,234.56', '$ 1,500']) == '.'
+    assert engine.infer_decimal_separator(['$ 1.234,56', '$ 1.500']) == ','
+    assert engine.infer_decimal_separator(['$ 1.500']) == ','  # ambiguo: el del locale
+
+
+def test_structured_prices_do_not_outvote_html_prices(engine):
+    stats = engine.stats(['$1500.00', '$2500.00', '$ 3.000', '$ 12.500'])['ARS']
+    assert (stats.min, stats.max, stats.count) == (1500.0, 12500.0, 4)
+    assert stats.p25 == pytest.approx(2250.0)
+
+
+def test_stats_split_by_currency(engine):
+    stats = engine.stats(['$ 1.000', '$ 3.000', 'US$ 10', None, 'Consultar'])
+    assert list(stats) == ['ARS', 'USD']
+    assert stats['ARS'].median == 2000.0
+    assert stats['USD'].count == 1
+
+
+def test_parse_many_aligns_with_input(engine):
+    column = engine.parse_many(['$ 1.000', '', '$ 1.000'])
+    assert column.valid.tolist() == [True, False, True]
+    assert column.low[2] == 1000.0
+
+
+def test_explicit_currency_decides_ambiguous_separator(engine):
+    assert engine.parse('USD 1,500').amount == Decimal('1500')
+    assert engine.parse('US$ 1.500').amount == Decimal('1.500')
+    assert PriceEngine('en-US').parse('R$ 1.500').amount == Decimal('1500')
+    # '$' solo es la moneda del locale: manda el separador del locale
+    assert engine.parse('$ 1,500').amount == Decimal('1.500')
+    # Un separador explícito (el que votó el catálogo) sigue teniendo prioridad
+    assert engine.parse('USD 1,500', decimal_sep=',').amount == Decimal('1.500')
+
+
+def test_texts_with_the_same_shape_keep_their_own_amounts(engine):
+    texts = ['$ 1.000 - $ 2.500', '$ 7.300 - $ 4.100', 'Talle 38 $ 9.999', 'Talle 42 $ 1.234']
+    prices = [engine.parse(text) for text in texts]
+    assert [(p.amount, p.max_amount) for p in prices] == [
+        (Decimal('1000'), Decimal('2500')), (Decimal('4100'), Decimal('7300')),
+        (Decimal('9999'), None), (Decimal('1234'), None),
+    ]
+    assert engine.parse_many(texts).prices == prices
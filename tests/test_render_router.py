@@ -0,0 +1,54 @@
+"""RenderRouter: dominios, rutas aprendidas y escrituras diferidas."""
+
+import json
+
+from render_router import HEAVY, LIGHT, RenderRouter
+
+
+def test_only_leading_www_is_stripped():
+    assert RenderRouter._domain('https://WWW.shop.com/x') == 'shop.com'
+    assert RenderRouter._domain('https://shop.www.example.com/') == 'shop.www.example.com'
+    assert RenderRouter._domain('https://newwww.shop.com/') == 'newwww.shop.com'
+
+
+def test_lookup_without_platform_uses_latest_route(tmp_path):
+    router = RenderRouter(path=str(tmp_path / 'routes.json'))
+    router.record('https://www.shop.com/', 'vtex', None, HEAVY)
+    router.record('https://shop.com/p', 'shopify', None, LIGHT)
+    decision = router.lookup('https://shop.com/otra')
+    assert decision.mode == LIGHT and decision.platform == 'shopify'
+    assert router.lookup('https://shop.com/', 'vtex').mode == HEAVY
+    assert router.lookup('https://otra.com/') is None
+
+
+def test_writes_are_deferred_until_flush(tmp_path):
+    path = tmp_path / 'routes.json'
+    router = RenderRouter(path=str(path), save_interval=3600)
+    router.record('https://a.com/', None, LIGHT, LIGHT)
+    router.record('https://b.com/', None, LIGHT, HEAVY)
+    assert len(json.loads(path.read_text())['routes']) == 1
+
+    router.flush()
+    reloaded = RenderRouter(path=str(path))
+    assert reloaded.stats()['learned_routes'] == 2
+    assert reloaded.stats()['verified'] == 2 and reloaded.stats()['accuracy'] == 0.5
+    assert reloaded.lookup('https://www.b.com/').mode == HEAVY
+
+
+def test_failed_write_keeps_changes_pending(tmp_path, monkeypatch):
+    path = tmp_path / 'routes.json'
+    router = RenderRouter(path=str(path), save_interval=3600)
+
+    def broken(data):
+        raise OSError('disco lleno')
+    monkeypatch.setattr(router, '_save', broken)
+    router.record('https://a.com/', None, None, LIGHT)
+    router.flush()
+    monkeypatch.undo()
+    router.flush()
+    assert 'a.com|' in json.loads(path.read_text())['routes']
+
+
+def test_verify_sample_rate():
+    assert not RenderRouter(path='', verify_rate=0).should_verify()
+    assert RenderRouter(path='', verify_rate=1).should_verify()
@@ -0,0 +1,65 @@
+"""Extracción de schema.org (JSON-LD y microdata) y mapeo a productos y negocio."""
+
+from html_parser import parse_html
+from structured_data import business_record, extract_structured_data, format_price, offer_price, product_record
+
+PAGE = """
+<html><head>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "Organization", "name": "Tienda Demo", "telephone": "+54 11 5555-5555",
+   "sameAs": ["https://instagram.com/demo", "https://x.com/demo"],
+   "address": {"@type": "PostalAddress", "streetAddress": "Av. Siempreviva 742", "addressLocality": "CABA"}},
+  {"@type": "ItemList", "itemListElement": [
+    {"@type": "ListItem", "item": {"@type": "Product", "name": "Remera", "sku": "R1",
+      "url": "/p/remera", "image": ["/img/r1.jpg", "/img/r1.jpg"],
+      "offers": {"@type": "Offer", "price": "1500", "priceCurrency": "ARS"}}}
+  ]},
+]}
+</script>
+</head><body>
+<div itemscope itemtype="https://schema.org/Product">
+  <span itemprop="name">Taza</span>
+  <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="12,50"><meta itemprop="priceCurrency" content="EUR">
+  </div>
+</div>
+</body></html>
+"""
+
+
+def test_extracts_json_ld_with_trailing_comma_and_microdata():
+    data = extract_structured_data(parse_html(PAGE, 'lxml'))
+    assert [p['name'] for p in data.products] == ['Remera', 'Taza']
+    assert data.business['name'] == 'Tienda Demo'
+
+
+def test_product_record_maps_to_extractor_schema():
+    data = extract_structured_data(parse_html(PAGE, 'lxml'))
+    remera, taza = (product_record(p, 'https://tienda.com/') for p in data.products)
+    assert remera['precio'] == '$1500.00'
+    assert remera['url_producto'] == 'https://tienda.com/p/remera'
+    assert remera['url_imagenes'] == 'https://tienda.com/img/r1.jpg'
+    assert remera['sku'] == 'R1'
+    assert taza['precio'] == '€12.50'
+
+
+def test_decimal_comma_prices_keep_their_cents():
+    assert format_price('12,50', 'EUR') == '€12.50'
+    assert format_price('1.234,56', 'ARS') == '$1234.56'
+    assert offer_price([{'price': '12,50'}, {'price': '9,99'}]) == '9.99 - 12.50'
+
+
+def test_offer_price_range_and_specification():
+    assert offer_price({'@type': 'AggregateOffer', 'lowPrice': 1000, 'highPrice': 2500, 'priceCurrency': 'USD'}) \
+        == 'US$1000.00 - US$2500.00'
+    assert offer_price({'priceSpecification': {'price': '99.90', 'priceCurrency': 'BRL'}}) == 'R$99.90'
+    assert offer_price({'price': 'Consultar'}) == ''
+
+
+def test_business_record_contact_data():
+    data = extract_structured_data(parse_html(PAGE, 'lxml'))
+    record = business_record(data.business)
+    assert record['telefonos'] == ['+54 11 5555-5555']
+    assert record['direccion'] == 'Av. Siempreviva 742, CABA'
+    assert record['redes'] == {'instagram': 'https://instagram.com/demo', 'twitter': 'https://x.com/demo'}